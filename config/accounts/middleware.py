@@ -0,0 +1,32 @@
+from urllib.parse import parse_qs
+
+from channels.db import database_sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+
+class JWTAuthMiddleware:
+    """Channels middleware authenticating WebSocket connections by JWT.
+
+    Browsers cannot set an ``Authorization`` header on a WebSocket, so the
+    access token is read from the ``token`` query parameter instead.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.auth = JWTAuthentication()
+
+    async def __call__(self, scope, receive, send):
+        token = parse_qs(scope.get('query_string', b'').decode()).get('token', [None])[0]
+        scope = dict(scope, user=await self.get_user(token))
+        return await self.app(scope, receive, send)
+
+    @database_sync_to_async
+    def get_user(self, token):
+        if not token:
+            return AnonymousUser()
+        try:
+            return self.auth.get_user(self.auth.get_validated_token(token))
+        except (InvalidToken, TokenError):
+            return AnonymousUser()
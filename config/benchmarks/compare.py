@@ -0,0 +1,89 @@
+"""Diff two benchmark results written with ``--output``.
+
+Works on the JSON of any script here (``judging_load.py`` baselines in
+particular): every number is compared by its path in the document, e.g.
+``scenarios.landing.p95_ms``. Whether a change is for the worse is told
+from the name: latencies (``*_ms``), ``errors``, ``queries*`` and
+``overhead_pct`` should go down, ``*per_second`` up; other numbers are
+listed but not judged. The ``config`` block is checked for differences
+only, since results from different setups do not compare.
+
+Exits non-zero if anything got worse by more than ``--threshold`` percent
+(or became non-zero from zero). Run from the ``config`` directory:
+
+    python benchmarks/compare.py load_main.json load_mybranch.json
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+
+def flatten(document, prefix=''):
+    """``{"a.b.c": number}`` for every number in the nested dicts of ``document``."""
+    numbers = {}
+    for key, value in document.items():
+        path = f'{prefix}{key}'
+        if isinstance(value, dict):
+            numbers.update(flatten(value, f'{path}.'))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            numbers[path] = value
+    return numbers
+
+
+def direction(path):
+    """-1 if lower is better, 1 if higher is better, 0 if the number is not judged."""
+    name = path.rsplit('.', 1)[-1]
+    if name.endswith('_ms') or name == 'errors' or name.startswith('queries') or name == 'overhead_pct':
+        return -1
+    if name.endswith('per_second'):
+        return 1
+    return 0
+
+
+def change(before, after):
+    if before == after:
+        return 0.0
+    if before == 0:
+        return float('inf') if after > 0 else float('-inf')
+    return (after - before) / abs(before) * 100
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('before')
+    parser.add_argument('after')
+    parser.add_argument('--threshold', type=float, default=10, help='Percent a number may get worse by (default 10)')
+    args = parser.parse_args()
+
+    before = json.loads(Path(args.before).read_text())
+    after = json.loads(Path(args.after).read_text())
+
+    config_before, config_after = before.pop('config', {}), after.pop('config', {})
+    for key in sorted(config_before.keys() | config_after.keys()):
+        if key != 'seconds' and config_before.get(key) != config_after.get(key):
+            print(f'warning: config.{key} differs: {config_before.get(key)} -> {config_after.get(key)}', file=sys.stderr)
+
+    old, new = flatten(before), flatten(after)
+    regressions = []
+    width = max(map(len, old.keys() | new.keys()), default=0)
+    print(f"{'metric':<{width}}  {'before':>10}  {'after':>10}  {'change':>8}")
+    for path in sorted(old.keys() | new.keys()):
+        if path not in old or path not in new:
+            print(f"{path:<{width}}  {old.get(path, '-')!s:>10}  {new.get(path, '-')!s:>10}")
+            continue
+        pct = change(old[path], new[path])
+        worse = direction(path) * pct < -args.threshold
+        if worse:
+            regressions.append(path)
+        print(f"{path:<{width}}  {old[path]!s:>10}  {new[path]!s:>10}  {pct:>+7.1f}%{'  WORSE' if worse else ''}")
+
+    if regressions:
+        print(f'\n{len(regressions)} number(s) got worse by more than {args.threshold:g}%', file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
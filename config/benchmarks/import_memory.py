@@ -0,0 +1,110 @@
+"""Peak-memory benchmark for ``import_from_excel``.
+
+Generates Teams sheets of the requested sizes as CSV and XLSX, imports each
+into a fresh SQLite database in a child process and records the child's
+wall time and peak RSS. Run from the ``config`` directory:
+
+    python benchmarks/import_memory.py --rows 10000 100000 --output import_memory.json
+"""
+
+import argparse
+import csv
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from openpyxl import Workbook
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+HEADER = [
+    'team_id', 'team_name', 'primary_ps_id', 'primary_ps_title', 'primary_idea_title', 'primary_idea_description',
+    'idea1_ps_title', 'idea1_title', 'idea1_description', 'idea2_ps_title', 'idea2_title', 'idea2_description',
+]
+
+
+def team_rows(count):
+    for n in range(count):
+        yield [
+            f'T{n:07d}', f'Team {n}', f'PS-{n % 250}', f'Problem statement {n % 250}',
+            f'Primary idea {n}', 'A reasonably long idea description. ' * 8,
+            'Secondary PS', f'Idea {n}.1', 'Another description. ' * 6,
+            'Tertiary PS', f'Idea {n}.2', 'Yet another description. ' * 6,
+        ]
+
+
+def write_csv(path, count):
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADER)
+        writer.writerows(team_rows(count))
+
+
+def write_xlsx(path, count):
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Teams')
+    sheet.append(HEADER)
+    for row in team_rows(count):
+        sheet.append(row)
+    workbook.save(path)
+
+
+def run_child(args, env):
+    """Run a child process and return (seconds, peak RSS in MiB) for it alone."""
+    start = time.perf_counter()
+    process = subprocess.Popen(args, env=env, cwd=BASE_DIR, stdout=subprocess.DEVNULL)
+    _, status, usage = os.wait4(process.pid, 0)
+    seconds = time.perf_counter() - start
+    if os.waitstatus_to_exitcode(status) != 0:
+        raise SystemExit(f'{" ".join(args)} failed')
+    # ru_maxrss is KiB on Linux
+    return seconds, usage.ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--formats', nargs='+', choices=['csv', 'xlsx'], default=['csv', 'xlsx'])
+    parser.add_argument('--chunk-size', type=int, default=2000)
+    parser.add_argument('--output', help='Write the results as JSON to this file')
+    options = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in options.rows:
+            for file_format in options.formats:
+                source = Path(tmp) / f'teams_{count}.{file_format}'
+                (write_csv if file_format == 'csv' else write_xlsx)(source, count)
+
+                env = dict(
+                    os.environ,
+                    DJANGO_SETTINGS_MODULE='benchmarks.settings',
+                    BENCH_DATABASE=str(Path(tmp) / f'bench_{count}_{file_format}.sqlite3'),
+                )
+                manage = [sys.executable, 'manage.py']
+                run_child(manage + ['migrate', '--noinput'], env)
+                seconds, peak_mb = run_child(
+                    manage + ['import_from_excel', str(source), '--chunk-size', str(options.chunk_size)], env,
+                )
+                result = {
+                    'format': file_format,
+                    'rows': count,
+                    'file_mb': round(source.stat().st_size / 2 ** 20, 1),
+                    'seconds': round(seconds, 2),
+                    'peak_rss_mb': round(peak_mb, 1),
+                }
+                results.append(result)
+                print(f"{file_format:>4} {count:>8} rows  file {result['file_mb']:>7} MiB  "
+                      f"{result['seconds']:>8}s  peak RSS {result['peak_rss_mb']:>7} MiB")
+
+    if options.output:
+        with open(options.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
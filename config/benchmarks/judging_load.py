@@ -0,0 +1,326 @@
+"""Load test of the judging workflow over HTTP, for a baseline per commit.
+
+Generates an event with ``manage.py generate_bench_data`` (``--teams``
+teams, ``--judges`` judges, ``--coverage`` of the assignments already
+scored) in a scratch database, starts ``manage.py runserver`` on it and has
+``--threads`` judges and ``--admins`` admins work it for ``--seconds``:
+
+* every user logs in once through ``/api/token/``, before the clock starts
+  (so password hashing does not count against throughput);
+* judges poll ``/api/landing/landing_data/?assigned=me``, open the team
+  detail page of one of their teams and submit rubric scores for it,
+  weighted by ``JUDGE_MIX``;
+* admins poll ``/api/judging/progress/`` and set idea approvals
+  (``ADMIN_MIX``).
+
+Reports per scenario the number of requests, errors, throughput and
+p50/p95/p99 latency, and the queries per request from the server's
+``/metrics`` (a difference of two scrapes, so per endpoint, averaged over
+cache hits and misses). Compare two runs with ``benchmarks/compare.py``.
+Run from the ``config`` directory:
+
+    BENCH_DATABASE=/tmp/load.sqlite3 python benchmarks/judging_load.py --output load_$(git rev-parse --short HEAD).json
+
+Or against a server that is already running on data from
+``generate_bench_data`` (with the same ``--password``):
+
+    python benchmarks/judging_load.py --url http://127.0.0.1:8000 --metrics-token <METRICS_TOKEN>
+
+The run flushes the database it is pointed at (see ``benchmarks.settings``).
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import secrets
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from pathlib import Path
+
+import django
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.db import connection  # noqa: E402
+
+from benchmarks.submit_load import percentile  # noqa: E402
+
+# scenario -> relative weight
+JUDGE_MIX = {'landing': 6, 'team_detail': 3, 'submit_scores': 1}
+ADMIN_MIX = {'progress': 3, 'approve': 1}
+
+# scenario -> (method, URL name) as labelled in /metrics
+ENDPOINTS = {
+    'login': ('POST', 'token_obtain_pair'),
+    'landing': ('GET', 'landing-landing-data'),
+    'team_detail': ('GET', 'team-detail'),
+    'submit_scores': ('POST', 'submit-rubric-scores'),
+    'progress': ('GET', 'progress'),
+    'approve': ('POST', 'approve-ideas'),
+}
+
+# the rubrics endpoint does not show max_score; every criterion from seed_rubrics allows this much
+MAX_SCORE = 5
+
+METRIC_LINE = re.compile(r'^http_request_db_queries_(sum|count)\{method="([^"]*)",endpoint="([^"]*)"\} (\S+)$')
+
+
+class Session:
+    """One simulated user: a bearer token, a random source and a log of (scenario, seconds, status)."""
+
+    def __init__(self, base_url, rnd=None):
+        self.base_url = base_url
+        self.rnd = rnd
+        self.token = None
+        self.log = []
+
+    def request(self, scenario, method, path, payload=None):
+        """Returns the decoded JSON body, or None when the request failed."""
+        headers = {'Accept': 'application/json'}
+        if self.token:
+            headers['Authorization'] = f'Bearer {self.token}'
+        data = None
+        if payload is not None:
+            data = json.dumps(payload).encode()
+            headers['Content-Type'] = 'application/json'
+        request = urllib.request.Request(self.base_url + path, data=data, headers=headers, method=method)
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=60) as response:
+                body, status = response.read(), response.status
+        except urllib.error.HTTPError as exc:
+            body, status = exc.read(), exc.code
+        except OSError:
+            # refused, reset or timed out
+            body, status = b'', 0
+        self.log.append((scenario, time.perf_counter() - start, status))
+        if not 200 <= status < 300:
+            return None
+        return json.loads(body) if body else {}
+
+    def login(self, username, password):
+        tokens = self.request('login', 'POST', '/api/token/', {'username': username, 'password': password})
+        self.token = tokens and tokens['access']
+        return self.token is not None
+
+
+def simulate(session, username, password, barrier, seconds, think, step):
+    """Log in, wait for everyone else to, then call ``step()`` for ``seconds``."""
+    logged_in = session.login(username, password)
+    barrier.wait()
+    deadline = time.perf_counter() + seconds
+    while logged_in and time.perf_counter() < deadline:
+        step()
+        if think:
+            time.sleep(session.rnd.uniform(0, think))
+
+
+def judge_step(session, criteria):
+    teams = []
+
+    def step():
+        rnd = session.rnd
+        scenario = rnd.choices(list(JUDGE_MIX), weights=JUDGE_MIX.values())[0]
+        if scenario == 'landing' or not teams:
+            rows = session.request('landing', 'GET', '/api/landing/landing_data/?assigned=me')
+            if rows is not None:
+                teams[:] = [row['team_id'] for row in rows]
+        elif scenario == 'team_detail':
+            session.request('team_detail', 'GET', f'/api/teams/{rnd.choice(teams)}/details/')
+        else:
+            payload = {'team_id': rnd.choice(teams)}
+            payload.update({name: rnd.randint(0, MAX_SCORE) for name in criteria})
+            session.request('submit_scores', 'POST', '/api/teams/scores/submit/', payload)
+    return step
+
+
+def admin_step(session, team_ids):
+    def step():
+        rnd = session.rnd
+        scenario = rnd.choices(list(ADMIN_MIX), weights=ADMIN_MIX.values())[0]
+        if scenario == 'progress':
+            session.request('progress', 'GET', '/api/judging/progress/')
+        else:
+            # the primary idea is always "Idea <team_id>-0"; approve it or nothing
+            team_id = rnd.choice(team_ids)
+            titles = [f'Idea {team_id}-0'] if rnd.random() < 0.8 else []
+            session.request('approve', 'POST', f'/api/teams/{team_id}/ideas/approve/', {'approved_ideas': titles})
+    return step
+
+
+def scrape_queries(base_url, token):
+    """``{(method, endpoint): (queries, requests)}`` from the server's /metrics, or {} if unavailable."""
+    request = urllib.request.Request(base_url + '/metrics', headers={'Authorization': f'Bearer {token}'} if token else {})
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            text = response.read().decode()
+    except OSError:
+        return {}
+    totals = defaultdict(lambda: [0.0, 0.0])
+    for line in text.splitlines():
+        match = METRIC_LINE.match(line)
+        if match:
+            kind, method, endpoint, value = match.groups()
+            totals[method, endpoint][kind == 'count'] = float(value)
+    return totals
+
+
+def start_server(port, metrics_token):
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE='benchmarks.settings', METRICS_TOKEN=metrics_token)
+    server = subprocess.Popen(
+        [sys.executable, 'manage.py', 'runserver', f'127.0.0.1:{port}', '--noreload'],
+        cwd=settings.BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    base_url = f'http://127.0.0.1:{port}'
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise SystemExit(f'runserver exited with {server.returncode}')
+        try:
+            urllib.request.urlopen(base_url + '/metrics', timeout=1).close()
+            return server, base_url
+        except urllib.error.HTTPError:
+            return server, base_url
+        except OSError:
+            time.sleep(0.2)
+    server.terminate()
+    raise SystemExit('runserver did not come up within 60 seconds')
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def summarize(entries, elapsed, queries=None):
+    latencies = sorted(seconds for seconds, _ in entries)
+    return {
+        'requests': len(entries),
+        'errors': sum(not 200 <= status < 300 for _, status in entries),
+        'requests_per_second': round(len(entries) / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+        'queries_per_request': queries,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--teams', type=int, default=300)
+    parser.add_argument('--judges', type=int, default=30, help='Judges in the generated data')
+    parser.add_argument('--coverage', type=float, default=0.5, help='Share of assignments scored before the run')
+    parser.add_argument('--threads', type=int, default=8, help='Concurrent judges (at most --judges)')
+    parser.add_argument('--admins', type=int, default=1, help='Concurrent admins')
+    parser.add_argument('--seconds', type=float, default=30)
+    parser.add_argument('--think-ms', type=float, default=0, help='Random pause of up to this long between requests')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--password', default='bench')
+    parser.add_argument('--url', help='Use this running server and its data instead of starting one')
+    parser.add_argument('--metrics-token', default='', help="The server's METRICS_TOKEN, with --url")
+    parser.add_argument('--output', help='Also write the result as JSON to this file')
+    args = parser.parse_args()
+    if args.threads > args.judges:
+        parser.error('--threads cannot exceed --judges')
+
+    server = None
+    if args.url:
+        base_url, metrics_token = args.url.rstrip('/'), args.metrics_token
+    else:
+        call_command('migrate', verbosity=0)
+        call_command(
+            'generate_bench_data', flush=True, teams=args.teams, judges=args.judges, coverage=args.coverage,
+            password=args.password, seed=args.seed, stdout=open(os.devnull, 'w'),
+        )
+        connection.close()
+        metrics_token = secrets.token_hex(16)
+        server, base_url = start_server(free_port(), metrics_token)
+
+    try:
+        setup = Session(base_url)
+        if not setup.login('bench-admin', args.password):
+            raise SystemExit('Could not log in as bench-admin; run generate_bench_data with the same --password')
+        rubric = setup.request('setup', 'GET', '/api/judging/rubrics/')
+        criteria = [criterion['name'] for criterion in rubric]
+        team_ids = [f'T{n:05d}' for n in range(args.teams)]
+
+        before = scrape_queries(base_url, metrics_token)
+        workers = args.threads + args.admins
+        barrier = threading.Barrier(workers + 1)
+        sessions, threads = [], []
+        for n in range(workers):
+            session = Session(base_url, random.Random(args.seed * 1000 + n))
+            if n < args.threads:
+                username, step = f'bench-judge-{n}', judge_step(session, criteria)
+            else:
+                username, step = 'bench-admin', admin_step(session, team_ids)
+            sessions.append(session)
+            threads.append(threading.Thread(
+                target=simulate, args=(session, username, args.password, barrier, args.seconds, args.think_ms / 1000, step),
+            ))
+        for thread in threads:
+            thread.start()
+        # logins are slow on purpose (password hashing); time the rest on its own
+        barrier.wait()
+        started = time.perf_counter()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        after = scrape_queries(base_url, metrics_token)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    by_scenario = defaultdict(list)
+    for session in sessions:
+        for scenario, seconds, status in session.log:
+            by_scenario[scenario].append((seconds, status))
+
+    scenarios = {}
+    for scenario in ENDPOINTS:
+        if not by_scenario[scenario]:
+            continue
+        queries, served = (
+            after.get(ENDPOINTS[scenario], (0, 0))[i] - before.get(ENDPOINTS[scenario], (0, 0))[i] for i in (0, 1)
+        )
+        scenarios[scenario] = summarize(by_scenario[scenario], elapsed, round(queries / served, 2) if served else None)
+    result = {
+        'config': {
+            'backend': connection.vendor if server is not None else 'external',
+            'url': args.url,
+            'teams': args.teams,
+            'judges': args.judges,
+            'coverage': args.coverage,
+            'threads': args.threads,
+            'admins': args.admins,
+            'think_ms': args.think_ms,
+            'seconds': round(elapsed, 2),
+        },
+        'total': summarize([entry for name, entries in by_scenario.items() if name != 'login' for entry in entries], elapsed),
+        'scenarios': scenarios,
+    }
+
+    columns = ('requests', 'errors', 'requests_per_second', 'p50_ms', 'p95_ms', 'p99_ms', 'queries_per_request')
+    print(f"{'scenario':<14}" + ''.join(f'  {column}' for column in columns))
+    for name, row in [*scenarios.items(), ('total', result['total'])]:
+        print(f'{name:<14}' + ''.join(f"  {'-' if row[column] is None else row[column]:>{len(column)}}" for column in columns))
+    if args.output:
+        Path(args.output).write_text(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+"""Cost of ``config.metrics.MetricsMiddleware`` on the hot read endpoints.
+
+Seeds ``--teams`` teams (with ideas and scores) into a scratch database and
+requests each endpoint in-process through the ASGI handler, authenticated
+with a JWT, as ``runserver`` (daphne) serves them, alternating request by
+request between a client with and one without the middleware so drift in
+machine load hits both alike. Reports the median time per request for both, and the overhead
+as the median of the paired differences over the median without: on a
+millisecond request the two medians alone drift apart by more than the
+middleware costs. The response cache stays on, as in production, which
+makes the requests cheap and the overhead as visible as it gets. Run from
+the ``config`` directory:
+
+    BENCH_DATABASE=/tmp/metrics.sqlite3 python benchmarks/metrics_overhead.py --teams 500
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import django
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.db import transaction  # noqa: E402
+from django.test import AsyncClient  # noqa: E402
+from django.test.utils import override_settings  # noqa: E402
+from rest_framework_simplejwt.tokens import RefreshToken  # noqa: E402
+
+from accounts.models import User  # noqa: E402
+from judging.models import IdeaScore  # noqa: E402
+from judging.rubrics import get_rubric  # noqa: E402
+from judging.summaries import rebuild_all_summaries  # noqa: E402
+from teams.models import Team, Idea  # noqa: E402
+
+ENDPOINTS = [
+    '/api/landing/landing_data/',
+    '/api/teams/?page_size=100',
+    '/api/ideas/?page_size=100',
+    '/api/teams/M00001/details/',
+    '/api/judging/scores/?page_size=100',
+]
+
+
+def seed(teams, judges=10, seed=1):
+    rnd = random.Random(seed)
+    call_command('migrate', verbosity=0)
+    call_command('flush', '--noinput', verbosity=0)
+    call_command('seed_rubrics', stdout=open(os.devnull, 'w'))
+    criteria = get_rubric().criteria
+    with transaction.atomic():
+        created = Team.objects.bulk_create(Team(team_id=f'M{n:05d}', team_name=f'Team {n}') for n in range(teams))
+        ideas = Idea.objects.bulk_create(
+            Idea(team=team, sih_ps_id=f'PS{n % 20}', ps_title='PS', ps_description='', idea_title=f'Idea {i}',
+                 idea_description='', is_primary=i == 0, approved=i == 0)
+            for n, team in enumerate(created)
+            for i in range(rnd.randint(1, 3))
+        )
+        judge_users = User.objects.bulk_create(User(username=f'metrics-judge-{n}', role='judge') for n in range(judges))
+        IdeaScore.objects.bulk_create(
+            IdeaScore(idea=idea, judge=judge, criterion_id=criterion.pk, score=rnd.randint(0, criterion.max_score))
+            for idea in ideas if idea.is_primary
+            for judge in rnd.sample(judge_users, 3)
+            for criterion in criteria
+        )
+    rebuild_all_summaries()
+    return User.objects.create_user('metrics-admin', role='admin')
+
+
+async def client_for(user, middleware):
+    # an ASGI header name: AsyncClient's headers= would arrive as HTTP-AUTHORIZATION
+    client = AsyncClient(authorization=f'Bearer {RefreshToken.for_user(user).access_token}')
+    # the handler builds its middleware chain on the first request and keeps it
+    with override_settings(MIDDLEWARE=middleware):
+        await client.get(ENDPOINTS[0])
+    return client
+
+
+async def timed(client, path):
+    start = time.perf_counter()
+    response = await client.get(path)
+    elapsed = time.perf_counter() - start
+    assert response.status_code == 200, (path, response.status_code)
+    return elapsed
+
+
+async def measure(clients, requests):
+    result = {}
+    for path in ENDPOINTS:
+        samples = {'with': [], 'without': []}
+        for n in range(requests):
+            for name in (('with', 'without') if n % 2 else ('without', 'with')):
+                samples[name].append(await timed(clients[name], path))
+        on, off = statistics.median(samples['with']), statistics.median(samples['without'])
+        cost = statistics.median(a - b for a, b in zip(samples['with'], samples['without']))
+        result[path] = {
+            'with_ms': round(on * 1000, 4),
+            'without_ms': round(off * 1000, 4),
+            'overhead_us': round(cost * 1e6, 1),
+            'overhead_pct': round(cost / off * 100, 2),
+        }
+        print(
+            f"{path:<40} {off * 1000:8.3f} ms -> {on * 1000:8.3f} ms  "
+            f"{result[path]['overhead_us']:+7.1f} us  {result[path]['overhead_pct']:+6.2f}%"
+        )
+    return result
+
+
+async def run(admin, requests):
+    with_metrics = list(settings.MIDDLEWARE)
+    without = [name for name in with_metrics if name != 'config.metrics.MetricsMiddleware']
+    clients = {'with': await client_for(admin, with_metrics), 'without': await client_for(admin, without)}
+    # keep the seeding garbage out of every later collection
+    gc.collect()
+    gc.freeze()
+    return await measure(clients, requests)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--teams', type=int, default=500)
+    parser.add_argument('--requests', type=int, default=2000, help='Requests per endpoint and client')
+    parser.add_argument('--output', help='Also write the result as JSON to this file')
+    args = parser.parse_args()
+
+    settings.ALLOWED_HOSTS = ['*']
+    admin = seed(args.teams)
+    result = asyncio.run(run(admin, args.requests))
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
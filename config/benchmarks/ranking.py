@@ -0,0 +1,148 @@
+"""Ranking benchmark: the NumPy engine in ``judging.ranking`` against the ORM.
+
+Seeds a scratch database with ``--teams`` teams (one primary idea each),
+``--judges`` judges and the rubric, has ``--judges-per-team`` random judges
+score every criterion of each team, then times:
+
+* ``numpy``: ``rank_teams`` for each method (query + compute), plus the
+  compute step alone;
+* ``orm``: ``Sum`` over the raw scores per idea (today's raw ranking), and
+  a per-(idea, judge) ``GROUP BY`` with the mean and z-score folded in
+  Python.
+
+Run from the ``config`` directory:
+
+    python benchmarks/ranking.py --teams 5000 --judges 100 --judges-per-team 10
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import django
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+django.setup()
+
+from django.core.management import call_command  # noqa: E402
+from django.db import connection, transaction  # noqa: E402
+from django.db.models import F, Sum  # noqa: E402
+
+from accounts.models import User  # noqa: E402
+from judging.models import IdeaScore  # noqa: E402
+from judging.ranking import METHODS, compute_scores, load_score_cells, rank_teams  # noqa: E402
+from judging.rubrics import get_rubric  # noqa: E402
+from teams.models import Team, Idea  # noqa: E402
+
+
+def seed(teams, judges, judges_per_team, seed=1):
+    rnd = random.Random(seed)
+    call_command('migrate', verbosity=0)
+    call_command('flush', '--noinput', verbosity=0)
+    call_command('seed_rubrics', stdout=open(os.devnull, 'w'))
+    criteria = get_rubric().criteria
+    with transaction.atomic():
+        created = Team.objects.bulk_create(Team(team_id=f'R{n:05d}', team_name=f'Team {n}') for n in range(teams))
+        ideas = Idea.objects.bulk_create(
+            Idea(team=team, sih_ps_id='PS', ps_title='PS', ps_description='', idea_title='Idea',
+                 idea_description='', is_primary=True)
+            for team in created
+        )
+        judge_users = User.objects.bulk_create(User(username=f'rank-judge-{n}', role='judge') for n in range(judges))
+        # judges differ in leniency, which is what z-scores correct for
+        leniency = {judge.pk: rnd.uniform(0.5, 1.0) for judge in judge_users}
+        rows = [
+            (idea.pk, judge.pk, criterion.pk, round(criterion.max_score * leniency[judge.pk] * rnd.random(), 2))
+            for idea in ideas
+            for judge in rnd.sample(judge_users, judges_per_team)
+            for criterion in criteria
+        ]
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                'INSERT INTO judging_ideascore (idea_id, judge_id, criterion_id, score, scored_at) '
+                "VALUES (%s, %s, %s, %s, CURRENT_TIMESTAMP)",
+                rows,
+            )
+    return len(rows)
+
+
+def orm_raw():
+    return list(
+        Idea.objects.filter(is_primary=True)
+        .annotate(total=Sum('scores__score'))
+        .order_by(F('total').desc(nulls_last=True), 'team__team_id')
+        .values_list('team__team_id', 'total')
+    )
+
+
+def orm_normalised():
+    cells = (
+        IdeaScore.objects.filter(idea__is_primary=True)
+        .values('idea', 'judge')
+        .annotate(marks=Sum('score'), possible=Sum('criterion__max_score'))
+    )
+    fractions = [(c['idea'], c['judge'], float(c['marks']) / c['possible'] if c['possible'] else 0.0) for c in cells]
+    by_judge = defaultdict(list)
+    for _, judge, fraction in fractions:
+        by_judge[judge].append(fraction)
+    spread = {judge: (statistics.fmean(v), statistics.pstdev(v)) for judge, v in by_judge.items()}
+    mean, z = defaultdict(list), defaultdict(list)
+    for idea, judge, fraction in fractions:
+        mu, sd = spread[judge]
+        mean[idea].append(fraction)
+        z[idea].append((fraction - mu) / sd if sd > 1e-12 else 0.0)
+    return (
+        sorted(mean, key=lambda idea: -statistics.fmean(mean[idea])),
+        sorted(z, key=lambda idea: -statistics.fmean(z[idea])),
+    )
+
+
+def timed(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return round(best, 4)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--teams', type=int, default=5000)
+    parser.add_argument('--judges', type=int, default=100)
+    parser.add_argument('--judges-per-team', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=3, help='Report the best of this many runs')
+    parser.add_argument('--output', help='Also write the result as JSON to this file')
+    args = parser.parse_args()
+
+    scores = seed(args.teams, args.judges, args.judges_per_team)
+    cells = load_score_cells()
+    rubric_total = sum(c.max_score for c in get_rubric().criteria)
+
+    result = {
+        'teams': args.teams,
+        'judges': args.judges,
+        'judges_per_team': args.judges_per_team,
+        'scores': scores,
+        'numpy_seconds': {method: timed(lambda: rank_teams(method), args.repeat) for method in METHODS},
+        'numpy_load_seconds': timed(load_score_cells, args.repeat),
+        'numpy_compute_seconds': timed(lambda: compute_scores(*cells, rubric_total=rubric_total), args.repeat),
+        'orm_seconds': {
+            'raw': timed(orm_raw, args.repeat),
+            'mean+zscore': timed(orm_normalised, args.repeat),
+        },
+    }
+    print(json.dumps(result, indent=2))
+    if args.output:
+        Path(args.output).write_text(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
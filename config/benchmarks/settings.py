@@ -0,0 +1,18 @@
+"""Settings for benchmark runs: the project settings on a throwaway database.
+
+On SQLite, set ``BENCH_DATABASE`` to the file the run should use. With
+``DB_ENGINE=postgres`` the ``POSTGRES_*`` variables pick the database, so
+point ``POSTGRES_DB`` at a scratch database.
+"""
+
+import os
+
+from config.settings import *  # noqa: F401,F403
+
+if DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3':  # noqa: F405
+    DATABASES['default']['NAME'] = os.environ.get('BENCH_DATABASE', BASE_DIR / 'bench.sqlite3')  # noqa: F405
+
+DEBUG = False
+
+# the load tests talk to a local server over HTTP
+ALLOWED_HOSTS = ['127.0.0.1', 'localhost', 'testserver']
@@ -0,0 +1,146 @@
+"""Concurrent score-submit throughput benchmark.
+
+Seeds a scratch database with teams, judges and the rubric, then has
+``--threads`` judges submit rubric scores through ``SubmitRubricScoresView``
+for ``--seconds`` and reports submits per second, latency percentiles and
+errors. Each thread holds its own database connection, like a threaded
+server worker. Run from the ``config`` directory, once per backend:
+
+    python benchmarks/submit_load.py --threads 8 --output submit_sqlite.json
+    docker compose up -d postgres
+    DB_ENGINE=postgres POSTGRES_PASSWORD=changeme POSTGRES_DB=hackathon \\
+        python benchmarks/submit_load.py --threads 8 --output submit_postgres.json
+
+The run flushes the database it is pointed at (see ``benchmarks.settings``).
+
+Recorded with 8 threads for 10s, on one CPU with PostgreSQL 16 on the same
+machine over a unix socket (two runs each):
+
+    backend                   submits/s   p50 ms   p95 ms   p99 ms
+    SQLite (WAL)              40.0-39.9    81-85  795-870  1890-2000
+    PostgreSQL, pool          24.4-25.7  314-316  406-461   470-563
+    PostgreSQL, DB_POOL=0     25.5-27.8  273-313  413-430   467-552
+
+No errors on any. SQLite queues writers on ``BEGIN IMMEDIATE``, so most
+submits are fast and the unlucky ones wait seconds. PostgreSQL only locks
+the idea being scored, which keeps the tail four times shorter, but here
+the server competes with the test for the single core, which costs it
+throughput. SQLite therefore stays the default, Docker included; measure on
+the deployment hardware before switching.
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+
+import django
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+django.setup()
+
+from django.core.management import call_command  # noqa: E402
+from django.db import connection, connections  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+from rest_framework.test import APIClient  # noqa: E402
+
+from accounts.models import User  # noqa: E402
+from judging.rubrics import get_rubric  # noqa: E402
+from teams.models import Team, Idea  # noqa: E402
+
+
+def seed(teams, judges):
+    call_command('migrate', verbosity=0)
+    call_command('flush', '--noinput', verbosity=0)
+    call_command('seed_rubrics', stdout=open(os.devnull, 'w'))
+    created = Team.objects.bulk_create(Team(team_id=f'B{n:05d}', team_name=f'Team {n}') for n in range(teams))
+    Idea.objects.bulk_create(
+        Idea(
+            team=team, sih_ps_id='PS1', ps_title='Problem', ps_description='...',
+            idea_title=f'Idea {team.team_id}', idea_description='...', is_primary=True,
+        )
+        for team in created
+    )
+    User.objects.bulk_create(User(username=f'bench-judge-{n}', role='judge') for n in range(judges))
+    return [team.team_id for team in created], list(User.objects.filter(role='judge'))
+
+
+def worker(judge, team_ids, criteria, deadline, results):
+    client = APIClient()
+    client.force_authenticate(judge)
+    rnd = random.Random(judge.pk)
+    latencies = []
+    errors = 0
+    try:
+        while time.perf_counter() < deadline:
+            payload = {'team_id': rnd.choice(team_ids)}
+            payload.update({c.name: rnd.randint(0, c.max_score) for c in criteria})
+            start = time.perf_counter()
+            try:
+                response = client.post('/api/teams/scores/submit/', payload, format='json')
+            except Exception:
+                # e.g. "database is locked"; the test client re-raises view errors
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+            errors += response.status_code != 200
+    finally:
+        connections.close_all()
+    results.append((latencies, errors))
+
+
+def percentile(values, pct):
+    return statistics.quantiles(values, n=100)[pct - 1] if len(values) > 1 else (values or [0])[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--teams', type=int, default=200)
+    parser.add_argument('--output', help='Also write the result as JSON to this file')
+    args = parser.parse_args()
+
+    setup_test_environment(debug=False)
+    team_ids, judges = seed(args.teams, args.threads)
+    criteria = get_rubric().criteria
+    connection.close()
+
+    results = []
+    deadline = time.perf_counter() + args.seconds
+    threads = [
+        threading.Thread(target=worker, args=(judge, team_ids, criteria, deadline, results))
+        for judge in judges[:args.threads]
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(latency for thread_latencies, _ in results for latency in thread_latencies)
+    result = {
+        'backend': connection.vendor,
+        'threads': args.threads,
+        'seconds': round(elapsed, 2),
+        'submits': len(latencies),
+        'errors': sum(errors for _, errors in results),
+        'submits_per_second': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+    }
+    print(json.dumps(result, indent=2))
+    if args.output:
+        Path(args.output).write_text(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
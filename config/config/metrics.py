@@ -0,0 +1,341 @@
+"""Request metrics in the Prometheus text format, and a slow request log.
+
+``MetricsMiddleware`` times every request and, through an execute wrapper
+on every database connection, counts its queries and the time they take.
+Per endpoint (the URL name, e.g. ``team-list``) it keeps:
+
+* ``http_requests_total`` by method, endpoint and status;
+* histograms of the request duration, the number of queries, the time spent
+  in the database, the time spent rendering the response body (where DRF
+  serializes to JSON) and the response size. A streamed body (the CSV
+  exports) is produced after the middleware has returned, so its size and
+  the queries run while streaming are not included.
+
+``GET /metrics`` serves them, plus the response cache counters from
+``teams.response_cache``. Each worker process keeps its own numbers, as the
+Prometheus client library does outside its multi-process mode, so scrape
+every worker. Set ``METRICS_TOKEN`` to require ``Authorization: Bearer
+<token>`` on the endpoint.
+
+A request slower than ``METRICS_SLOW_REQUEST_SECONDS`` or running more than
+``METRICS_SLOW_REQUEST_QUERIES`` queries is logged as a warning on the
+``config.metrics`` logger with its SQL (statements only, not parameters).
+"""
+
+import hmac
+import logging
+import threading
+from collections import deque
+from contextvars import ContextVar
+from time import perf_counter
+
+import numpy as np
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse, HttpResponseForbidden
+
+from teams.response_cache import cache_stats
+
+logger = logging.getLogger(__name__)
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+# statements kept per request for the slow request log
+MAX_LOGGED_QUERIES = 200
+# observations queued before a request folds them into the histograms
+FLUSH_AT = 10000
+# anything else is counted as OTHER, so clients cannot invent label values
+METHODS = frozenset(('GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'))
+
+
+class Histogram:
+    """Bucket bounds and names; the counts live in each endpoint's ``_Series``."""
+
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+
+    def empty(self):
+        # count per bucket, count above the last bucket, sum
+        return [0] * (len(self.buckets) + 2)
+
+    def render(self, label_names, series_by_labels):
+        yield f'# HELP {self.name} {self.help_text}'
+        yield f'# TYPE {self.name} histogram'
+        for labels, series in series_by_labels:
+            base = _labels(label_names, labels)
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                yield f'{self.name}_bucket{{{base},le="{bound}"}} {cumulative}'
+            cumulative += series[len(self.buckets)]
+            yield f'{self.name}_bucket{{{base},le="+Inf"}} {cumulative}'
+            yield f'{self.name}_sum{{{base}}} {series[-1]}'
+            yield f'{self.name}_count{{{base}}} {cumulative}'
+
+
+HISTOGRAMS = (
+    Histogram(
+        'http_request_duration_seconds',
+        'Time from the request entering Django to the response leaving it.', DURATION_BUCKETS,
+    ),
+    Histogram('http_request_db_queries', 'Database queries run per request.', QUERY_BUCKETS),
+    Histogram('http_request_db_seconds', 'Time spent in database queries per request.', DURATION_BUCKETS),
+    Histogram('http_response_render_seconds', 'Time spent rendering (serializing) the response body.', DURATION_BUCKETS),
+    Histogram('http_response_size_bytes', 'Response body size; streamed responses are not counted.', SIZE_BUCKETS),
+)
+
+
+class _Series:
+    """Everything recorded for one (method, endpoint): one dict lookup per request."""
+
+    __slots__ = ('statuses', 'slow', 'histograms')
+
+    def __init__(self):
+        self.statuses = {}
+        self.slow = 0
+        self.histograms = [histogram.empty() for histogram in HISTOGRAMS]
+
+
+class Registry:
+    """Every metric of this process.
+
+    ``observe`` only queues the numbers: sorting them into buckets one by
+    one costs several times more than the rest of the middleware put
+    together, so ``flush`` buckets each column of a batch with numpy, on
+    each scrape or once ``FLUSH_AT`` observations are waiting.
+    """
+
+    label_names = ('method', 'endpoint')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.series = {}  # (method, endpoint) -> _Series
+        self.pending = deque()  # appends and pops are thread-safe without the lock
+
+    def observe(self, method, endpoint, status, duration, queries, db_time, render_time, size, slow):
+        pending = self.pending
+        pending.append((method, endpoint, status, slow, (duration, queries, db_time, render_time, size)))
+        if len(pending) >= FLUSH_AT:
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            pending = self.pending
+            groups = {}
+            while pending:
+                method, endpoint, status, slow, values = pending.popleft()
+                group = groups.get((method, endpoint))
+                if group is None:
+                    group = groups[method, endpoint] = ({}, [], [])
+                statuses, slows, rows = group
+                statuses[status] = statuses.get(status, 0) + 1
+                slows.append(slow)
+                rows.append(values)
+            for labels, (statuses, slows, rows) in groups.items():
+                series = self.series.get(labels)
+                if series is None:
+                    series = self.series[labels] = _Series()
+                for status, count in statuses.items():
+                    series.statuses[status] = series.statuses.get(status, 0) + count
+                series.slow += sum(slows)
+                # values in HISTOGRAMS order, one column each; None is not observed
+                for histogram, counts, column in zip(HISTOGRAMS, series.histograms, zip(*rows)):
+                    observed = [value for value in column if value is not None]
+                    if not observed:
+                        continue
+                    buckets = np.bincount(
+                        np.searchsorted(histogram.buckets, observed), minlength=len(histogram.buckets) + 1,
+                    )
+                    for i, count in enumerate(buckets.tolist()):
+                        counts[i] += count
+                    counts[-1] += sum(observed)
+
+    def render(self):
+        self.flush()
+        with self.lock:
+            items = sorted(self.series.items())
+            lines = ['# HELP http_requests_total Requests served.', '# TYPE http_requests_total counter']
+            lines += [
+                f"http_requests_total{{{_labels(('method', 'endpoint', 'status'), (*labels, status))}}} {count}"
+                for labels, series in items
+                for status, count in sorted(series.statuses.items())
+            ]
+            lines += [
+                '# HELP http_slow_requests_total Requests over the slow request thresholds.',
+                '# TYPE http_slow_requests_total counter',
+            ]
+            lines += [
+                f'http_slow_requests_total{{{_labels(self.label_names, labels)}}} {series.slow}'
+                for labels, series in items
+            ]
+            for i, histogram in enumerate(HISTOGRAMS):
+                lines += histogram.render(self.label_names, [(labels, series.histograms[i]) for labels, series in items])
+        return lines
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values):
+    return ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+
+
+registry = Registry()
+
+
+class _QueryRecorder:
+    """The queries of one request (count, total time and the first statements) and when rendering began."""
+
+    __slots__ = ('count', 'seconds', 'statements', 'render_started')
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements = []
+        self.render_started = None
+
+
+_recorder = ContextVar('metrics_recorder', default=None)
+
+
+def _record_query(execute, sql, params, many, context):
+    recorder = _recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    start = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = perf_counter() - start
+        recorder.seconds += elapsed
+        recorder.count += 1
+        if recorder.count <= MAX_LOGGED_QUERIES:
+            recorder.statements.append((elapsed, sql))
+
+
+def _install(connection, **kwargs):
+    # Installed once per connection object rather than entered with
+    # connection.execute_wrapper() on every request: looking the connections
+    # up per request cost more than everything else here. First in the list,
+    # so the last-in-first-out pops of execute_wrapper() never remove it.
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _record_query)
+
+
+connection_created.connect(_install)
+
+
+class MetricsMiddleware:
+    """Put first in ``MIDDLEWARE`` so the timings cover the rest of the stack.
+
+    Runs in whichever mode the handler does: under ASGI a sync-only
+    middleware makes Django hand every request to a thread and back, which
+    costs more than the measuring itself.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.slow_seconds = settings.METRICS_SLOW_REQUEST_SECONDS
+        self.slow_queries = settings.METRICS_SLOW_REQUEST_QUERIES
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+            # looked up on the instance by the handler, which would run a sync one in a thread
+            self.process_template_response = self._process_template_response_async
+        # connections opened before this module was imported
+        for connection in connections.all(initialized_only=True):
+            _install(connection)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        recorder = _QueryRecorder()
+        token = _recorder.set(recorder)
+        start = perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _recorder.reset(token)
+        self._observe(request, response, recorder, start)
+        return response
+
+    async def __acall__(self, request):
+        recorder = _QueryRecorder()
+        # sync views run in a copy of this context, so they see the same recorder
+        token = _recorder.set(recorder)
+        start = perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _recorder.reset(token)
+        self._observe(request, response, recorder, start)
+        return response
+
+    def process_template_response(self, request, response):
+        # called just before the body is rendered; DRF responses are template responses
+        recorder = _recorder.get()
+        if recorder is not None:
+            recorder.render_started = perf_counter()
+        return response
+
+    async def _process_template_response_async(self, request, response):
+        return MetricsMiddleware.process_template_response(self, request, response)
+
+    def _observe(self, request, response, recorder, start):
+        end = perf_counter()
+        duration = end - start
+        render_time = end - recorder.render_started if recorder.render_started is not None else None
+        if response.streaming:
+            size = None
+        else:
+            # CommonMiddleware has set it; cheaper than measuring the body again
+            length = response.get('Content-Length')
+            size = int(length) if length is not None else len(response.content)
+        match = request.resolver_match
+        endpoint = (match.view_name or match.route) if match is not None else 'unmatched'
+        slow = duration >= self.slow_seconds or recorder.count >= self.slow_queries
+        method = request.method if request.method in METHODS else 'OTHER'
+        registry.observe(
+            method, endpoint, response.status_code, duration,
+            recorder.count, recorder.seconds, render_time, size, slow,
+        )
+        if slow:
+            self._log_slow(request, response, endpoint, duration, recorder)
+
+    @staticmethod
+    def _log_slow(request, response, endpoint, duration, recorder):
+        statements = '\n'.join(f'  {elapsed * 1000:8.2f} ms  {sql}' for elapsed, sql in recorder.statements)
+        if recorder.count > len(recorder.statements):
+            statements += f'\n  ... {recorder.count - len(recorder.statements)} more'
+        logger.warning(
+            "Slow request: %s %s (%s) -> %s in %.1f ms, %d queries in %.1f ms\n%s",
+            request.method, request.get_full_path(), endpoint, response.status_code,
+            duration * 1000, recorder.count, recorder.seconds * 1000, statements,
+        )
+
+
+def _cache_lines():
+    lines = []
+    for outcome in ('hits', 'misses'):
+        name = f'response_cache_{outcome}_total'
+        lines += [f'# HELP {name} Response cache {outcome} (all workers sharing the cache).', f'# TYPE {name} counter']
+        lines += [f'{name}{{view="{_escape(view)}"}} {counts[outcome]}' for view, counts in sorted(cache_stats().items())]
+    return lines
+
+
+def metrics_view(request):
+    token = settings.METRICS_TOKEN
+    if token and not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return HttpResponseForbidden()
+    body = '\n'.join(registry.render() + _cache_lines()) + '\n'
+    return HttpResponse(body, content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,114 @@
+"""Read-replica routing.
+
+Reads go to the ``replica`` alias only inside ``read_from_replica()``,
+which ``ReplicaReadMixin`` enters for safe-method API requests and
+``stream_from_replica`` for streamed bodies, which are read after the view
+has returned. Everything else, including every write and every query
+inside ``transaction.atomic``, stays on ``default``. After a user's
+successful write, their reads stay on the primary for
+``READ_YOUR_WRITES_SECONDS`` so they never see the replica lagging behind
+what they just saved.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, transaction
+from rest_framework.permissions import SAFE_METHODS
+
+REPLICA = 'replica'
+
+_replica_reads = ContextVar('replica_reads', default=False)
+
+
+def replica_configured():
+    return REPLICA in connections.databases
+
+
+def replica_in_use():
+    """Whether reads in the current context are routed to the replica."""
+    return _replica_reads.get() and replica_configured() and not connections['default'].in_atomic_block
+
+
+@contextmanager
+def read_from_replica():
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def stream_from_replica(iterable):
+    """Wrap a streamed body so it reads from the replica if the current request does.
+
+    Decided now: by the time the body is iterated the view has returned and
+    ``ReplicaReadMixin`` has left its scope.
+    """
+    if not replica_in_use():
+        return iterable
+    return _on_replica(iterable)
+
+
+def _on_replica(iterable):
+    # entered and left around each chunk: under ASGI every chunk may be
+    # pulled in a different context, where a context variable token cannot
+    # be reset
+    iterator = iter(iterable)
+    while True:
+        with read_from_replica():
+            try:
+                chunk = next(iterator)
+            except StopIteration:
+                return
+        yield chunk
+
+
+def _recent_write_key(user):
+    return f'replica:recent-write:{user.pk}'
+
+
+def note_write(user):
+    """Pin ``user``'s reads to the primary for a while, once the current write commits."""
+    if replica_configured() and user.is_authenticated:
+        transaction.on_commit(
+            lambda: cache.set(_recent_write_key(user), True, settings.READ_YOUR_WRITES_SECONDS)
+        )
+
+
+def wrote_recently(user):
+    return user.is_authenticated and cache.get(_recent_write_key(user), False)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return REPLICA if replica_in_use() else 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # the replica holds the same rows as the primary
+        return True
+
+
+class ReplicaReadMixin:
+    """API view mixin serving safe-method requests from the replica."""
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method in SAFE_METHODS and replica_configured() and not wrote_recently(request.user):
+            # left in finalize_response, which DRF calls even when the view raises
+            self._replica_reads = read_from_replica()
+            self._replica_reads.__enter__()
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        replica_reads = getattr(self, '_replica_reads', None)
+        if replica_reads is not None:
+            replica_reads.__exit__(None, None, None)
+            self._replica_reads = None
+        elif request.method not in SAFE_METHODS and 200 <= response.status_code < 300:
+            note_write(request.user)
+        return super().finalize_response(request, response, *args, **kwargs)
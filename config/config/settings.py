@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -32,6 +33,7 @@ AUTH_USER_MODEL = 'accounts.User'
 # Application definition
 
 INSTALLED_APPS = [
+    'daphne',  # ASGI runserver, must come before staticfiles
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -41,12 +43,14 @@ INSTALLED_APPS = [
     'corsheaders',
     'django_filters',
     'rest_framework',
+    'channels',
     'accounts',
     'teams',
     'judging',
 ]
 
 MIDDLEWARE = [
+    'config.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -77,19 +81,127 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'config.wsgi.application'
+ASGI_APPLICATION = 'config.asgi.application'
 
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
+# SQLite by default. DB_ENGINE=postgres switches to PostgreSQL, configured by
+# the POSTGRES_* variables. Connections then come from psycopg's pool
+# (DB_POOL_MIN_SIZE/DB_POOL_MAX_SIZE); DB_POOL=0 uses persistent per-thread
+# connections (DB_CONN_MAX_AGE seconds, health-checked) instead. Django
+# does not allow both together.
+
+if os.environ.get('DB_ENGINE', 'sqlite') == 'postgres':
+    DB_POOL = os.environ.get('DB_POOL', '1') != '0'
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('POSTGRES_DB', 'hackathon'),
+            'USER': os.environ.get('POSTGRES_USER', 'hackathon'),
+            'PASSWORD': os.environ.get('POSTGRES_PASSWORD', ''),
+            'HOST': os.environ.get('POSTGRES_HOST', 'localhost'),
+            'PORT': os.environ.get('POSTGRES_PORT', '5432'),
+            'CONN_MAX_AGE': 0 if DB_POOL else int(os.environ.get('DB_CONN_MAX_AGE', '60')),
+            'CONN_HEALTH_CHECKS': not DB_POOL,
+            'OPTIONS': {
+                'pool': {
+                    'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', '2')),
+                    'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', '10')),
+                    'timeout': 10,
+                },
+            } if DB_POOL else {},
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+            'OPTIONS': {
+                # WAL lets readers work while a judge's submit is being written;
+                # writers queue on busy_timeout instead of failing with "database is locked".
+                'init_command': 'PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL; PRAGMA busy_timeout=5000;',
+                # take the write lock when the transaction starts, so two
+                # concurrent writers never deadlock upgrading from a read lock
+                'transaction_mode': 'IMMEDIATE',
+            },
+        }
+    }
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# Optional read replica. Safe-method requests are served from it (see
+# config.routers); set DB_REPLICA_HOST for PostgreSQL or DB_REPLICA_NAME
+# (a database file) for SQLite. A user who has just written keeps reading
+# from the primary for READ_YOUR_WRITES_SECONDS.
+
+if os.environ.get('DB_REPLICA_HOST') or os.environ.get('DB_REPLICA_NAME'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': os.environ.get('DB_REPLICA_HOST', DATABASES['default'].get('HOST', '')),
+        'NAME': os.environ.get('DB_REPLICA_NAME', DATABASES['default']['NAME']),
+        'TEST': {'MIRROR': 'default'},
     }
+    DATABASE_ROUTERS = ['config.routers.ReplicaRouter']
+
+READ_YOUR_WRITES_SECONDS = int(os.environ.get('READ_YOUR_WRITES_SECONDS', '10'))
+
+
+# Request metrics (config.metrics), served on /metrics
+# Requests over either threshold are logged with their SQL on the
+# 'config.metrics' logger. Set METRICS_TOKEN to require a bearer token.
+
+METRICS_SLOW_REQUEST_SECONDS = float(os.environ.get('METRICS_SLOW_REQUEST_SECONDS', '1.0'))
+METRICS_SLOW_REQUEST_QUERIES = int(os.environ.get('METRICS_SLOW_REQUEST_QUERIES', '50'))
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Worker processes share version stamps (e.g. the rubric registry) through
+# this cache, so multi-worker deployments must point it at a shared backend,
+# e.g. DJANGO_CACHE_BACKEND=django.core.cache.backends.filebased.FileBasedCache
+# with DJANGO_CACHE_LOCATION=/var/tmp/hackathon_cache.
+#
+# Cached API responses (teams.response_cache) live in their own 'responses'
+# cache so they never evict the stamps. Per-process memory is fine there;
+# to share entries between workers use the file backend as above or
+# django.core.cache.backends.db.DatabaseCache with DJANGO_RESPONSE_CACHE_LOCATION
+# set to a table name (create it with ``manage.py createcachetable``).
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('DJANGO_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('DJANGO_CACHE_LOCATION', ''),
+    },
+    'responses': {
+        'BACKEND': os.environ.get('DJANGO_RESPONSE_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('DJANGO_RESPONSE_CACHE_LOCATION', 'responses'),
+        # entries are keyed by data generation and never go stale; the
+        # timeout only bounds how long superseded ones take up space
+        'TIMEOUT': int(os.environ.get('DJANGO_RESPONSE_CACHE_TIMEOUT', '600')),
+        'OPTIONS': {'MAX_ENTRIES': int(os.environ.get('DJANGO_RESPONSE_CACHE_MAX_ENTRIES', '5000'))},
+    },
 }
 
 
+# Channels (live leaderboard)
+# https://channels.readthedocs.io/en/stable/topics/channel_layers.html
+# The in-memory layer only reaches clients of the same process; set
+# CHANNEL_REDIS_URL (and install channels-redis) when running several workers.
+
+if os.environ.get('CHANNEL_REDIS_URL'):
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels_redis.core.RedisChannelLayer',
+            'CONFIG': {'hosts': [os.environ['CHANNEL_REDIS_URL']]},
+        }
+    }
+else:
+    CHANNEL_LAYERS = {
+        'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}
+    }
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -4,6 +4,7 @@ from rest_framework_simplejwt.views import (
     TokenRefreshView,
 )
 from accounts.views import CustomTokenObtainPairView
+from config.metrics import metrics_view
 
 urlpatterns = [
     path('api/token/', CustomTokenObtainPairView.as_view(), name='token_obtain_pair'),  # JWT login with username
@@ -12,4 +13,5 @@ urlpatterns = [
     path('api/', include('teams.urls')),         # Teams and ideas
     path('api/judging/', include('judging.urls')),     # Rubric and scoring
     path('admin/', admin.site.urls),
+    path('metrics', metrics_view, name='metrics'),  # Prometheus scrape target
 ]
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import RubricCriterion, IdeaScore
+from .models import RubricCriterion, IdeaScore, IdeaScoreSummary, JudgeAssignment, JudgeConflict, JudgeCoverage
 
 @admin.register(RubricCriterion)
 class RubricCriterionAdmin(admin.ModelAdmin):
@@ -9,3 +9,28 @@ class RubricCriterionAdmin(admin.ModelAdmin):
 class IdeaScoreAdmin(admin.ModelAdmin):
     list_display = ('idea', 'judge', 'criterion', 'score', 'scored_at')
     list_filter = ('criterion', 'judge')
+
+@admin.register(IdeaScoreSummary)
+class IdeaScoreSummaryAdmin(admin.ModelAdmin):
+    list_display = ('idea', 'total', 'judge_count', 'complete_judge_count', 'score_count', 'last_scored_at')
+    readonly_fields = (
+        'idea', 'total', 'score_count', 'judge_count', 'complete_judge_count', 'criteria', 'last_scored_at', 'updated_at',
+    )
+
+@admin.register(JudgeAssignment)
+class JudgeAssignmentAdmin(admin.ModelAdmin):
+    list_display = ('idea', 'judge', 'complete', 'assigned_at')
+    list_filter = ('judge',)
+    raw_id_fields = ('idea',)
+
+@admin.register(JudgeConflict)
+class JudgeConflictAdmin(admin.ModelAdmin):
+    list_display = ('judge', 'team', 'reason')
+    list_filter = ('judge',)
+    raw_id_fields = ('team',)
+
+@admin.register(JudgeCoverage)
+class JudgeCoverageAdmin(admin.ModelAdmin):
+    list_display = ('idea', 'judge', 'criteria_scored', 'complete', 'updated_at')
+    list_filter = ('complete', 'judge')
+    readonly_fields = ('idea', 'judge', 'criteria_scored', 'complete', 'updated_at')
@@ -0,0 +1,145 @@
+"""Which judges should score which team's primary idea.
+
+Every primary idea gets ``per_idea`` judges. Ideas are filled most
+constrained first (fewest eligible judges), each taking the judges with the
+fewest assignments so far and, among those, the fewest ideas from the same
+problem statement. Load therefore stays within one idea of even and each
+judge sees a spread of problem statements. A judge with a ``JudgeConflict``
+for a team is never assigned to it.
+
+Runs are incremental. Valid assignments are kept, so when a judge drops out
+(deactivate the account, or pass ``exclude``) only the ideas that judge had
+not scored yet move. Judges who have already scored an idea are adopted as
+its assignees before anyone new. ``reset=True`` also redistributes every
+assignment that has no scores behind it.
+"""
+
+from collections import defaultdict
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from teams.models import Idea
+from teams.versioning import bump_data_version
+from .models import IdeaScore, JudgeAssignment, JudgeConflict
+from .summaries import mark_assignments
+
+DEFAULT_JUDGES_PER_IDEA = 3
+
+
+def assigned_to(judge):
+    """The judge's assignments on ideas that are still primary."""
+    return JudgeAssignment.objects.filter(judge=judge, idea__is_primary=True)
+
+
+def assign_judges(per_idea=DEFAULT_JUDGES_PER_IDEA, reset=False, exclude=()):
+    """Bring the assignments in line with the current ideas, judges and conflicts.
+
+    ``exclude`` is a list of judge usernames to treat as unavailable.
+    Returns a summary dict: counts of ``kept``, ``created`` and ``removed``
+    assignments, the judges' ``load`` range and the ``understaffed`` idea
+    ids that could not get ``per_idea`` judges.
+    """
+    judges = list(
+        get_user_model().objects
+        .filter(role='judge', is_active=True)
+        .exclude(username__in=list(exclude))
+        .order_by('pk')
+        .values_list('pk', flat=True)
+    )
+    ideas = list(Idea.objects.filter(is_primary=True).order_by('pk').values_list('pk', 'team_id', 'sih_ps_id'))
+    judge_ix = {pk: i for i, pk in enumerate(judges)}
+    idea_team = {pk: team_id for pk, team_id, _ in ideas}
+
+    blocked_by_team = defaultdict(set)  # team id -> judge ids
+    for judge_id, team_id in JudgeConflict.objects.values_list('judge_id', 'team_id'):
+        blocked_by_team[team_id].add(judge_id)
+
+    def allowed(idea_id, judge_id):
+        return idea_id in idea_team and judge_id not in blocked_by_team[idea_team[idea_id]]
+
+    # A judge who has scored an idea keeps it even after dropping out: the
+    # work is done and counts towards the idea's judges. Scores entered by
+    # anyone who is not a judge (an admin) adopt no one.
+    scored = set(
+        IdeaScore.objects
+        .filter(idea__is_primary=True, judge__role='judge')
+        .values_list('idea_id', 'judge_id')
+        .distinct()
+    )
+    assigned = defaultdict(set)  # idea id -> judge ids
+    removed = []
+    kept = 0
+    for pk, idea_id, judge_id in JudgeAssignment.objects.values_list('pk', 'idea_id', 'judge_id'):
+        done = (idea_id, judge_id) in scored
+        if allowed(idea_id, judge_id) and (done or (judge_id in judge_ix and not reset)):
+            assigned[idea_id].add(judge_id)
+            kept += 1
+        else:
+            removed.append(pk)
+
+    created = []
+    for idea_id, judge_id in sorted(scored):
+        if allowed(idea_id, judge_id) and judge_id not in assigned[idea_id] and len(assigned[idea_id]) < per_idea:
+            assigned[idea_id].add(judge_id)
+            created.append((idea_id, judge_id))
+
+    ps_ix = {}
+    idea_ps = {pk: ps_ix.setdefault(ps, len(ps_ix)) for pk, _, ps in ideas}
+    load = np.zeros(len(judges), dtype=np.int64)
+    ps_load = np.zeros((len(judges), len(ps_ix)), dtype=np.int64)
+    for idea_id, judge_ids in assigned.items():
+        for judge_id in judge_ids:
+            if judge_id in judge_ix:
+                load[judge_ix[judge_id]] += 1
+                ps_load[judge_ix[judge_id], idea_ps[idea_id]] += 1
+
+    # Cheapest judge: fewest assignments, then fewest from this problem
+    # statement. ps_load never exceeds load, so one integer orders both.
+    scale = len(ideas) + 1
+    unavailable = np.iinfo(np.int64).max
+    understaffed = []
+    order = sorted(ideas, key=lambda idea: (len(judges) - len(blocked_by_team[idea[1]]), idea[0]))
+    for idea_id, team_id, _ in order:
+        need = per_idea - len(assigned[idea_id])
+        if need <= 0:
+            continue
+        ps = idea_ps[idea_id]
+        cost = load * scale + ps_load[:, ps]
+        taken = [judge_ix[j] for j in blocked_by_team[team_id] | assigned[idea_id] if j in judge_ix]
+        cost[taken] = unavailable
+        available = len(judges) - len(taken)
+        if available < need:
+            understaffed.append(idea_id)
+            need = available
+        if need <= 0:
+            continue
+        picks = np.argpartition(cost, need - 1)[:need]
+        load[picks] += 1
+        ps_load[picks, ps] += 1
+        for i in picks.tolist():
+            assigned[idea_id].add(judges[i])
+            created.append((idea_id, judges[i]))
+
+    with transaction.atomic():
+        for start in range(0, len(removed), 1000):
+            JudgeAssignment.objects.filter(pk__in=removed[start:start + 1000]).delete()
+        JudgeAssignment.objects.bulk_create(
+            (JudgeAssignment(idea_id=idea_id, judge_id=judge_id) for idea_id, judge_id in created),
+            batch_size=1000,
+        )
+        mark_assignments(JudgeAssignment.objects.filter(complete=False))
+        # bulk writes skip the model signals
+        bump_data_version(JudgeAssignment)
+
+    return {
+        'ideas': len(ideas),
+        'judges': len(judges),
+        'per_idea': per_idea,
+        'kept': kept,
+        'created': len(created),
+        'removed': len(removed),
+        'load': {'min': int(load.min()), 'max': int(load.max())} if len(judges) else {'min': 0, 'max': 0},
+        'understaffed': sorted(understaffed),
+    }
@@ -0,0 +1,205 @@
+"""Result exports: score sheets and rankings as CSV, XLSX or Parquet.
+
+Three sheets are available:
+
+``scores``
+    One row per team (primary idea) with the average mark per criterion,
+    read from ``IdeaScoreSummary``.
+``judges``
+    One row per judge per idea with that judge's raw mark per criterion.
+``rankings``
+    ``judging.ranking.rank_teams`` for one method.
+
+Each sheet is a ``(columns, rows)`` pair where ``rows`` is a lazy iterator
+over a single ``QuerySet.iterator(chunk_size=...)``, so the number of
+queries is fixed and memory stays flat however many scores there are. CSV
+is produced line by line; XLSX (openpyxl write-only mode) and Parquet
+(pyarrow, optional) are written to a file in chunks.
+"""
+
+import csv
+import datetime
+from decimal import Decimal
+from itertools import groupby, islice
+
+from openpyxl import Workbook
+
+from teams.models import Idea
+from .models import IdeaScore
+from .ranking import rank_teams
+from .rubrics import get_rubric
+
+SHEETS = ('scores', 'judges', 'rankings')
+FORMATS = ('csv', 'xlsx', 'parquet')
+CONTENT_TYPES = {
+    'csv': 'text/csv',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'parquet': 'application/vnd.apache.parquet',
+}
+CHUNK_SIZE = 2000
+
+
+class ExportUnavailable(Exception):
+    """The requested format needs a package that is not installed."""
+
+
+def score_sheet(chunk_size=CHUNK_SIZE):
+    criteria = get_rubric().criteria
+    columns = [
+        ('team_id', 'string'), ('team_name', 'string'), ('idea_id', 'int'), ('idea_title', 'string'),
+        ('sih_ps_id', 'string'), ('judges', 'int'), ('complete_judges', 'int'),
+        *((f'{criterion.name} (avg)', 'float') for criterion in criteria),
+        ('average_total', 'float'), ('raw_total', 'float'),
+    ]
+    rows = (
+        Idea.objects
+        .filter(is_primary=True)
+        .order_by('team__team_id')
+        .values_list(
+            'team__team_id', 'team__team_name', 'pk', 'idea_title', 'sih_ps_id',
+            'score_summary__judge_count', 'score_summary__complete_judge_count',
+            'score_summary__criteria', 'score_summary__total',
+        )
+        .iterator(chunk_size=chunk_size)
+    )
+
+    def generate():
+        for team_id, team_name, idea_id, title, ps_id, judges, complete, marks, total in rows:
+            marks = marks or {}
+            averages = [Decimal(marks[str(c.pk)]['avg']) if str(c.pk) in marks else None for c in criteria]
+            yield (
+                team_id, team_name, idea_id, title, ps_id, judges or 0, complete or 0,
+                *averages, sum(a for a in averages if a is not None), total or 0,
+            )
+
+    return columns, generate()
+
+
+def judge_sheet(chunk_size=CHUNK_SIZE):
+    criteria = get_rubric().criteria
+    position = {criterion.pk: i for i, criterion in enumerate(criteria)}
+    columns = [
+        ('team_id', 'string'), ('team_name', 'string'), ('idea_id', 'int'), ('idea_title', 'string'),
+        ('judge', 'string'),
+        *((criterion.name, 'float') for criterion in criteria),
+        ('total', 'float'), ('last_scored_at', 'datetime'),
+    ]
+    # ordered like the (idea, judge, criterion) unique index, so no sort step
+    rows = (
+        IdeaScore.objects
+        .order_by('idea_id', 'judge_id', 'criterion_id')
+        .values_list(
+            'idea_id', 'judge_id', 'idea__team__team_id', 'idea__team__team_name', 'idea__idea_title',
+            'judge__username', 'criterion_id', 'score', 'scored_at',
+        )
+        .iterator(chunk_size=chunk_size)
+    )
+
+    def generate():
+        for _, scores in groupby(rows, key=lambda row: row[:2]):
+            scores = list(scores)
+            idea_id, _, team_id, team_name, title, judge = scores[0][:6]
+            marks = [None] * len(criteria)
+            for row in scores:
+                if row[6] in position:
+                    marks[position[row[6]]] = row[7]
+            yield (
+                team_id, team_name, idea_id, title, judge, *marks,
+                sum(row[7] for row in scores), max(row[8] for row in scores),
+            )
+
+    return columns, generate()
+
+
+def ranking_sheet(method='zscore'):
+    columns = [
+        ('rank', 'int'), ('team_id', 'string'), ('team_name', 'string'), ('idea_id', 'int'),
+        ('idea_title', 'string'), ('score', 'float'), ('raw', 'float'), ('mean_fraction', 'float'),
+        ('judges', 'int'),
+    ]
+    names = [name for name, _ in columns]
+    return columns, (tuple(row[name] for name in names) for row in rank_teams(method))
+
+
+def build_sheet(sheet, method='zscore', chunk_size=CHUNK_SIZE):
+    if sheet == 'scores':
+        return score_sheet(chunk_size)
+    if sheet == 'judges':
+        return judge_sheet(chunk_size)
+    if sheet == 'rankings':
+        return ranking_sheet(method)
+    raise ValueError(f"Unknown sheet {sheet!r}; expected one of {', '.join(SHEETS)}")
+
+
+class _Echo:
+    """A file-like object whose ``write`` hands the line back, for streaming ``csv.writer``."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(columns, rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow([name for name, _ in columns])
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def _naive_utc(value):
+    if isinstance(value, datetime.datetime) and value.tzinfo is not None:
+        return value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def write_xlsx(file, title, columns, rows):
+    """Write one worksheet in write-only mode, which keeps only the current row in memory."""
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet(title)
+    worksheet.append([name for name, _ in columns])
+    datetimes = [i for i, (_, kind) in enumerate(columns) if kind == 'datetime']
+    for row in rows:
+        if datetimes:
+            # Excel has no time zones
+            row = list(row)
+            for i in datetimes:
+                row[i] = _naive_utc(row[i])
+        worksheet.append(row)
+    workbook.save(file)
+
+
+def write_parquet(file, columns, rows, chunk_size=CHUNK_SIZE):
+    """Write row groups of ``chunk_size`` rows with an explicit schema."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ExportUnavailable('Parquet export needs pyarrow (pip install pyarrow).')
+
+    types = {
+        'string': pa.string(),
+        'int': pa.int64(),
+        'float': pa.float64(),
+        'datetime': pa.timestamp('us', tz='UTC'),
+    }
+    schema = pa.schema([(name, types[kind]) for name, kind in columns])
+    floats = [i for i, (_, kind) in enumerate(columns) if kind == 'float']
+    with pq.ParquetWriter(file, schema) as writer:
+        while batch := list(islice(rows, chunk_size)):
+            values = [list(column) for column in zip(*batch)]
+            for i in floats:
+                values[i] = [None if v is None else float(v) for v in values[i]]
+            writer.write_batch(pa.record_batch(values, schema=schema))
+
+
+def write_export(file, sheet, file_format, method='zscore', chunk_size=CHUNK_SIZE):
+    """Write ``sheet`` to the binary ``file`` in ``file_format``."""
+    columns, rows = build_sheet(sheet, method, chunk_size)
+    if file_format == 'csv':
+        for line in csv_lines(columns, rows):
+            file.write(line.encode())
+    elif file_format == 'xlsx':
+        write_xlsx(file, sheet, columns, rows)
+    elif file_format == 'parquet':
+        write_parquet(file, columns, rows, chunk_size)
+    else:
+        raise ValueError(f"Unknown format {file_format!r}; expected one of {', '.join(FORMATS)}")
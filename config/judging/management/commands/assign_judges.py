@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+from judging.assignments import DEFAULT_JUDGES_PER_IDEA, assign_judges
+
+class Command(BaseCommand):
+    help = "Assigns judges to every team's primary idea, balancing load and skipping conflicts"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--per-idea', type=int, default=DEFAULT_JUDGES_PER_IDEA, help='Judges per primary idea')
+        parser.add_argument(
+            '--reset', action='store_true',
+            help='Redistribute every assignment without scores instead of only filling gaps',
+        )
+        parser.add_argument(
+            '--exclude', nargs='+', default=[], metavar='USERNAME',
+            help='Judges to leave out of this run (e.g. dropped out); ideas they have not scored yet move',
+        )
+
+    def handle(self, *args, **options):
+        if options['per_idea'] < 1:
+            raise CommandError('--per-idea must be at least 1')
+
+        summary = assign_judges(options['per_idea'], reset=options['reset'], exclude=options['exclude'])
+        self.stdout.write(
+            f"{summary['ideas']} idea(s), {summary['judges']} judge(s): kept {summary['kept']}, "
+            f"created {summary['created']}, removed {summary['removed']}; "
+            f"load per judge {summary['load']['min']}-{summary['load']['max']}"
+        )
+        if summary['understaffed']:
+            self.stdout.write(self.style.WARNING(
+                f"{len(summary['understaffed'])} idea(s) have fewer than {options['per_idea']} eligible judges: "
+                + ', '.join(map(str, summary['understaffed'][:20]))
+            ))
+        self.stdout.write(self.style.SUCCESS('Judge assignments updated'))
@@ -0,0 +1,33 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from judging.exports import CHUNK_SIZE, FORMATS, SHEETS, ExportUnavailable, write_export
+from judging.ranking import METHODS
+
+class Command(BaseCommand):
+    help = "Exports the team score sheet, per-judge raw sheet or rankings as CSV, XLSX or Parquet"
+
+    def add_arguments(self, parser):
+        parser.add_argument('sheet', choices=SHEETS)
+        parser.add_argument('--format', dest='file_format', choices=FORMATS, default='csv')
+        parser.add_argument('--output', '-o', help="File to write; defaults to <sheet>.<format>, '-' for stdout (CSV only)")
+        parser.add_argument('--method', choices=METHODS, default='zscore', help='Ranking method for the rankings sheet')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='Rows fetched per database round trip')
+
+    def handle(self, *args, **options):
+        sheet, file_format = options['sheet'], options['file_format']
+        output = options['output'] or f'{sheet}.{file_format}'
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be at least 1')
+        if output == '-' and file_format != 'csv':
+            raise CommandError('Only CSV can be written to stdout')
+
+        try:
+            if output == '-':
+                write_export(sys.stdout.buffer, sheet, file_format, options['method'], options['chunk_size'])
+                return
+            with open(output, 'wb') as file:
+                write_export(file, sheet, file_format, options['method'], options['chunk_size'])
+        except ExportUnavailable as exc:
+            raise CommandError(str(exc))
+        self.stdout.write(self.style.SUCCESS(f'Wrote {sheet} to {output}'))
@@ -0,0 +1,91 @@
+import random
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from accounts.models import User
+from judging.assignments import assign_judges
+from judging.models import IdeaScore, JudgeAssignment
+from judging.rubrics import get_rubric
+from judging.summaries import rebuild_all_summaries
+from teams.models import Team, Idea
+from teams.versioning import bump_data_version
+
+class Command(BaseCommand):
+    help = (
+        "Fills an empty database with a synthetic event for load tests: teams with 1-5 ideas, the seeded "
+        "rubric, judges assigned to every primary idea and a share of those assignments already scored. "
+        "Logins are bench-admin and bench-judge-<n>, all with --password"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--teams', type=int, default=200)
+        parser.add_argument('--judges', type=int, default=20)
+        parser.add_argument('--per-idea', type=int, default=3, help='Judges assigned to each primary idea')
+        parser.add_argument(
+            '--coverage', type=float, default=0.5,
+            help='Share of the assignments (0-1) that already have a full set of scores',
+        )
+        parser.add_argument('--password', default='bench', help='Password of every generated user')
+        parser.add_argument('--seed', type=int, default=1, help='Random seed; the same seed gives the same data')
+        parser.add_argument('--flush', action='store_true', help='Delete ALL data in the database first')
+
+    def handle(self, *args, **options):
+        if not 0 <= options['coverage'] <= 1:
+            raise CommandError('--coverage must be between 0 and 1')
+        if options['judges'] < options['per_idea']:
+            raise CommandError('--judges must be at least --per-idea')
+        if options['flush']:
+            call_command('flush', '--noinput', verbosity=0)
+        elif Team.objects.exists() or User.objects.exists():
+            raise CommandError('The database is not empty; pass --flush to wipe it (everything, not just bench data)')
+
+        rnd = random.Random(options['seed'])
+        call_command('seed_rubrics', stdout=self.stdout)
+        criteria = get_rubric().criteria
+        # hashing is deliberately slow; every user shares one hash
+        password = make_password(options['password'])
+
+        with transaction.atomic():
+            User.objects.create(username='bench-admin', role='admin', password=password)
+            User.objects.bulk_create(
+                User(username=f'bench-judge-{n}', role='judge', password=password) for n in range(options['judges'])
+            )
+            teams = Team.objects.bulk_create(
+                Team(team_id=f'T{n:05d}', team_name=f'Team {n}') for n in range(options['teams'])
+            )
+            ideas = Idea.objects.bulk_create(
+                Idea(
+                    team=team, sih_ps_id=f'SIH{rnd.randint(1, 50):03d}', ps_title=f'Problem statement {n % 50}',
+                    ps_description='Synthetic problem statement.', idea_title=f'Idea {team.team_id}-{i}',
+                    idea_description='Synthetic idea for load testing.', is_primary=i == 0, approved=i == 0,
+                )
+                for n, team in enumerate(teams)
+                for i in range(rnd.randint(1, 5))
+            )
+            summary = assign_judges(options['per_idea'])
+
+            scored = [
+                assignment for assignment in JudgeAssignment.objects.order_by('pk')
+                if rnd.random() < options['coverage']
+            ]
+            IdeaScore.objects.bulk_create(
+                (
+                    IdeaScore(
+                        idea_id=assignment.idea_id, judge_id=assignment.judge_id,
+                        criterion_id=criterion.pk, score=rnd.randint(0, criterion.max_score),
+                    )
+                    for assignment in scored
+                    for criterion in criteria
+                ),
+                batch_size=1000,
+            )
+            rebuild_all_summaries()
+            bump_data_version(User, Team, Idea, IdeaScore)
+
+        self.stdout.write(
+            f"{len(teams)} team(s), {len(ideas)} idea(s), {options['judges']} judge(s); "
+            f"{summary['created']} assignment(s), {len(scored)} scored"
+        )
+        self.stdout.write(self.style.SUCCESS('Benchmark data generated'))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from judging.summaries import find_summary_drift, rebuild_all_summaries
+
+class Command(BaseCommand):
+    help = "Rebuilds the IdeaScoreSummary and JudgeCoverage rollups from raw IdeaScore rows, or reports drift with --check"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true', help='Only report summaries that disagree with the raw scores')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per INSERT when rebuilding')
+
+    def handle(self, *args, **options):
+        if options['check']:
+            drift = find_summary_drift()
+            for idea_id, (stored, expected) in sorted(drift.items()):
+                self.stdout.write(self.style.WARNING(f"Idea {idea_id}: stored={stored} expected={expected}"))
+            if drift:
+                raise CommandError(f"{len(drift)} idea summaries have drifted; run without --check to rebuild")
+            self.stdout.write(self.style.SUCCESS("Score summaries are consistent"))
+            return
+
+        with transaction.atomic():
+            count = rebuild_all_summaries(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} idea score summaries"))
@@ -1,9 +1,9 @@
 from django.db import models
 from django.conf import settings
-from teams.models import Idea  # import Idea model to link here if needed
+from teams.models import Team, Idea  # import Idea model to link here if needed
 
 class RubricCriterion(models.Model):
-    name = models.CharField(max_length=100)
+    name = models.CharField(max_length=100, unique=True)
     description = models.TextField(blank=True, null=True)
     max_score = models.IntegerField(default=0)  # add max score field
 
@@ -22,6 +22,87 @@ class IdeaScore(models.Model):
 
     class Meta:
         unique_together = ('idea', 'judge', 'criterion')
+        indexes = [
+            # unique_together leads with (idea, judge); this serves per-criterion rollups
+            models.Index(fields=['idea', 'criterion'], name='score_idea_criterion_idx'),
+        ]
 
     def __str__(self):
         return f"Score: {self.score} for {self.criterion} by {self.judge}"
+
+
+class IdeaScoreSummary(models.Model):
+    """Denormalised rollup of an idea's scores, refreshed on every score write."""
+
+    idea = models.OneToOneField(Idea, related_name='score_summary', on_delete=models.CASCADE)
+    total = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    score_count = models.IntegerField(default=0)
+    judge_count = models.IntegerField(default=0)
+    # judges who have scored every rubric criterion
+    complete_judge_count = models.IntegerField(default=0)
+    # {criterion_id: {"sum": "12.50", "count": 2, "avg": "6.25"}}
+    criteria = models.JSONField(default=dict)
+    last_scored_at = models.DateTimeField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Summary for {self.idea_id}: {self.total} from {self.judge_count} judge(s)"
+
+
+class JudgeCoverage(models.Model):
+    """How many rubric criteria one judge has scored for an idea, refreshed with the summaries."""
+
+    idea = models.ForeignKey(Idea, related_name='coverage', on_delete=models.CASCADE)
+    judge = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='coverage', on_delete=models.CASCADE)
+    criteria_scored = models.IntegerField(default=0)
+    complete = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['idea', 'judge'], name='coverage_idea_judge_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['judge', 'complete'], name='coverage_judge_complete_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.judge} scored {self.criteria_scored} criteria of idea {self.idea_id}"
+
+
+class JudgeAssignment(models.Model):
+    """A judge who should score an idea; maintained by ``judging.assignments``."""
+
+    idea = models.ForeignKey(Idea, related_name='assignments', on_delete=models.CASCADE)
+    judge = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='assignments', on_delete=models.CASCADE)
+    # the judge has scored every criterion; kept in step with JudgeCoverage
+    complete = models.BooleanField(default=False)
+    assigned_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['idea', 'judge'], name='assignment_idea_judge_unique'),
+        ]
+        indexes = [
+            # "my assignments" lookups; the unique constraint already leads with idea
+            models.Index(fields=['judge', 'idea'], name='assignment_judge_idea_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.judge} -> idea {self.idea_id}"
+
+
+class JudgeConflict(models.Model):
+    """A team a judge must not score (mentor, employer, relative, ...)."""
+
+    judge = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='conflicts', on_delete=models.CASCADE)
+    team = models.ForeignKey(Team, related_name='judge_conflicts', on_delete=models.CASCADE)
+    reason = models.CharField(max_length=200, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['judge', 'team'], name='conflict_judge_team_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.judge} conflicts with {self.team}"
@@ -0,0 +1,96 @@
+"""Judging progress read from the pre-computed rollups.
+
+Every score write refreshes the idea's ``IdeaScoreSummary`` (with its count
+of judges who scored every criterion), its ``JudgeCoverage`` rows and the
+``complete`` flag of its ``JudgeAssignment`` rows in the same transaction
+(see ``judging.summaries``). The numbers here are grouped counts over those
+rows, one per idea or per (idea, judge), and never touch ``IdeaScore``.
+
+An idea is *complete* once ``per_idea`` judges have scored every criterion.
+"""
+
+from django.contrib.auth import get_user_model
+from django.db.models import Count, Q, Sum
+
+from teams.models import Idea
+from .assignments import DEFAULT_JUDGES_PER_IDEA
+from .models import JudgeAssignment, JudgeCoverage
+from .rubrics import get_rubric
+
+
+def problem_statement_progress(per_idea=DEFAULT_JUDGES_PER_IDEA):
+    """Per problem statement counts of primary ideas: all, started, complete and reviews."""
+    rows = (
+        Idea.objects
+        .filter(is_primary=True)
+        .values('sih_ps_id')
+        .annotate(
+            ideas=Count('pk'),
+            started=Count('score_summary'),
+            complete=Count('pk', filter=Q(score_summary__complete_judge_count__gte=per_idea)),
+            reviews=Sum('score_summary__judge_count', default=0),
+            complete_reviews=Sum('score_summary__complete_judge_count', default=0),
+        )
+        .order_by('sih_ps_id')
+    )
+    return [{**row, 'needs_judges': row['ideas'] - row['complete']} for row in rows]
+
+
+def judge_progress(judges=None):
+    """Per judge counts: ideas assigned, ideas started and finished, and assigned ideas finished.
+
+    ``judges`` is a list or queryset of users (default: every judge).
+    Started and finished count every idea the judge has scored.
+    """
+    if judges is None:
+        judges = get_user_model().objects.filter(role='judge').only('username')
+    progress = {
+        user.pk: {
+            'judge': user.pk,
+            'username': user.username,
+            'assigned': 0,
+            'assigned_complete': 0,
+            'started': 0,
+            'complete': 0,
+        }
+        for user in judges
+    }
+    judge_ids = list(progress)
+
+    # Grouped on the (judge, ...) indexes alone; joining ideas or users here
+    # costs more than everything else in the report.
+    coverage = (
+        JudgeCoverage.objects.filter(judge_id__in=judge_ids)
+        .values('judge_id')
+        .annotate(started=Count('pk'), complete=Count('pk', filter=Q(complete=True)))
+        .order_by()
+    )
+    for row in coverage:
+        progress[row['judge_id']].update(started=row['started'], complete=row['complete'])
+
+    assignments = (
+        JudgeAssignment.objects.filter(judge_id__in=judge_ids)
+        .values('judge_id')
+        .annotate(assigned=Count('pk'), assigned_complete=Count('pk', filter=Q(complete=True)))
+        .order_by()
+    )
+    for row in assignments:
+        progress[row['judge_id']].update(assigned=row['assigned'], assigned_complete=row['assigned_complete'])
+
+    return sorted(progress.values(), key=lambda judge: judge['username'])
+
+
+def judging_progress(per_idea=DEFAULT_JUDGES_PER_IDEA, judges=None):
+    """Overall, per problem statement and per judge progress (see the module docstring)."""
+    problem_statements = problem_statement_progress(per_idea)
+    totals = {
+        key: sum(row[key] for row in problem_statements)
+        for key in ('ideas', 'started', 'complete', 'needs_judges', 'reviews', 'complete_reviews')
+    }
+    return {
+        'criteria': len(get_rubric().criteria),
+        'per_idea': per_idea,
+        'totals': totals,
+        'problem_statements': problem_statements,
+        'judges': judge_progress(judges),
+    }
@@ -0,0 +1,149 @@
+"""Team rankings computed from the full score matrix with NumPy.
+
+The scores of every team's primary idea are summed per (idea, judge) in one
+query and the resulting columns aggregated with ``np.bincount`` over
+integer-coded groups, so no Python loop runs per score. Three methods are
+available:
+
+``raw``
+    The sum of all marks, as on the landing page. More judges means a
+    bigger total.
+``mean``
+    Each judge's marks as a fraction of the maximum for the criteria they
+    scored (criteria weighted by ``max_score``), averaged over the idea's
+    judges and scaled back to rubric marks.
+``zscore``
+    Each judge's fractions standardised against that judge's own mean and
+    spread, then averaged per idea, so lenient and strict judges count the
+    same. A judge who scored only one idea, or gave everyone the same
+    result, contributes 0.
+
+Ties on the method's score are broken by the mean fraction, then by the
+number of judges, then by team ID.
+"""
+
+import numpy as np
+from django.db.models import FloatField, Sum
+from django.db.models.functions import Cast
+
+from teams.models import Idea
+from .models import IdeaScore
+from .rubrics import get_rubric
+
+METHODS = ('raw', 'mean', 'zscore')
+
+
+def load_score_cells():
+    """Return ``(idea_ids, judge_ids, marks, possible)`` arrays, one entry per (idea, judge).
+
+    ``marks`` is what the judge gave the idea over all criteria and
+    ``possible`` the sum of those criteria's ``max_score``. The database
+    does this first reduction, so only one row per judge per idea crosses
+    into Python.
+    """
+    rows = (
+        IdeaScore.objects
+        .filter(idea__is_primary=True)
+        .values('idea_id', 'judge_id')
+        # floats straight from the database; building Decimals per row costs more than the ranking
+        .annotate(
+            marks=Cast(Sum('score'), FloatField()),
+            possible=Cast(Sum('criterion__max_score'), FloatField()),
+        )
+        .values_list('idea_id', 'judge_id', 'marks', 'possible')
+        .order_by()
+    )
+    cells = np.array(list(rows), dtype=np.float64).reshape(-1, 4)
+    return (
+        cells[:, 0].astype(np.int64),
+        cells[:, 1].astype(np.int64),
+        cells[:, 2],
+        cells[:, 3],
+    )
+
+
+def compute_scores(idea_ids, judge_ids, marks, possible, rubric_total):
+    """Aggregate per-(idea, judge) cells per idea.
+
+    ``rubric_total`` is the sum of every criterion's ``max_score``. Returns
+    a dict of arrays aligned with ``ideas`` (sorted unique idea ids):
+    ``raw``, ``mean``, ``zscore``, ``fraction`` (mean judge fraction) and
+    ``judges``.
+    """
+    ideas, cell_idea = np.unique(idea_ids, return_inverse=True)
+    judges, cell_judge = np.unique(judge_ids, return_inverse=True)
+    n_ideas, n_judges = len(ideas), len(judges)
+
+    raw = np.bincount(cell_idea, weights=marks, minlength=n_ideas)
+
+    # each judge's marks as a fraction of what they could give
+    fraction = np.divide(marks, possible, out=np.zeros_like(marks), where=possible > 0)
+    judge_count = np.bincount(cell_idea, minlength=n_ideas)
+    mean_fraction = np.bincount(cell_idea, weights=fraction, minlength=n_ideas) / np.maximum(judge_count, 1)
+
+    # standardise every judge against their own marking
+    judged = np.bincount(cell_judge, minlength=n_judges)
+    judge_mean = np.bincount(cell_judge, weights=fraction, minlength=n_judges) / np.maximum(judged, 1)
+    judge_var = np.bincount(cell_judge, weights=fraction ** 2, minlength=n_judges) / np.maximum(judged, 1) - judge_mean ** 2
+    judge_std = np.sqrt(np.clip(judge_var, 0, None))
+    spread = judge_std[cell_judge]
+    z = np.divide(fraction - judge_mean[cell_judge], spread, out=np.zeros_like(fraction), where=spread > 1e-12)
+    zscore = np.bincount(cell_idea, weights=z, minlength=n_ideas) / np.maximum(judge_count, 1)
+
+    return {
+        'ideas': ideas,
+        'raw': raw,
+        'mean': mean_fraction * rubric_total,
+        'zscore': zscore,
+        'fraction': mean_fraction,
+        'judges': judge_count,
+    }
+
+
+def rank_teams(method='zscore', limit=None):
+    """Return ranked rows for every team whose primary idea has been scored."""
+    if method not in METHODS:
+        raise ValueError(f"Unknown ranking method {method!r}; expected one of {', '.join(METHODS)}")
+
+    cells = load_score_cells()
+    if not len(cells[0]):
+        return []
+    computed = compute_scores(*cells, rubric_total=sum(c.max_score for c in get_rubric().criteria))
+    ideas = computed['ideas']
+    details = {
+        pk: (idea_title, team_id, team_name)
+        for pk, idea_title, team_id, team_name in Idea.objects
+        .filter(pk__in=ideas.tolist())
+        .values_list('pk', 'idea_title', 'team__team_id', 'team__team_name')
+    }
+    # an idea deleted between the two queries has no details; leave it out
+    present = np.array([pk in details for pk in ideas.tolist()], dtype=bool)
+    team_ids = np.array([details.get(pk, ('', '', ''))[1] for pk in ideas.tolist()], dtype=object)
+
+    # np.lexsort sorts by the last key first; negate to sort descending.
+    # Round away float summation noise so equal marks tie and fall through
+    # to the next key.
+    order = np.lexsort((
+        np.argsort(np.argsort(team_ids)),
+        -computed['judges'],
+        -np.round(computed['fraction'], 9),
+        -np.round(computed[method], 9),
+    ))
+    order = order[present[order]]
+    if limit is not None:
+        order = order[:limit]
+
+    return [
+        {
+            'rank': position,
+            'team_id': details[ideas[i]][1],
+            'team_name': details[ideas[i]][2],
+            'idea_id': int(ideas[i]),
+            'idea_title': details[ideas[i]][0],
+            'score': round(float(computed[method][i]), 4),
+            'raw': round(float(computed['raw'][i]), 2),
+            'mean_fraction': round(float(computed['fraction'][i]), 4),
+            'judges': int(computed['judges'][i]),
+        }
+        for position, i in enumerate(order, start=1)
+    ]
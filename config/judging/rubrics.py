@@ -0,0 +1,64 @@
+"""Process-local registry of rubric criteria.
+
+Criteria are read on almost every request but change perhaps once per event
+(``seed_rubrics``). Each process loads them once into immutable maps and
+reuses them until the version stamp kept in Django's cache moves on. Saving
+or deleting a criterion bumps that stamp (see ``judging.signals``), so every
+worker sharing the cache reloads on its next lookup.
+"""
+
+import threading
+import time
+from types import MappingProxyType
+
+from django.core.cache import cache
+
+from .models import RubricCriterion
+
+VERSION_KEY = 'judging:rubrics:version'
+
+_lock = threading.Lock()
+_registry = None
+
+
+class RubricRegistry:
+    """An immutable snapshot of the rubric. Treat the criterion instances as read-only."""
+
+    def __init__(self, criteria, version):
+        self.criteria = tuple(criteria)
+        self.by_name = MappingProxyType({c.name: c for c in self.criteria})
+        self.by_id = MappingProxyType({c.pk: c for c in self.criteria})
+        self.version = version
+
+
+def _current_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # Seed with a time-based stamp so an evicted key never repeats an old version
+        cache.add(VERSION_KEY, time.time_ns(), None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def get_rubric():
+    """Return the current ``RubricRegistry``, reloading it only when the version stamp moved."""
+    global _registry
+    version = _current_version()
+    registry = _registry
+    if registry is None or registry.version != version:
+        with _lock:
+            if _registry is None or _registry.version != version:
+                # read from the primary: a lagging replica would cache stale criteria under the new version
+                _registry = RubricRegistry(RubricCriterion.objects.using('default').order_by('pk'), version)
+            registry = _registry
+    return registry
+
+
+def invalidate_rubric():
+    """Make every process reload the rubric on its next lookup."""
+    global _registry
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, time.time_ns(), None)
+    _registry = None
@@ -0,0 +1,71 @@
+from django.db import transaction
+
+from teams.versioning import bump_data_version
+
+from .models import IdeaScore
+from .summaries import refresh_idea_summaries
+
+
+def validate_rubric_scores(scores_data, criteria):
+    """Check a ``{rubric name: score}`` payload against the rubric.
+
+    ``criteria`` maps rubric name -> criterion, normally ``get_rubric().by_name``.
+    Returns ``(scores, errors)`` where ``scores`` maps criterion -> value for
+    the valid entries and ``errors`` maps rubric name -> message.
+    """
+    scores = {}
+    errors = {}
+    for rubric_name, score_value in scores_data.items():
+        criterion = criteria.get(rubric_name)
+        if criterion is None:
+            errors[rubric_name] = "Criterion not found"
+            continue
+
+        # Validate score_value within range
+        if not isinstance(score_value, (int, float)) or score_value < 0 or score_value > criterion.max_score:
+            errors[rubric_name] = f"Invalid score. Must be 0 to {criterion.max_score}"
+            continue
+
+        scores[criterion] = score_value
+    return scores, errors
+
+
+def save_rubric_scores(judge, scores_by_idea):
+    """Upsert one judge's scores for several ideas in a single statement.
+
+    ``scores_by_idea`` maps idea -> ``{criterion: value}``. Rows are keyed on
+    the ``(idea, judge, criterion)`` unique constraint, so re-submitting
+    overwrites the judge's earlier marks. The idea score summaries are
+    refreshed in the same transaction. Returns ``{idea_id: [saved score dicts]}``.
+    """
+    ideas = list(scores_by_idea)
+    with transaction.atomic():
+        existing = set(
+            IdeaScore.objects
+            .filter(judge=judge, idea__in=ideas)
+            .values_list('idea_id', 'criterion_id')
+        )
+        IdeaScore.objects.bulk_create(
+            [
+                IdeaScore(idea=idea, judge=judge, criterion=criterion, score=score_value)
+                for idea, scores in scores_by_idea.items()
+                for criterion, score_value in scores.items()
+            ],
+            update_conflicts=True,
+            unique_fields=['idea', 'judge', 'criterion'],
+            update_fields=['score', 'scored_at'],
+        )
+        refresh_idea_summaries(idea.pk for idea in ideas)
+        bump_data_version(IdeaScore)
+
+    return {
+        idea.pk: [
+            {
+                "criterion": criterion.name,
+                "score": score_value,
+                "created": (idea.pk, criterion.pk) not in existing,
+            }
+            for criterion, score_value in scores.items()
+        ]
+        for idea, scores in scores_by_idea.items()
+    }
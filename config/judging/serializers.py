@@ -1,12 +1,27 @@
 from rest_framework import serializers
-from .models import RubricCriterion, IdeaScore
+from .models import RubricCriterion, IdeaScore, JudgeAssignment, JudgeConflict
+from teams.models import Team
+from .rubrics import get_rubric
+from teams.fieldsets import SparseFieldsetSerializerMixin
 
 class RubricCriterionSerializer(serializers.ModelSerializer):
     class Meta:
         model = RubricCriterion
         fields = ['id', 'name', 'description']
 
-class IdeaScoreSerializer(serializers.ModelSerializer):
+class RubricCriterionField(serializers.PrimaryKeyRelatedField):
+    """Resolves criterion ids from the in-process rubric registry instead of the database."""
+
+    def to_internal_value(self, data):
+        try:
+            return get_rubric().by_id[int(data)]
+        except KeyError:
+            self.fail('does_not_exist', pk_value=data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+
+class IdeaScoreSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
+    criterion = RubricCriterionField(queryset=RubricCriterion.objects.all())
     # Optional: to show rubric criterion name and max score in API output
     criterion_name = serializers.CharField(source='criterion.name', read_only=True)
     criterion_max_score = serializers.IntegerField(source='criterion.max_score', read_only=True)
@@ -28,11 +43,13 @@ class IdeaScoreSerializer(serializers.ModelSerializer):
 
     def validate_score(self, value):
         criterion = self.initial_data.get('criterion')
+        if criterion is None and self.instance is not None:
+            criterion = self.instance.criterion_id
 
-        # If criterion is provided by ID, fetch max_score
+        # Look the criterion up by ID in the rubric registry to get max_score
         try:
-            criterion_obj = RubricCriterion.objects.get(id=criterion)
-        except RubricCriterion.DoesNotExist:
+            criterion_obj = get_rubric().by_id[int(criterion)]
+        except (KeyError, TypeError, ValueError):
             raise serializers.ValidationError("Rubric criterion does not exist.")
 
         max_score = criterion_obj.max_score
@@ -50,3 +67,26 @@ class IdeaScoreSerializer(serializers.ModelSerializer):
             validated_data['judge'] = request.user
         return super().create(validated_data)
 
+
+class JudgeAssignmentSerializer(serializers.ModelSerializer):
+    team_id = serializers.CharField(source='idea.team.team_id', read_only=True)
+    team_name = serializers.CharField(source='idea.team.team_name', read_only=True)
+    sih_ps_id = serializers.CharField(source='idea.sih_ps_id', read_only=True)
+    judge_username = serializers.CharField(source='judge.username', read_only=True)
+
+    class Meta:
+        model = JudgeAssignment
+        fields = ['id', 'idea', 'team_id', 'team_name', 'sih_ps_id', 'judge', 'judge_username', 'assigned_at']
+        read_only_fields = fields
+
+class JudgeConflictSerializer(serializers.ModelSerializer):
+    team = serializers.SlugRelatedField(slug_field='team_id', queryset=Team.objects.all())
+
+    class Meta:
+        model = JudgeConflict
+        fields = ['id', 'judge', 'team', 'reason']
+
+    def validate_judge(self, value):
+        if value.role != 'judge':
+            raise serializers.ValidationError("Conflicts can only be recorded for judges.")
+        return value
@@ -0,0 +1,12 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import RubricCriterion
+from .rubrics import invalidate_rubric
+
+
+@receiver([post_save, post_delete], sender=RubricCriterion)
+def rubric_changed(sender, **kwargs):
+    # Wait for the commit so other workers cannot reload the old rows
+    transaction.on_commit(invalidate_rubric)
@@ -0,0 +1,178 @@
+from decimal import Decimal
+
+from django.db.models import Avg, Count, Exists, Max, OuterRef, Sum
+
+from teams.models import Idea
+from .models import IdeaScore, IdeaScoreSummary, JudgeAssignment, JudgeCoverage
+from .rubrics import get_rubric
+
+SUMMARY_FIELDS = ['total', 'score_count', 'judge_count', 'complete_judge_count', 'criteria', 'last_scored_at']
+
+
+def _scores(idea_ids):
+    scores = IdeaScore.objects.all()
+    if idea_ids is not None:
+        scores = scores.filter(idea_id__in=idea_ids)
+    return scores
+
+
+def compute_coverage(idea_ids=None):
+    """Return ``{(idea_id, judge_id): criteria scored}`` from the raw scores in one grouped query."""
+    rows = _scores(idea_ids).order_by().values('idea_id', 'judge_id').annotate(criteria=Count('criterion_id'))
+    return {(row['idea_id'], row['judge_id']): row['criteria'] for row in rows}
+
+
+def compute_summaries(idea_ids=None, coverage=None):
+    """Aggregate raw IdeaScore rows into summary field values keyed by idea id.
+
+    Two grouped queries are issued regardless of how many ideas are covered,
+    one if ``coverage`` (from ``compute_coverage``) is passed in. Pass
+    ``idea_ids=None`` to compute every idea that has scores.
+    """
+    scores = _scores(idea_ids)
+
+    summaries = {}
+    per_criterion = (
+        scores.order_by()
+        .values('idea_id', 'criterion_id')
+        .annotate(total=Sum('score'), count=Count('id'), avg=Avg('score'), last=Max('scored_at'))
+    )
+    for row in per_criterion:
+        summary = summaries.setdefault(row['idea_id'], {
+            'total': Decimal('0'),
+            'score_count': 0,
+            'judge_count': 0,
+            'complete_judge_count': 0,
+            'criteria': {},
+            'last_scored_at': None,
+        })
+        summary['total'] += row['total'] or 0
+        summary['score_count'] += row['count']
+        summary['criteria'][str(row['criterion_id'])] = {
+            'sum': str(row['total']),
+            'count': row['count'],
+            'avg': str(row['avg']),
+        }
+        if summary['last_scored_at'] is None or row['last'] > summary['last_scored_at']:
+            summary['last_scored_at'] = row['last']
+
+    if coverage is None:
+        coverage = compute_coverage(idea_ids)
+    criteria = len(get_rubric().criteria)
+    for (idea_id, _), scored in coverage.items():
+        summaries[idea_id]['judge_count'] += 1
+        summaries[idea_id]['complete_judge_count'] += scored >= criteria
+
+    return summaries
+
+
+def _coverage_rows(coverage):
+    criteria = len(get_rubric().criteria)
+    return [
+        JudgeCoverage(idea_id=idea_id, judge_id=judge_id, criteria_scored=scored, complete=scored >= criteria)
+        for (idea_id, judge_id), scored in coverage.items()
+    ]
+
+
+def refresh_idea_summaries(idea_ids):
+    """Recompute the summaries of the given ideas from their current scores.
+
+    Call this inside the same transaction as the score write so readers never
+    see totals that disagree with the raw rows. The ideas are locked first
+    (in id order, so two refreshes cannot deadlock): under READ COMMITTED a
+    concurrent submit for the same idea then waits for this transaction to
+    commit and recomputes from scores that include ours, instead of writing
+    back totals computed without them.
+    """
+    idea_ids = set(idea_ids)
+    if not idea_ids:
+        return
+
+    list(Idea.objects.filter(pk__in=idea_ids).order_by('pk').select_for_update().values_list('pk', flat=True))
+    coverage = compute_coverage(idea_ids)
+    summaries = compute_summaries(idea_ids, coverage)
+
+    # Ideas whose last score was removed drop their summary row entirely, so
+    # "summary exists" keeps meaning "at least one score exists".
+    IdeaScoreSummary.objects.filter(idea_id__in=idea_ids - summaries.keys()).delete()
+    if summaries:
+        IdeaScoreSummary.objects.bulk_create(
+            [IdeaScoreSummary(idea_id=idea_id, **fields) for idea_id, fields in summaries.items()],
+            update_conflicts=True,
+            unique_fields=['idea'],
+            update_fields=SUMMARY_FIELDS + ['updated_at'],
+        )
+    JudgeCoverage.objects.filter(idea_id__in=idea_ids).delete()
+    JudgeCoverage.objects.bulk_create(_coverage_rows(coverage))
+    mark_assignments(JudgeAssignment.objects.filter(idea_id__in=idea_ids))
+
+
+def rebuild_all_summaries(batch_size=1000):
+    """Drop and recreate every summary and coverage row from the raw scores.
+
+    Run this after changing the rubric: completeness is judged against the
+    number of criteria at the time a row was written.
+    """
+    coverage = compute_coverage()
+    summaries = compute_summaries(coverage=coverage)
+    IdeaScoreSummary.objects.all().delete()
+    IdeaScoreSummary.objects.bulk_create(
+        [IdeaScoreSummary(idea_id=idea_id, **fields) for idea_id, fields in summaries.items()],
+        batch_size=batch_size,
+    )
+    JudgeCoverage.objects.all().delete()
+    JudgeCoverage.objects.bulk_create(_coverage_rows(coverage), batch_size=batch_size)
+    mark_assignments(JudgeAssignment.objects.all())
+    return len(summaries)
+
+
+def mark_assignments(assignments):
+    """Set ``complete`` on the given assignments from the judges' coverage rows."""
+    done = JudgeCoverage.objects.filter(idea=OuterRef('idea'), judge=OuterRef('judge'), complete=True)
+    assignments.update(complete=Exists(done))
+
+
+def find_summary_drift():
+    """Return ``{idea_id: (stored, expected)}`` for every summary that disagrees with the raw scores."""
+    coverage = compute_coverage()
+    expected = compute_summaries(coverage=coverage)
+    stored = {
+        row['idea_id']: row
+        for row in IdeaScoreSummary.objects.values('idea_id', *SUMMARY_FIELDS)
+    }
+
+    drift = {}
+    for idea_id in expected.keys() | stored.keys():
+        want = expected.get(idea_id)
+        have = stored.get(idea_id)
+        if have is not None:
+            have = {field: have[field] for field in SUMMARY_FIELDS}
+        if want != have:
+            drift[idea_id] = (have, want)
+
+    # coverage rows, compared per idea as {judge id: criteria scored}
+    criteria = len(get_rubric().criteria)
+    expected_coverage = {}
+    for (idea_id, judge_id), scored in coverage.items():
+        expected_coverage.setdefault(idea_id, {})[judge_id] = (scored, scored >= criteria)
+    stored_coverage = {}
+    for idea_id, judge_id, scored, complete in JudgeCoverage.objects.values_list(
+        'idea_id', 'judge_id', 'criteria_scored', 'complete'
+    ):
+        stored_coverage.setdefault(idea_id, {})[judge_id] = (scored, complete)
+    for idea_id in expected_coverage.keys() | stored_coverage.keys():
+        want = expected_coverage.get(idea_id)
+        have = stored_coverage.get(idea_id)
+        if want != have and idea_id not in drift:
+            drift[idea_id] = ({'coverage': have}, {'coverage': want})
+    return drift
+
+
+def criterion_average(summary, criterion):
+    """Average score of ``criterion`` in ``summary`` (0 when unscored), as the old Avg() aggregate returned it."""
+    if summary is None:
+        return 0
+    entry = summary.criteria.get(str(criterion.pk))
+    if not entry:
+        return 0
+    return Decimal(entry['avg']) or 0
@@ -1,3 +1,200 @@
-from django.test import TestCase
+import csv
+import os
+import tempfile
+import threading
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, skipUnlessDBFeature
+from openpyxl import load_workbook
+
+from accounts.models import User
+from teams.models import Team, Idea
+from .assignments import assign_judges
+from .models import IdeaScore, IdeaScoreSummary, JudgeAssignment, JudgeConflict, JudgeCoverage, RubricCriterion
+from .ranking import compute_scores, rank_teams
+from .rubrics import get_rubric
+from .scoring import save_rubric_scores
+from .summaries import compute_summaries, find_summary_drift
+
+
+@skipUnlessDBFeature('has_select_for_update')
+class ConcurrentSubmitTests(TransactionTestCase):
+    """Two judges scoring one idea at once must both end up in its summary (needs a row-locking database)."""
+
+    def setUp(self):
+        call_command('seed_rubrics', stdout=open(os.devnull, 'w'))
+        team = Team.objects.create(team_id='T001', team_name='Team')
+        self.idea = Idea.objects.create(
+            team=team, sih_ps_id='PS1', ps_title='Problem', ps_description='', idea_title='Idea',
+            idea_description='', is_primary=True,
+        )
+        self.judges = [User.objects.create_user(f'judge-{n}', role='judge') for n in range(2)]
+
+    def submit(self, judge, errors):
+        try:
+            save_rubric_scores(judge, {self.idea: {criterion: 1 for criterion in get_rubric().criteria}})
+        except Exception as exc:
+            errors.append(exc)
+        finally:
+            connection.close()
+
+    def test_interleaved_submits_keep_both_judges(self):
+        computed, resume = threading.Event(), threading.Event()
+
+        def compute_then_pause(*args, **kwargs):
+            # the first submit stops after computing, before writing the summary back
+            result = compute_summaries(*args, **kwargs)
+            if not computed.is_set():
+                computed.set()
+                resume.wait(10)
+            return result
+
+        errors = []
+        with mock.patch('judging.summaries.compute_summaries', compute_then_pause):
+            first = threading.Thread(target=self.submit, args=(self.judges[0], errors))
+            first.start()
+            self.assertTrue(computed.wait(10))
+            second = threading.Thread(target=self.submit, args=(self.judges[1], errors))
+            second.start()
+            # without the idea lock the second submit commits its own totals here
+            second.join(1)
+            resume.set()
+            first.join(10)
+            second.join(10)
+
+        self.assertEqual(errors, [])
+        criteria = len(get_rubric().criteria)
+        summary = IdeaScoreSummary.objects.get(idea=self.idea)
+        self.assertEqual(summary.judge_count, 2)
+        self.assertEqual(summary.score_count, 2 * criteria)
+        self.assertEqual(JudgeCoverage.objects.filter(idea=self.idea, complete=True).count(), 2)
+        self.assertEqual(find_summary_drift(), {})
+
+
+def add_primary_ideas(count):
+    return [
+        Idea.objects.create(
+            team=Team.objects.create(team_id=f'T{n}', team_name=f'Team {n}'), sih_ps_id=f'PS{n % 2}',
+            ps_title='Problem', ps_description='', idea_title=f'Idea {n}', idea_description='', is_primary=True,
+        )
+        for n in range(1, count + 1)
+    ]
+
+
+class ComputeScoresTests(SimpleTestCase):
+    def compute(self, cells):
+        idea_ids, judge_ids, marks, possible = (np.array(column, dtype=dtype) for column, dtype in zip(
+            zip(*cells), (np.int64, np.int64, np.float64, np.float64),
+        ))
+        return compute_scores(idea_ids, judge_ids, marks, possible, rubric_total=10)
+
+    def test_methods_on_a_fixed_matrix(self):
+        # (idea, judge, marks, possible): judge 10 fractions .8/.4/.6, judge 20 fractions .6/1.0
+        computed = self.compute([(1, 10, 8, 10), (1, 20, 6, 10), (2, 10, 4, 10), (2, 20, 10, 10), (3, 10, 6, 10)])
+        self.assertEqual(computed['ideas'].tolist(), [1, 2, 3])
+        self.assertEqual(computed['judges'].tolist(), [2, 2, 1])
+        np.testing.assert_allclose(computed['raw'], [14, 14, 6])
+        np.testing.assert_allclose(computed['mean'], [7, 7, 6])
+        # judge 10: z = +-sqrt(1.5) and 0; judge 20: z = -1 and +1
+        z = np.sqrt(1.5)
+        np.testing.assert_allclose(computed['zscore'], [(z - 1) / 2, (1 - z) / 2, 0], atol=1e-12)
+
+    def test_judge_without_spread_contributes_zero(self):
+        # judge 30 scored one idea only, judge 40 gave both ideas the same
+        computed = self.compute([(1, 10, 8, 10), (2, 10, 4, 10), (1, 30, 10, 10), (1, 40, 5, 10), (2, 40, 5, 10)])
+        self.assertTrue(np.isfinite(computed['zscore']).all())
+        np.testing.assert_allclose(computed['zscore'], [1 / 3, -1 / 2])
+
+
+class RankTeamsTests(TestCase):
+    def test_ties_fall_through_fraction_judges_then_team_id(self):
+        first, second = (RubricCriterion.objects.create(name=f'c{n}', max_score=10) for n in range(2))
+        a, b = (User.objects.create_user(name, role='judge') for name in ('a', 'b'))
+        t1, t2, t3, t4 = add_primary_ideas(4)
+        # every team's raw total is 4
+        for idea, judge, criterion, score in (
+            (t3, a, first, 4),  # best fraction: 4 of 10
+            (t4, a, first, 2), (t4, b, first, 2),  # 2 of 10, two judges
+            (t1, b, first, 2), (t1, b, second, 2),  # 4 of 20, one judge
+            (t2, a, first, 2), (t2, a, second, 2),
+        ):
+            IdeaScore.objects.create(idea=idea, judge=judge, criterion=criterion, score=Decimal(score))
+
+        ranking = rank_teams('raw')
+        self.assertEqual([row['team_id'] for row in ranking], ['T3', 'T4', 'T1', 'T2'])
+        self.assertEqual({row['score'] for row in ranking}, {4})
+
+
+class AssignJudgesTests(TestCase):
+    def test_balanced_without_conflicts_and_adopting_judge_scorers(self):
+        call_command('seed_rubrics', stdout=open(os.devnull, 'w'))
+        criterion = get_rubric().criteria[0]
+        ideas = add_primary_ideas(6)
+        judges = [User.objects.create_user(f'judge-{n}', role='judge') for n in range(4)]
+        admin = User.objects.create_user('admin', role='admin')
+        JudgeConflict.objects.create(judge=judges[0], team=ideas[0].team)
+        IdeaScore.objects.create(idea=ideas[1], judge=judges[1], criterion=criterion, score=1)
+        IdeaScore.objects.create(idea=ideas[2], judge=admin, criterion=criterion, score=1)
+
+        summary = assign_judges(per_idea=2)
+
+        self.assertEqual(summary['understaffed'], [])
+        self.assertEqual(summary['load'], {'min': 3, 'max': 3})
+        assigned = set(JudgeAssignment.objects.values_list('idea_id', 'judge_id'))
+        self.assertEqual(len(assigned), 12)
+        self.assertNotIn((ideas[0].pk, judges[0].pk), assigned)
+        self.assertIn((ideas[1].pk, judges[1].pk), assigned)
+        self.assertFalse(JudgeAssignment.objects.filter(judge=admin).exists())
+
+
+class ExportResultsTests(TestCase):
+    def setUp(self):
+        call_command('seed_rubrics', stdout=open(os.devnull, 'w'))
+        ideas = add_primary_ideas(3)
+        judges = [User.objects.create_user(f'judge-{n}', role='judge') for n in range(2)]
+        criteria = get_rubric().criteria
+        # two judges on the first idea, one on the second, none on the third
+        for judge, scored in ((judges[0], ideas[:2]), (judges[1], ideas[:1])):
+            save_rubric_scores(judge, {idea: {criterion: 1 for criterion in criteria} for idea in scored})
+        self.criteria = [criterion.name for criterion in criteria]
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def export(self, sheet, file_format):
+        output = os.path.join(self.directory.name, f'{sheet}.{file_format}')
+        call_command(
+            'export_results', sheet, '--format', file_format, '--output', output, '--chunk-size', '1',
+            stdout=open(os.devnull, 'w'),
+        )
+        return output
+
+    def test_each_sheet_as_csv_and_xlsx(self):
+        expected = {
+            'scores': ([
+                'team_id', 'team_name', 'idea_id', 'idea_title', 'sih_ps_id', 'judges', 'complete_judges',
+                *(f'{name} (avg)' for name in self.criteria), 'average_total', 'raw_total',
+            ], 3),
+            'judges': (['team_id', 'team_name', 'idea_id', 'idea_title', 'judge', *self.criteria, 'total', 'last_scored_at'], 3),
+            'rankings': (['rank', 'team_id', 'team_name', 'idea_id', 'idea_title', 'score', 'raw', 'mean_fraction', 'judges'], 2),
+        }
+        for sheet, (header, count) in expected.items():
+            with self.subTest(sheet=sheet):
+                with open(self.export(sheet, 'csv'), newline='') as file:
+                    rows = list(csv.reader(file))
+                self.assertEqual(rows[0], header)
+                self.assertEqual(len(rows) - 1, count)
+
+                workbook = load_workbook(self.export(sheet, 'xlsx'), read_only=True)
+                self.assertEqual(workbook.sheetnames, [sheet])
+                xlsx_rows = list(workbook[sheet].iter_rows(values_only=True))
+                workbook.close()
+                self.assertEqual(list(xlsx_rows[0]), header)
+                self.assertEqual(len(xlsx_rows) - 1, count)
+
+    def test_chunk_size_must_be_positive(self):
+        with self.assertRaisesMessage(CommandError, '--chunk-size must be at least 1'):
+            call_command('export_results', 'scores', '--chunk-size', '0', '--output', os.devnull)
@@ -1,11 +1,18 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import RubricCriterionViewSet, IdeaScoreViewSet
+from .views import (
+    RubricCriterionViewSet, IdeaScoreViewSet, JudgeAssignmentViewSet, JudgeConflictViewSet, ProgressView, RankingView, ExportView,
+)
 
 router = DefaultRouter()
 router.register(r'rubrics', RubricCriterionViewSet)
 router.register(r'scores', IdeaScoreViewSet, basename='ideascore')
+router.register(r'assignments', JudgeAssignmentViewSet, basename='assignment')
+router.register(r'conflicts', JudgeConflictViewSet)
 
 urlpatterns = [
     path('', include(router.urls)),
+    path('rankings/', RankingView.as_view(), name='rankings'),
+    path('progress/', ProgressView.as_view(), name='progress'),
+    path('export/<str:sheet>.<str:file_format>', ExportView.as_view(), name='export'),
 ]
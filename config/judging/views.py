@@ -1,25 +1,209 @@
+import tempfile
 from rest_framework import viewsets
-from .models import RubricCriterion, IdeaScore
-from .serializers import RubricCriterionSerializer, IdeaScoreSerializer
+from django.db import transaction
+from config.routers import ReplicaReadMixin, stream_from_replica
+from .models import RubricCriterion, IdeaScore, JudgeAssignment, JudgeConflict
+from .serializers import (
+    RubricCriterionSerializer, IdeaScoreSerializer, JudgeAssignmentSerializer, JudgeConflictSerializer,
+)
+from .assignments import DEFAULT_JUDGES_PER_IDEA, assign_judges, assigned_to
+from .summaries import refresh_idea_summaries
+from teams.fieldsets import SparseFieldsetMixin
+from teams.relations import RelatedQuerysetMixin
+from teams.response_cache import cache_responses
+from teams.live import publish_ideas
+from teams.pagination import PkCursorPagination
 from accounts.permissions import IsAdminUser, IsJudgeOrAdmin
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from django_filters.rest_framework import DjangoFilterBackend
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils.decorators import method_decorator
+from teams.versioning import DATA_VERSION_CONDITIONS, bump_data_version
+from .exports import CONTENT_TYPES, FORMATS, SHEETS, ExportUnavailable, csv_lines, build_sheet, write_export
+from .progress import judging_progress
+from .ranking import METHODS, rank_teams
 
-class RubricCriterionViewSet(viewsets.ModelViewSet):
+@cache_responses(RubricCriterion)
+class RubricCriterionViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     queryset = RubricCriterion.objects.all()
     serializer_class = RubricCriterionSerializer
     permission_classes = [IsAuthenticated, IsAdminUser]  # Only admins can manage rubrics
 
-class IdeaScoreViewSet(viewsets.ModelViewSet):
+class IdeaScoreViewSet(ReplicaReadMixin, RelatedQuerysetMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     serializer_class = IdeaScoreSerializer
+    select_related_fields = ('criterion',)
+    pagination_class = PkCursorPagination
     permission_classes = [IsAuthenticated, IsJudgeOrAdmin]
 
     def get_queryset(self):
         user = self.request.user
         if user.role == 'judge':
-            return IdeaScore.objects.filter(judge=user)
+            queryset = IdeaScore.objects.filter(judge=user)
         elif user.role == 'admin':
-            return IdeaScore.objects.all()
-        return IdeaScore.objects.none()
+            queryset = IdeaScore.objects.all()
+        else:
+            return IdeaScore.objects.none()
+        # ?assigned=me: only scores on ideas the user is assigned to
+        assigned = self.request.query_params.get('assigned')
+        if assigned is not None:
+            if assigned != 'me':
+                raise ValidationError({"assigned": "Only 'me' is supported."})
+            queryset = queryset.filter(idea__in=assigned_to(user).values('idea'))
+        return queryset
 
     def perform_create(self, serializer):
-        serializer.save(judge=self.request.user)
+        with transaction.atomic():
+            score = serializer.save(judge=self.request.user)
+            refresh_idea_summaries([score.idea_id])
+            publish_ideas([score.idea_id])
+
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            previous_idea_id = serializer.instance.idea_id
+            score = serializer.save()
+            refresh_idea_summaries({previous_idea_id, score.idea_id})
+            publish_ideas({previous_idea_id, score.idea_id})
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            idea_id = instance.idea_id
+            instance.delete()
+            refresh_idea_summaries([idea_id])
+            publish_ideas([idea_id])
+
+class JudgeAssignmentViewSet(ReplicaReadMixin, RelatedQuerysetMixin, viewsets.ReadOnlyModelViewSet):
+    """Judges see their own assignments, admins everyone's; ``POST run/`` (re)assigns."""
+    serializer_class = JudgeAssignmentSerializer
+    select_related_fields = ('idea__team', 'judge')
+    pagination_class = PkCursorPagination
+    permission_classes = [IsAuthenticated, IsJudgeOrAdmin]
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ['judge', 'idea', 'idea__sih_ps_id']
+
+    def get_queryset(self):
+        user = self.request.user
+        queryset = JudgeAssignment.objects.filter(idea__is_primary=True)
+        if user.role != 'admin':
+            queryset = queryset.filter(judge=user)
+        return queryset
+
+    def get_permissions(self):
+        if self.action == 'run':
+            return [IsAuthenticated(), IsAdminUser()]
+        return super().get_permissions()
+
+    @action(detail=False, methods=['post'])
+    def run(self, request):
+        """Assign judges to every primary idea.
+
+        Body (all optional): ``{"per_idea": 3, "reset": false, "exclude": ["judge username", ...]}``.
+        Keeps valid assignments unless ``reset`` is set; see ``judging.assignments``.
+        """
+        per_idea = request.data.get('per_idea', DEFAULT_JUDGES_PER_IDEA)
+        if isinstance(per_idea, bool) or not isinstance(per_idea, int) or per_idea < 1:
+            return Response({"detail": "per_idea must be a positive integer."}, status=status.HTTP_400_BAD_REQUEST)
+        exclude = request.data.get('exclude', [])
+        if not isinstance(exclude, list) or not all(isinstance(name, str) for name in exclude):
+            return Response({"detail": "exclude must be a list of usernames."}, status=status.HTTP_400_BAD_REQUEST)
+
+        summary = assign_judges(per_idea, reset=bool(request.data.get('reset', False)), exclude=exclude)
+        return Response(summary, status=status.HTTP_200_OK)
+
+class JudgeConflictViewSet(ReplicaReadMixin, RelatedQuerysetMixin, viewsets.ModelViewSet):
+    queryset = JudgeConflict.objects.order_by('pk')
+    serializer_class = JudgeConflictSerializer
+    select_related_fields = ('team',)
+    permission_classes = [IsAuthenticated, IsAdminUser]
+
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            self._release(serializer.save())
+
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            self._release(serializer.save())
+
+    @staticmethod
+    def _release(conflict):
+        # a conflict takes effect at once; the next assignment run refills the idea
+        JudgeAssignment.objects.filter(judge=conflict.judge, idea__team=conflict.team).delete()
+        bump_data_version(JudgeAssignment)
+
+class RankingView(ReplicaReadMixin, APIView):
+    """Team ranking by primary idea: ``?method=raw|mean|zscore`` (default zscore), optional ``?limit=``."""
+    permission_classes = [IsAuthenticated, IsJudgeOrAdmin]
+
+    @method_decorator(DATA_VERSION_CONDITIONS)
+    def get(self, request):
+        method = request.query_params.get('method', 'zscore')
+        if method not in METHODS:
+            return Response(
+                {"detail": f"method must be one of: {', '.join(METHODS)}"}, status=status.HTTP_400_BAD_REQUEST
+            )
+        limit = request.query_params.get('limit')
+        if limit is not None and not limit.isdigit():
+            return Response({"detail": "limit must be a positive integer."}, status=status.HTTP_400_BAD_REQUEST)
+
+        rankings = rank_teams(method, int(limit) if limit else None)
+        return Response({"method": method, "rankings": rankings})
+
+class ProgressView(ReplicaReadMixin, APIView):
+    """Judging progress overall, per problem statement and per judge, from the pre-computed rollups.
+
+    ``?per_idea=3`` sets how many complete judges make an idea complete.
+    Judges only see their own row in ``judges``.
+    """
+    permission_classes = [IsAuthenticated, IsJudgeOrAdmin]
+
+    @method_decorator(DATA_VERSION_CONDITIONS)
+    def get(self, request):
+        per_idea = request.query_params.get('per_idea', str(DEFAULT_JUDGES_PER_IDEA))
+        if not per_idea.isdigit() or int(per_idea) < 1:
+            return Response({"detail": "per_idea must be a positive integer."}, status=status.HTTP_400_BAD_REQUEST)
+
+        judges = None if request.user.role == 'admin' else [request.user]
+        return Response(judging_progress(int(per_idea), judges))
+
+class ExportView(ReplicaReadMixin, APIView):
+    """Download a results sheet: ``export/<scores|judges|rankings>.<csv|xlsx|parquet>``.
+
+    ``?method=`` picks the ranking method for the rankings sheet. CSV is
+    streamed as it is read; XLSX and Parquet are built in a temporary file
+    first. See ``judging.exports``.
+    """
+    permission_classes = [IsAuthenticated, IsAdminUser]
+
+    def get(self, request, sheet, file_format):
+        if sheet not in SHEETS or file_format not in FORMATS:
+            return Response(
+                {"detail": f"Export one of {', '.join(SHEETS)} as {', '.join(FORMATS)}."},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        method = request.query_params.get('method', 'zscore')
+        if method not in METHODS:
+            return Response(
+                {"detail": f"method must be one of: {', '.join(METHODS)}"}, status=status.HTTP_400_BAD_REQUEST
+            )
+        filename = f'{sheet}.{file_format}'
+
+        if file_format == 'csv':
+            # the body is read after the view returns, past the mixin's replica scope
+            lines = stream_from_replica(csv_lines(*build_sheet(sheet, method)))
+            response = StreamingHttpResponse(lines, content_type=CONTENT_TYPES['csv'])
+            response['Content-Disposition'] = f'attachment; filename="{filename}"'
+            return response
+
+        output = tempfile.TemporaryFile()
+        try:
+            write_export(output, sheet, file_format, method)
+        except ExportUnavailable as exc:
+            output.close()
+            return Response({"detail": str(exc)}, status=status.HTTP_501_NOT_IMPLEMENTED)
+        output.seek(0)
+        return FileResponse(output, as_attachment=True, filename=filename, content_type=CONTENT_TYPES[file_format])
+
@@ -0,0 +1,90 @@
+"""Setting which of a team's ideas are approved, for one team or thousands at once."""
+
+from collections import defaultdict
+
+from .models import Team, Idea
+from .versioning import bump_data_version
+
+
+def apply_approvals(requested, chunk_size=1000, by_id=True):
+    """Approve exactly the listed ideas of each team and unapprove the rest.
+
+    ``requested`` maps team_id -> list of idea ids (ints) or idea titles
+    (strings); a title approves every idea of the team with that title.
+    With ``by_id=False`` only titles are accepted, as on the single-team
+    endpoint.
+    Teams left out are not touched. Call inside a transaction: every idea
+    of the listed teams is read (and locked, where the database supports
+    it) in one query, and the changes are written with at most two
+    set-based UPDATEs per ``chunk_size`` ideas. Nothing is written if any
+    entry is invalid.
+
+    Returns ``(diff, errors, changed_team_pks)``. ``diff`` maps team_id ->
+    ``{"approved": [...], "unapproved": [...], "unchanged": n}`` listing the
+    ideas whose flag flipped; ``errors`` maps team_id -> message.
+    """
+    rows = (
+        Idea.objects
+        .filter(team__team_id__in=list(requested))
+        .select_for_update(of=('self',))
+        .order_by('pk')
+        .values_list('pk', 'team_id', 'team__team_id', 'idea_title', 'approved')
+    )
+    ideas = defaultdict(dict)  # team_id -> {idea pk: (title, approved)}
+    team_pks = {}
+    for pk, team_pk, team_id, title, approved in rows:
+        ideas[team_id][pk] = (title, approved)
+        team_pks[team_id] = team_pk
+
+    errors = {}
+    missing = [team_id for team_id in requested if team_id not in ideas]
+    if missing:
+        # only teams without any idea get here; tell "no such team" apart
+        known = set(Team.objects.filter(team_id__in=missing).values_list('team_id', flat=True))
+        errors.update({team_id: "Team not found." for team_id in missing if team_id not in known})
+
+    wanted = {}
+    for team_id, items in requested.items():
+        if team_id in errors:
+            continue
+        team_ideas = ideas.get(team_id, {})
+        by_title = defaultdict(set)
+        for pk, (title, _) in team_ideas.items():
+            by_title[title].add(pk)
+        chosen, unknown = set(), []
+        for item in items:
+            if by_id and isinstance(item, int) and not isinstance(item, bool) and item in team_ideas:
+                chosen.add(item)
+            elif isinstance(item, str) and item in by_title:
+                chosen |= by_title[item]
+            else:
+                unknown.append(item)
+        if unknown:
+            errors[team_id] = f"Invalid {'ideas' if by_id else 'idea titles'} for team: {unknown}"
+        wanted[team_id] = chosen
+
+    if errors:
+        return {}, errors, []
+
+    diff = {}
+    approve, unapprove = [], []
+    for team_id, chosen in wanted.items():
+        team_ideas = ideas.get(team_id, {})
+        newly_approved = sorted(pk for pk in chosen if not team_ideas[pk][1])
+        newly_unapproved = sorted(pk for pk, (_, approved) in team_ideas.items() if approved and pk not in chosen)
+        approve += newly_approved
+        unapprove += newly_unapproved
+        diff[team_id] = {
+            "approved": [{"id": pk, "idea_title": team_ideas[pk][0]} for pk in newly_approved],
+            "unapproved": [{"id": pk, "idea_title": team_ideas[pk][0]} for pk in newly_unapproved],
+            "unchanged": len(team_ideas) - len(newly_approved) - len(newly_unapproved),
+        }
+
+    for pks, value in ((approve, True), (unapprove, False)):
+        for start in range(0, len(pks), chunk_size):
+            Idea.objects.filter(pk__in=pks[start:start + chunk_size]).update(approved=value)
+    changed = [team_pks[team_id] for team_id, change in diff.items() if change["approved"] or change["unapproved"]]
+    if changed:
+        # queryset updates skip the model signals
+        bump_data_version(Idea)
+    return diff, errors, changed
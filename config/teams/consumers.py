@@ -0,0 +1,24 @@
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+
+from .live import GROUP, snapshot
+
+
+class LeaderboardConsumer(AsyncJsonWebsocketConsumer):
+    """Streams the landing page leaderboard: one snapshot, then deltas."""
+
+    async def connect(self):
+        user = self.scope.get('user')
+        if user is None or not user.is_authenticated:
+            await self.close(code=4401)
+            return
+        # Join the group before reading the snapshot so no delta falls in between
+        await self.channel_layer.group_add(GROUP, self.channel_name)
+        await self.accept()
+        await self.send_json(await database_sync_to_async(snapshot)())
+
+    async def disconnect(self, code):
+        await self.channel_layer.group_discard(GROUP, self.channel_name)
+
+    async def leaderboard_update(self, event):
+        await self.send_json(event['message'])
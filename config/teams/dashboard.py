@@ -0,0 +1,59 @@
+"""The landing page leaderboard, shared by the HTTP endpoint and the live feed."""
+
+from django.db.models import Count, Exists, OuterRef, Prefetch, Subquery
+
+from judging.models import IdeaScoreSummary
+from .models import Team, Idea
+
+
+def landing_rows(teams=None):
+    """Return the landing page rows for ``teams`` (default: every team).
+
+    A fixed number of queries regardless of team count: one annotated team
+    query plus one prefetch for the approved idea titles. Marks come from the
+    pre-aggregated IdeaScoreSummary rows, not raw scores. Teams without a
+    primary idea are left out.
+    """
+    if teams is None:
+        teams = Team.objects.all()
+    primary_ideas = Idea.objects.filter(team=OuterRef('pk'), is_primary=True).order_by('pk')
+    primary_summary = IdeaScoreSummary.objects.filter(idea=OuterRef('primary_idea_id'))
+    idea_count = Idea.objects.filter(team=OuterRef('pk')).order_by().values('team')
+
+    teams = (
+        teams
+        .annotate(
+            primary_idea_id=Subquery(primary_ideas.values('pk')[:1]),
+            primary_ps_id=Subquery(primary_ideas.values('sih_ps_id')[:1]),
+            primary_ps_title=Subquery(primary_ideas.values('ps_title')[:1]),
+        )
+        .filter(primary_idea_id__isnull=False)
+        .annotate(
+            progress=Exists(primary_summary),
+            total_marks=Subquery(primary_summary.values('total')[:1]),
+            total_ideas=Subquery(idea_count.annotate(c=Count('pk')).values('c')),
+            approved_count=Subquery(
+                idea_count.filter(approved=True).annotate(c=Count('pk')).values('c')
+            ),
+        )
+        .prefetch_related(Prefetch(
+            'ideas',
+            queryset=Idea.objects.filter(approved=True).order_by('pk').only('team_id', 'idea_title'),
+            to_attr='approved_ideas',
+        ))
+        .order_by('pk')
+    )
+
+    return [
+        {
+            'team_id': team.team_id,
+            'team_name': team.team_name,
+            'primary_ps_id': team.primary_ps_id,
+            'primary_ps_title': team.primary_ps_title,
+            'progress': team.progress,
+            'marks': team.total_marks or 0,
+            'approved_count': f"{team.approved_count or 0}/{team.total_ideas or 0}",
+            'approved_titles': [idea.idea_title for idea in team.approved_ideas]
+        }
+        for team in teams
+    ]
@@ -0,0 +1,213 @@
+"""Near-duplicate idea detection with MinHash and locality-sensitive hashing.
+
+Each idea's title and description are normalised and cut into character
+shingles. A MinHash signature of ``NUM_PERM`` values estimates the Jaccard
+similarity of two shingle sets as the fraction of positions where the
+signatures agree. Signatures are stored in ``IdeaFingerprint`` with a hash
+of the text they came from, and computed when an idea is saved or imported;
+only new or edited text is re-hashed.
+
+Clustering splits every signature into bands. Ideas of the same problem
+statement that share any whole band become candidate pairs, so the work
+grows with the number of ideas, not the number of pairs. A candidate whose
+estimated similarity to a cluster member reaches the threshold joins that
+cluster (union-find). Pairs within a single team are ignored.
+"""
+
+import hashlib
+import re
+import zlib
+from collections import defaultdict
+
+import numpy as np
+from django.db import transaction
+
+from .models import Idea, IdeaFingerprint
+
+NUM_PERM = 128
+SHINGLE_SIZE = 5
+DEFAULT_THRESHOLD = 0.7
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = np.uint64((1 << 32) - 1)
+# Fixed seed: stored signatures must stay comparable across runs and processes
+_rng = np.random.RandomState(1)
+_A = _rng.randint(1, 1 << 32, size=NUM_PERM, dtype=np.uint64)
+_B = _rng.randint(0, 1 << 32, size=NUM_PERM, dtype=np.uint64)
+
+
+def normalise(title, description):
+    return ' '.join(re.findall(r'\w+', f'{title} {description}'.lower()))
+
+
+def content_hash(text):
+    return hashlib.sha1(text.encode()).hexdigest()
+
+
+def shingles(text):
+    if len(text) <= SHINGLE_SIZE:
+        return {text}
+    return {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+
+def minhash(text):
+    """Return the MinHash signature (``NUM_PERM`` uint32 values) of ``text``."""
+    hashes = np.fromiter((zlib.crc32(s.encode()) for s in shingles(text)), dtype=np.uint64)
+    # one universal hash per permutation, applied to every shingle at once
+    permuted = (np.outer(hashes, _A) + _B) % _MERSENNE_PRIME & _MAX_HASH
+    return permuted.min(axis=0).astype(np.uint32)
+
+
+def fingerprint_ideas(idea_ids, batch_size=1000):
+    """Compute signatures for the given ideas, where new or their text changed.
+
+    Called wherever ideas are written (``teams.signals``, the importer) so
+    the duplicates report only has to read. Returns the number re-hashed.
+    """
+    idea_ids = list(idea_ids)
+    if not idea_ids:
+        return 0
+    return _refresh(Idea.objects.filter(pk__in=idea_ids), batch_size)
+
+
+def refresh_fingerprints(batch_size=1000):
+    """Compute signatures for every idea that is new or whose text changed.
+
+    Catches up on ideas written around the save hooks (``QuerySet.update()``,
+    raw SQL). Returns the number of ideas re-hashed.
+    """
+    return _refresh(Idea.objects.all(), batch_size)
+
+
+def _refresh(ideas, batch_size):
+    rows = (
+        ideas
+        .values_list('pk', 'idea_title', 'idea_description', 'fingerprint__content_hash')
+        .order_by('pk')
+        .iterator(chunk_size=batch_size)
+    )
+    pending = []
+    refreshed = 0
+    for idea_id, title, description, stored_hash in rows:
+        text = normalise(title, description)
+        digest = content_hash(text)
+        if digest == stored_hash:
+            continue
+        pending.append(IdeaFingerprint(idea_id=idea_id, content_hash=digest, signature=minhash(text).tobytes()))
+        if len(pending) >= batch_size:
+            refreshed += _save(pending)
+            pending = []
+    return refreshed + _save(pending)
+
+
+def _save(fingerprints):
+    with transaction.atomic():
+        IdeaFingerprint.objects.bulk_create(
+            fingerprints,
+            update_conflicts=True,
+            unique_fields=['idea'],
+            update_fields=['content_hash', 'signature', 'updated_at'],
+        )
+    return len(fingerprints)
+
+
+def lsh_params(threshold, num_perm=NUM_PERM):
+    """Pick ``(bands, rows)`` whose S-curve midpoint ``(1/b)^(1/r)`` is closest to ``threshold``."""
+    options = [(b, num_perm // b) for b in range(1, num_perm + 1) if num_perm % b == 0]
+    return min(options, key=lambda br: abs((1 / br[0]) ** (1 / br[1]) - threshold))
+
+
+class _UnionFind:
+    def __init__(self):
+        self.parent = {}
+
+    def find(self, x):
+        self.parent.setdefault(x, x)
+        while self.parent[x] != x:
+            self.parent[x] = self.parent[self.parent[x]]
+            x = self.parent[x]
+        return x
+
+    def union(self, a, b):
+        self.parent[self.find(a)] = self.find(b)
+
+
+def find_duplicate_clusters(threshold=DEFAULT_THRESHOLD, sih_ps_id=None):
+    """Cluster near-duplicate ideas per problem statement.
+
+    Returns a list of ``{"sih_ps_id", "similarity", "ideas": [...]}``
+    sorted by problem statement, where ``similarity`` is the lowest
+    estimated similarity of the pairs that joined the cluster. Only reads:
+    ideas are fingerprinted when written.
+    """
+    fingerprints = IdeaFingerprint.objects.select_related('idea__team').only(
+        'signature', 'idea__sih_ps_id', 'idea__idea_title', 'idea__team__team_id',
+    )
+    if sih_ps_id is not None:
+        fingerprints = fingerprints.filter(idea__sih_ps_id=sih_ps_id)
+
+    ideas = {}
+    signatures = {}
+    for fingerprint in fingerprints:
+        ideas[fingerprint.idea_id] = fingerprint.idea
+        signatures[fingerprint.idea_id] = np.frombuffer(fingerprint.signature, dtype=np.uint32)
+
+    bands, rows = lsh_params(threshold)
+    buckets = defaultdict(list)
+    for idea_id, signature in signatures.items():
+        ps = ideas[idea_id].sih_ps_id
+        for band in range(bands):
+            buckets[(ps, band, signature[band * rows:(band + 1) * rows].tobytes())].append(idea_id)
+
+    clusters = _UnionFind()
+    weakest = {}
+    checked = set()
+    for members in buckets.values():
+        if len(members) < 2:
+            continue
+        # Compare each member with one representative per cluster already seen
+        # in this bucket rather than with every other member, so a large group
+        # of copies costs linear rather than quadratic time.
+        representatives = []
+        for idea_id in members:
+            for rep in representatives:
+                if clusters.find(rep) == clusters.find(idea_id):
+                    break
+                if (rep, idea_id) in checked or ideas[rep].team_id == ideas[idea_id].team_id:
+                    continue
+                checked.add((rep, idea_id))
+                similarity = float(np.mean(signatures[rep] == signatures[idea_id]))
+                if similarity >= threshold:
+                    clusters.union(rep, idea_id)
+                    weakest[(rep, idea_id)] = similarity
+                    break
+            else:
+                representatives.append(idea_id)
+
+    grouped = defaultdict(list)
+    for idea_id in list(clusters.parent):
+        grouped[clusters.find(idea_id)].append(idea_id)
+    lowest = defaultdict(lambda: 1.0)
+    for (a, b), similarity in weakest.items():
+        root = clusters.find(a)
+        lowest[root] = min(lowest[root], similarity)
+
+    result = []
+    for root, members in grouped.items():
+        if len(members) < 2:
+            continue
+        members.sort()
+        result.append({
+            'sih_ps_id': ideas[members[0]].sih_ps_id,
+            'similarity': round(lowest[root], 3),
+            'ideas': [
+                {
+                    'id': idea_id,
+                    'team_id': ideas[idea_id].team.team_id,
+                    'idea_title': ideas[idea_id].idea_title,
+                }
+                for idea_id in members
+            ],
+        })
+    result.sort(key=lambda cluster: (cluster['sih_ps_id'], cluster['ideas'][0]['id']))
+    return result
@@ -0,0 +1,83 @@
+"""Sparse fieldsets: ``?fields=id,idea_title`` on list and detail reads.
+
+``SparseFieldsetMixin`` (views) validates the requested names, passes them
+to the serializer through its context and narrows the queryset with
+``only()`` so unrequested columns, such as the long description texts, are
+never selected. Of the relations a viewset declares (``teams.relations``)
+only those under a requested field are kept. ``SparseFieldsetSerializerMixin``
+(serializers) drops the unrequested fields from the output.
+"""
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+
+
+class SparseFieldsetSerializerMixin:
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        requested = self.context.get('fields')
+        if requested is not None:
+            for name in set(self.fields) - set(requested):
+                self.fields.pop(name)
+
+
+class SparseFieldsetMixin:
+    fields_param = 'fields'
+
+    def get_requested_fields(self):
+        """Return the requested field names, or ``None`` when all fields are wanted."""
+        if self.request is None or self.request.method not in SAFE_METHODS:
+            return None
+        raw = self.request.query_params.get(self.fields_param)
+        if not raw:
+            return None
+        requested = list(dict.fromkeys(name.strip() for name in raw.split(',') if name.strip()))
+        available = self._all_fields()
+        unknown = [name for name in requested if name not in available]
+        if unknown:
+            raise ValidationError({self.fields_param: f"Unknown field(s): {', '.join(unknown)}"})
+        return requested
+
+    def _all_fields(self):
+        return self.get_serializer_class()().fields
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['fields'] = self.get_requested_fields()
+        return context
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        requested = self.get_requested_fields()
+        if requested is None:
+            return queryset
+
+        fields = self._all_fields()
+        columns = set()
+        related = set()
+        for name in requested:
+            path = fields[name].source.split('.')
+            model = queryset.model
+            for depth, part in enumerate(path):
+                try:
+                    field = model._meta.get_field(part)
+                except FieldDoesNotExist:
+                    # computed attribute (or source='*'); cannot tell which columns it reads
+                    return queryset
+                if depth < len(path) - 1:
+                    if not field.many_to_one and not field.one_to_one:
+                        return queryset
+                    model = field.related_model
+            if len(path) > 1:
+                related.add('__'.join(path[:-1]))
+            columns.add('__'.join(path))
+
+        # A relation declared for a field that was not requested would be
+        # deferred and traversed at once, which Django refuses.
+        queryset = queryset.select_related(None).prefetch_related(None)
+        if hasattr(self, 'with_relations'):
+            queryset = self.with_relations(queryset, roots={column.split('__')[0] for column in columns})
+        if related:
+            queryset = queryset.select_related(*related)
+        return queryset.only(*columns)
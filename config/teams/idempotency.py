@@ -0,0 +1,70 @@
+"""Idempotency keys for retried writes.
+
+A client sends ``Idempotency-Key: <unique string>`` with a write. The first
+request stores its response in ``IdempotencyKey`` inside the same
+transaction as the write, so the write and the record commit together. A
+retry with the same key and body gets the stored response back without
+touching anything; the same key with a different body is refused. Keys are
+per user and endpoint and expire after ``IDEMPOTENCY_TTL``.
+"""
+
+import hashlib
+import json
+from datetime import timedelta
+
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+IDEMPOTENCY_TTL = timedelta(hours=24)
+
+
+def request_key(request):
+    """The request's idempotency key, or None. Raises ``ValueError`` if it is unusable."""
+    key = request.headers.get(HEADER)
+    if key is None:
+        return None
+    key = key.strip()
+    if not key or len(key) > IdempotencyKey._meta.get_field('key').max_length:
+        raise ValueError(f"{HEADER} must be 1-255 characters.")
+    return key
+
+
+def request_hash(data):
+    return hashlib.sha256(json.dumps(data, sort_keys=True, separators=(',', ':'), default=str).encode()).hexdigest()
+
+
+def replay(user, scope, key, digest):
+    """The stored response for ``key`` as a ``Response``, or None if the key is new."""
+    record = (
+        IdempotencyKey.objects
+        .filter(user=user, scope=scope, key=key, created_at__gte=timezone.now() - IDEMPOTENCY_TTL)
+        .first()
+    )
+    if record is None:
+        return None
+    if record.request_hash != digest:
+        return Response(
+            {"detail": f"This {HEADER} was already used with a different request."},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+    response = Response(record.response, status=record.status_code)
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def remember(user, scope, key, digest, response):
+    """Store ``response`` for ``key``; call inside the write's transaction.
+
+    Raises ``IntegrityError`` if a concurrent request with the same key got
+    there first.
+    """
+    # expired keys are dead weight and would block reuse of the key
+    IdempotencyKey.objects.filter(created_at__lt=timezone.now() - IDEMPOTENCY_TTL).delete()
+    IdempotencyKey.objects.create(
+        user=user, scope=scope, key=key, request_hash=digest,
+        status_code=response.status_code, response=response.data,
+    )
@@ -0,0 +1,61 @@
+"""Live leaderboard updates pushed over the ``leaderboard`` channel group.
+
+Clients connect to ``ws/leaderboard/`` (see ``teams.consumers``) and get a
+``snapshot`` of every landing row, followed by a ``delta`` each time a
+score, approval or idea write commits. A delta carries the recomputed rows
+of just the teams that changed, plus the ``team_id`` of any team that
+dropped off the board, so clients never need to poll ``landing_data``.
+"""
+
+import json
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from .dashboard import landing_rows
+from .models import Team, Idea
+
+GROUP = 'leaderboard'
+
+
+def _json(rows):
+    # Render like the HTTP endpoint so both feeds agree on number formats
+    return json.loads(JSONRenderer().render(rows))
+
+
+def snapshot():
+    return {'type': 'snapshot', 'teams': _json(landing_rows())}
+
+
+def _delta(team_pks):
+    teams = Team.objects.filter(pk__in=team_pks)
+    rows = landing_rows(teams)
+    listed = {row['team_id'] for row in rows}
+    return {
+        'type': 'delta',
+        'teams': _json(rows),
+        'removed': sorted(set(teams.values_list('team_id', flat=True)) - listed),
+    }
+
+
+def _send(team_pks):
+    layer = get_channel_layer()
+    if layer is None or not team_pks:
+        return
+    async_to_sync(layer.group_send)(GROUP, {'type': 'leaderboard.update', 'message': _delta(team_pks)})
+
+
+def publish_teams(team_pks):
+    """Push the rows of the given teams to live clients once the transaction commits."""
+    team_pks = set(team_pks)
+    transaction.on_commit(lambda: _send(team_pks))
+
+
+def publish_ideas(idea_pks):
+    """Push the rows of the teams owning the given ideas once the transaction commits."""
+    idea_pks = set(idea_pks)
+    transaction.on_commit(
+        lambda: _send(set(Idea.objects.filter(pk__in=idea_pks).values_list('team_id', flat=True)))
+    )
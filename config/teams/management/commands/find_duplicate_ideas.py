@@ -0,0 +1,35 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from teams.dedup import DEFAULT_THRESHOLD, find_duplicate_clusters, refresh_fingerprints
+
+class Command(BaseCommand):
+    help = "Fingerprints new or edited ideas and reports near-duplicate clusters per problem statement"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--threshold', type=float, default=DEFAULT_THRESHOLD,
+            help='Minimum estimated Jaccard similarity (0-1) for two ideas to count as near-duplicates',
+        )
+        parser.add_argument('--ps', dest='sih_ps_id', help='Only report this problem statement ID')
+        parser.add_argument('--json', action='store_true', help='Print the clusters as JSON')
+
+    def handle(self, *args, **options):
+        threshold = options['threshold']
+        if not 0 < threshold <= 1:
+            raise CommandError('--threshold must be between 0 and 1')
+
+        refreshed = refresh_fingerprints()
+        clusters = find_duplicate_clusters(threshold, options['sih_ps_id'])
+        if options['json']:
+            self.stdout.write(json.dumps(clusters, indent=2))
+            return
+
+        self.stdout.write(f'Fingerprinted {refreshed} new or changed idea(s)')
+        for cluster in clusters:
+            self.stdout.write(
+                self.style.WARNING(f"{cluster['sih_ps_id']}: {len(cluster['ideas'])} ideas, similarity >= {cluster['similarity']}")
+            )
+            for idea in cluster['ideas']:
+                self.stdout.write(f"  [{idea['team_id']}] {idea['idea_title']} (idea {idea['id']})")
+        self.stdout.write(self.style.SUCCESS(f'{len(clusters)} near-duplicate cluster(s) found'))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from teams.models import Idea
+from teams.search import rebuild_search_index
+
+class Command(BaseCommand):
+    help = "Rebuilds the full-text search index over ideas and problem statements from the Idea table"
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            rebuild_search_index()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {Idea.objects.count()} ideas"))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from django.urls import get_resolver
+from teams.response_cache import cache_stats, reset_cache_stats
+
+class Command(BaseCommand):
+    help = (
+        "Shows response cache hits and misses per view. The counters live in the default cache, "
+        "so with the per-process locmem backend this only sees its own (empty) process"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Zero the counters after showing them')
+
+    def handle(self, *args, **options):
+        get_resolver().url_patterns  # import the views, which registers the cached ones
+        stats = cache_stats()
+        for name, counts in sorted(stats.items()):
+            total = counts['hits'] + counts['misses']
+            ratio = f"{counts['hits'] / total:.1%}" if total else '-'
+            self.stdout.write(f"{name:<32} hits {counts['hits']:>8}  misses {counts['misses']:>8}  hit ratio {ratio}")
+        if options['reset']:
+            reset_cache_stats()
+            self.stdout.write(self.style.SUCCESS("Counters reset"))
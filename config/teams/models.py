@@ -20,5 +20,63 @@ class Idea(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     approved = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['team', 'is_primary'], name='idea_team_primary_idx'),
+            models.Index(fields=['team', 'approved'], name='idea_team_approved_idx'),
+            models.Index(fields=['team', 'idea_title'], name='idea_team_title_idx'),
+            models.Index(fields=['sih_ps_id'], name='idea_ps_id_idx'),
+        ]
+        constraints = [
+            # only one primary idea per team
+            models.UniqueConstraint(
+                fields=['team'],
+                condition=models.Q(is_primary=True),
+                name='idea_one_primary_per_team',
+                violation_error_message='This team already has a primary idea.',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.idea_title} ({'Primary' if self.is_primary else 'Secondary'}) - {self.team.team_name}"
+
+class IdeaFingerprint(models.Model):
+    """MinHash signature of an idea's title and description, for near-duplicate detection."""
+
+    idea = models.OneToOneField(Idea, related_name='fingerprint', on_delete=models.CASCADE)
+    # hash of the normalised text the signature was computed from; a mismatch means re-hash
+    content_hash = models.CharField(max_length=40)
+    signature = models.BinaryField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Fingerprint of idea {self.idea_id}"
+
+class IdempotencyKey(models.Model):
+    """The response to a write made with an ``Idempotency-Key`` header, replayed on retries."""
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='+', on_delete=models.CASCADE)
+    scope = models.CharField(max_length=50)  # which endpoint the key was used on
+    key = models.CharField(max_length=255)
+    request_hash = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField()
+    response = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'scope', 'key'], name='idempotency_user_scope_key_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.scope} {self.key} by {self.user_id}"
+
+class DataVersion(models.Model):
+    """A change counter of ``teams.versioning``: the global data version or one model's generation."""
+
+    key = models.CharField(max_length=100, primary_key=True)
+    value = models.BigIntegerField()
+    modified = models.DateTimeField()
+
     def __str__(self):
-        return f"{self.idea_title} ({'Primary' if self.is_primary else 'Secondary'}) - {self.team.team_name}"
\ No newline at end of file
+        return f"{self.key} = {self.value}"
@@ -0,0 +1,14 @@
+from rest_framework.pagination import CursorPagination
+
+
+class PkCursorPagination(CursorPagination):
+    """Keyset pagination on the primary key.
+
+    Each page is a ``WHERE id > <cursor> ORDER BY id LIMIT n`` query, so it
+    costs the same on the last page as on the first and rows inserted while
+    a client pages through are never skipped or repeated.
+    """
+    ordering = 'pk'
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
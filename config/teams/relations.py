@@ -0,0 +1,40 @@
+"""Declared relations for viewsets, so listing N rows costs a fixed number of queries.
+
+A viewset names the relations its serializer reads and ``RelatedQuerysetMixin``
+applies them in ``filter_queryset()``, which every list and detail read goes
+through, so it also covers viewsets that build their own ``get_queryset()``:
+
+    class IdeaScoreViewSet(RelatedQuerysetMixin, ModelViewSet):
+        select_related_fields = ('criterion',)        # foreign keys, one JOIN
+        prefetch_related_fields = ()                  # reverse / many-to-many, one query each
+                                                      # (strings or Prefetch objects)
+
+Anything a serializer reads through a relation (``source='idea.team.team_id'``,
+a ``SlugRelatedField``, a nested serializer) belongs here; plain primary key
+fields read the ``<name>_id`` column and need nothing. With sparse fieldsets
+(see ``teams.fieldsets``) only the relations under a requested field are
+kept. ``teams.tests.ListQueryScalingTests`` fails any list endpoint whose
+query count grows with the number of rows.
+"""
+
+
+class RelatedQuerysetMixin:
+    select_related_fields = ()
+    prefetch_related_fields = ()
+
+    def filter_queryset(self, queryset):
+        return super().filter_queryset(self.with_relations(queryset))
+
+    def with_relations(self, queryset, roots=None):
+        """Apply the declared relations; with ``roots``, only those starting at one of them."""
+        select = [path for path in self.select_related_fields if roots is None or _root(path) in roots]
+        prefetch = [path for path in self.prefetch_related_fields if roots is None or _root(path) in roots]
+        if select:
+            queryset = queryset.select_related(*select)
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        return queryset
+
+
+def _root(lookup):
+    return getattr(lookup, 'prefetch_through', lookup).split('__')[0]
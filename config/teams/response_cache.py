@@ -0,0 +1,96 @@
+"""Cached responses for the read-mostly endpoints.
+
+``@cache_responses(Team, Idea)`` on a view class caches the serialized data
+of its ``list`` and ``retrieve`` actions (or ``get``, for a plain
+``APIView``) in the ``responses`` cache. The key holds:
+
+* the view and action;
+* the user's role, since judges and admins may be shown different data;
+* the generation of every model the response is built from (see
+  ``teams.versioning.data_generations``), so a write to one of them makes
+  the old entries unreachable and a write to anything else leaves them be;
+* the absolute URL and ``Accept`` header.
+
+Hits and misses are counted per view and action in the default cache; see
+``manage.py response_cache_stats``. Responses carry ``X-Cache: HIT`` or
+``MISS``. Put ``cache_responses`` below ``DATA_VERSION_CONDITIONS`` so
+conditional requests are answered with 304 before the cache is consulted.
+"""
+
+import functools
+import hashlib
+
+from django.core.cache import cache, caches
+from rest_framework.response import Response
+
+from .versioning import data_generations, may_be_stale
+
+RESPONSE_CACHE = 'responses'
+STATS_KEY = 'teams:responses:stats:{}:{}'
+
+# "ViewClass.action" of every cached action, for the stats report
+CACHED_VIEWS = []
+
+
+def cache_responses(*models, methods=('list', 'retrieve')):
+    """Class decorator caching ``methods`` of a view whose output depends on ``models`` only."""
+    def decorate(view_class):
+        for method in methods:
+            name = f'{view_class.__name__}.{method}'
+            setattr(view_class, method, _cached(getattr(view_class, method), name, models))
+            CACHED_VIEWS.append(name)
+        return view_class
+    return decorate
+
+
+def _cached(method, name, models):
+    @functools.wraps(method)
+    def wrapper(view, request, *args, **kwargs):
+        generations, modified = data_generations(models)
+        role = getattr(request.user, 'role', None) or 'anonymous'
+        fingerprint = f"{generations}|{request.build_absolute_uri()}|{request.META.get('HTTP_ACCEPT', '')}"
+        key = f'{name}:{role}:{hashlib.md5(fingerprint.encode()).hexdigest()}'
+        responses = caches[RESPONSE_CACHE]
+
+        entry = responses.get(key)
+        if entry is not None:
+            _count(name, 'hit')
+            status_code, data = entry
+            response = Response(data, status=status_code)
+            response['X-Cache'] = 'HIT'
+            return response
+
+        _count(name, 'miss')
+        response = method(view, request, *args, **kwargs)
+        # a replica that has not caught up would store old rows under the new generations
+        if response.status_code == 200 and not may_be_stale(modified):
+            responses.set(key, (response.status_code, response.data))
+        response['X-Cache'] = 'MISS'
+        return response
+    return wrapper
+
+
+def _count(name, outcome):
+    key = STATS_KEY.format(name, outcome)
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, None):
+            cache.incr(key)
+
+
+def cache_stats():
+    """``{"View.action": {"hits": n, "misses": n}}`` for every cached action."""
+    keys = {(name, outcome): STATS_KEY.format(name, outcome) for name in CACHED_VIEWS for outcome in ('hit', 'miss')}
+    counts = cache.get_many(keys.values())
+    return {
+        name: {
+            'hits': counts.get(keys[name, 'hit'], 0),
+            'misses': counts.get(keys[name, 'miss'], 0),
+        }
+        for name in CACHED_VIEWS
+    }
+
+
+def reset_cache_stats():
+    cache.delete_many([STATS_KEY.format(name, outcome) for name in CACHED_VIEWS for outcome in ('hit', 'miss')])
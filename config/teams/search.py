@@ -0,0 +1,200 @@
+"""Full-text search over idea and problem statement titles and descriptions.
+
+The index lives in a side table next to ``teams_idea``, created after
+``migrate``: an FTS5 virtual table on SQLite, or a ``tsvector`` column with
+a GIN index on PostgreSQL. Titles weigh more than descriptions in the
+ranking. ``teams.signals`` keeps the index in step with single-row saves
+and deletes, the importer indexes the ideas each chunk touches, and
+``rebuild_search_index`` rebuilds it from scratch.
+
+Both backends match every word of the query, stemmed, and the last word
+also as a prefix, so results fill in while the user is still typing.
+"""
+
+import re
+
+from django.db import connections, router
+from django.utils.html import escape
+
+from .models import Idea
+
+MARK_START = '<mark>'
+MARK_END = '</mark>'
+# The database wraps matches in these private-use characters rather than the
+# tags, so the text can be HTML-escaped before they become <mark>.
+MATCH_START = '\ue000'
+MATCH_END = '\ue001'
+
+
+class SQLiteSearch:
+    table = 'teams_idea_fts'
+    # bm25 column weights: idea title, PS title, idea description, PS description
+    weights = (10.0, 5.0, 2.0, 1.0)
+    # ids per statement, well under SQLite's bound-parameter limit
+    chunk_size = 500
+
+    def create(self, cursor):
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} USING fts5("
+            "idea_title, ps_title, idea_description, ps_description, tokenize='porter unicode61')"
+        )
+
+    def _chunks(self, idea_ids):
+        for start in range(0, len(idea_ids), self.chunk_size):
+            chunk = idea_ids[start:start + self.chunk_size]
+            yield chunk, ', '.join(['%s'] * len(chunk))
+
+    def index(self, cursor, idea_ids):
+        for chunk, placeholders in self._chunks(idea_ids):
+            cursor.execute(f'DELETE FROM {self.table} WHERE rowid IN ({placeholders})', chunk)
+            cursor.execute(
+                f'INSERT INTO {self.table} (rowid, idea_title, ps_title, idea_description, ps_description) '
+                f'SELECT id, idea_title, ps_title, idea_description, ps_description FROM teams_idea '
+                f'WHERE id IN ({placeholders})',
+                chunk,
+            )
+
+    def unindex(self, cursor, idea_ids):
+        for chunk, placeholders in self._chunks(idea_ids):
+            cursor.execute(f'DELETE FROM {self.table} WHERE rowid IN ({placeholders})', chunk)
+
+    def rebuild(self, cursor):
+        cursor.execute(f'DELETE FROM {self.table}')
+        cursor.execute(
+            f'INSERT INTO {self.table} (rowid, idea_title, ps_title, idea_description, ps_description) '
+            f'SELECT id, idea_title, ps_title, idea_description, ps_description FROM teams_idea'
+        )
+
+    def search(self, cursor, terms, limit):
+        # Quote every term so user input is never parsed as FTS5 query syntax;
+        # the last one also matches as a prefix for search-as-you-type.
+        match = ' '.join(f'"{term}"' for term in terms[:-1])
+        match += f' "{terms[-1]}"*'
+        cursor.execute(
+            f'SELECT rowid, -bm25({self.table}, %s, %s, %s, %s) AS rank, '
+            f"highlight({self.table}, 0, %s, %s), "
+            f"snippet({self.table}, -1, %s, %s, '…', 16) "
+            f'FROM {self.table} WHERE {self.table} MATCH %s ORDER BY rank DESC, rowid LIMIT %s',
+            [*self.weights, MATCH_START, MATCH_END, MATCH_START, MATCH_END, match, limit],
+        )
+        return cursor.fetchall()
+
+
+class PostgresSearch:
+    table = 'teams_idea_search'
+    document = (
+        "setweight(to_tsvector('english', coalesce(idea_title, '')), 'A') || "
+        "setweight(to_tsvector('english', coalesce(ps_title, '')), 'B') || "
+        "setweight(to_tsvector('english', coalesce(idea_description, '')), 'C') || "
+        "setweight(to_tsvector('english', coalesce(ps_description, '')), 'D')"
+    )
+
+    def create(self, cursor):
+        cursor.execute(
+            f'CREATE TABLE IF NOT EXISTS {self.table} ('
+            # no foreign key, so flush can still TRUNCATE teams_idea; the
+            # search joins teams_idea, which drops any orphaned rows
+            'idea_id bigint PRIMARY KEY, '
+            'document tsvector NOT NULL)'
+        )
+        cursor.execute(f'CREATE INDEX IF NOT EXISTS {self.table}_document_gin ON {self.table} USING GIN (document)')
+
+    def index(self, cursor, idea_ids):
+        cursor.execute(
+            f'INSERT INTO {self.table} (idea_id, document) '
+            f'SELECT id, {self.document} FROM teams_idea WHERE id = ANY(%s) '
+            'ON CONFLICT (idea_id) DO UPDATE SET document = EXCLUDED.document',
+            [list(idea_ids)],
+        )
+
+    def unindex(self, cursor, idea_ids):
+        cursor.execute(f'DELETE FROM {self.table} WHERE idea_id = ANY(%s)', [list(idea_ids)])
+
+    def rebuild(self, cursor):
+        cursor.execute(f'TRUNCATE {self.table}')
+        cursor.execute(f'INSERT INTO {self.table} (idea_id, document) SELECT id, {self.document} FROM teams_idea')
+
+    def search(self, cursor, terms, limit):
+        # search_terms() leaves only word characters, none of which is
+        # tsquery syntax; ':*' makes the last term a prefix, as on SQLite
+        query = ' & '.join([*terms[:-1], f'{terms[-1]}:*'])
+        options = f'StartSel={MATCH_START}, StopSel={MATCH_END}, MaxFragments=2, MaxWords=20, MinWords=5'
+        cursor.execute(
+            f'SELECT i.id, ts_rank(s.document, q) AS rank, '
+            f"ts_headline('english', i.idea_title, q, %s), "
+            f"ts_headline('english', i.idea_description || ' ' || i.ps_description, q, %s) "
+            f'FROM {self.table} s JOIN teams_idea i ON i.id = s.idea_id, '
+            f"to_tsquery('english', %s) q "
+            f'WHERE s.document @@ q ORDER BY rank DESC, i.id LIMIT %s',
+            [options, options, query, limit],
+        )
+        return cursor.fetchall()
+
+
+BACKENDS = {
+    'sqlite': SQLiteSearch(),
+    'postgresql': PostgresSearch(),
+}
+
+
+def _backend(connection):
+    try:
+        return BACKENDS[connection.vendor]
+    except KeyError:
+        raise NotImplementedError(f'Full-text search is not supported on {connection.vendor}')
+
+
+def create_search_index(using='default', **kwargs):
+    """Create the index table if it is missing; connected to ``post_migrate``."""
+    connection = connections[using]
+    if connection.vendor in BACKENDS:
+        with connection.cursor() as cursor:
+            _backend(connection).create(cursor)
+
+
+def index_ideas(idea_ids):
+    """(Re)index the given ideas from their current rows."""
+    idea_ids = list(idea_ids)
+    if idea_ids:
+        connection = connections[router.db_for_write(Idea)]
+        with connection.cursor() as cursor:
+            _backend(connection).index(cursor, idea_ids)
+
+
+def unindex_ideas(idea_ids):
+    idea_ids = list(idea_ids)
+    if idea_ids:
+        connection = connections[router.db_for_write(Idea)]
+        with connection.cursor() as cursor:
+            _backend(connection).unindex(cursor, idea_ids)
+
+
+def rebuild_search_index():
+    connection = connections[router.db_for_write(Idea)]
+    with connection.cursor() as cursor:
+        _backend(connection).create(cursor)
+        _backend(connection).rebuild(cursor)
+
+
+def search_terms(query):
+    return re.findall(r'\w+', query or '')
+
+
+def search_ideas(query, limit=20):
+    """Return ``[(idea_id, rank, highlighted title, snippet)]``, best match first.
+
+    Every word of ``query`` must match. The title and snippet are
+    HTML-escaped, with the matches wrapped in ``<mark>`` tags, so they can be
+    inserted as markup.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return []
+    connection = connections[router.db_for_read(Idea)]
+    with connection.cursor() as cursor:
+        rows = _backend(connection).search(cursor, terms, limit)
+    return [(idea_id, rank, _marked(title), _marked(snippet)) for idea_id, rank, title, snippet in rows]
+
+
+def _marked(text):
+    return escape(text or '').replace(MATCH_START, MARK_START).replace(MATCH_END, MARK_END)
@@ -1,12 +1,13 @@
 from rest_framework import serializers
+from .fieldsets import SparseFieldsetSerializerMixin
 from .models import Team, Idea
 
-class TeamSerializer(serializers.ModelSerializer):
+class TeamSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Team
         fields = ['id', 'team_id', 'team_name', 'created_at']
 
-class IdeaSerializer(serializers.ModelSerializer):
+class IdeaSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Idea
         fields = [
@@ -17,6 +18,5 @@ class IdeaSerializer(serializers.ModelSerializer):
             'ps_description',
             'idea_title',
             'idea_description',
-            'link',
             'created_at',
         ]
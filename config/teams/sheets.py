@@ -0,0 +1,576 @@
+"""Reading and normalising import sheets, kept free of Django ORM imports.
+
+Sheets are streamed row by row from XLSX (openpyxl read-only mode) or CSV, so
+memory stays flat however large the file is. Each header row is mapped once
+onto canonical column names by ``RowNormalizer``, and every row is turned
+into a plain tuple by one of the ``parse_*_row`` helpers.
+
+Because nothing here touches the database, these functions are safe to run
+in worker processes. ``parse_part`` parses one byte-range slice of a large
+sheet so several processes can share a sheet; see ``plan_parts``.
+"""
+
+import csv
+import functools
+import io
+import math
+import multiprocessing
+import re
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+from xml.etree import ElementTree
+
+from openpyxl import load_workbook
+from openpyxl.reader.excel import ExcelReader
+from openpyxl.styles.stylesheet import apply_stylesheet
+from openpyxl.utils.datetime import from_excel, from_ISO8601
+
+FALSE_STRINGS = {'', '0', 'false', 'no', 'n', 'none', 'nan'}
+
+
+def truthy(value):
+    """Interpret spreadsheet booleans, including the strings CSV exports produce."""
+    if isinstance(value, str):
+        return value.strip().lower() not in FALSE_STRINGS
+    return bool(value)
+
+
+# -- Column names ------------------------------------------------------------
+#
+# Canonical column name -> accepted header variants, in order of preference.
+
+USER_COLUMNS = {
+    'username': ('username', 'email'),
+    'email': ('email',),
+    'role': ('role',),
+    'password': ('password',),
+}
+
+TEAM_COLUMNS = {
+    'team_id': ('team_id', 'Team ID'),
+    'team_name': ('team_name', 'Team Name'),
+    'primary_sih_ps_id': ('primary_sih_ps_id', 'primary_ps_id', 'sih_ps_id', 'PS ID'),
+    'primary_ps_title': ('primary_ps_title', 'primary_ps_name', 'PS Title'),
+    'primary_ps_description': ('primary_ps_description', 'primary_ps_desc'),
+    'primary_idea_title': ('primary_idea_title', 'primary_idea', 'primary idea'),
+    'primary_idea_description': ('primary_idea_description', 'primary_idea_desc'),
+}
+# Up to 4 extra ideas, in columns with suffixes 1..4
+for i in range(1, 5):
+    TEAM_COLUMNS.update({
+        f'idea{i}_title': (f'idea{i}_title', f'idea_{i}_title', f'extra{i}_idea_title', f'idea{i} title'),
+        f'idea{i}_description': (f'idea{i}_description', f'idea_{i}_description', f'extra{i}_idea_description'),
+        f'idea{i}_ps_title': (f'idea{i}_ps_title', f'extra{i}_ps_title'),
+        f'idea{i}_ps_description': (f'idea{i}_ps_description', f'extra{i}_ps_description'),
+    })
+
+IDEA_COLUMNS = {
+    'team_id': ('team_id', 'Team ID'),
+    'idea_title': ('idea_title', 'Idea Title'),
+    'sih_ps_id': ('sih_ps_id', 'PS ID'),
+    'ps_title': ('ps_title', 'PS Title'),
+    'ps_description': ('ps_description', 'PS Description'),
+    'idea_description': ('idea_description', 'Idea Description'),
+    'is_primary': ('is_primary', 'primary'),
+    'approved': ('approved',),
+}
+
+SCORE_COLUMNS = {
+    'team_id': ('team_id', 'Team ID'),
+    'idea_title': ('idea_title', 'Idea Title'),
+    'criterion': ('criterion', 'rubric'),
+    'judge': ('judge', 'judge_username'),
+    'score': ('score',),
+    'comments': ('comments',),
+}
+
+
+class RowNormalizer:
+    """Maps raw row values onto canonical column names using a sheet's header row.
+
+    The header is resolved once, so per row only the wanted cells are read.
+    The first non-blank variant wins, and values come back as stripped strings.
+    Unknown columns are dropped.
+    """
+
+    def __init__(self, header, columns):
+        positions = {}
+        for index, name in enumerate(header):
+            if name is not None:
+                positions.setdefault(str(name).strip(), index)
+        self.lookup = []
+        for canonical, variants in columns.items():
+            indexes = [positions[v] for v in variants if v in positions]
+            if indexes:
+                self.lookup.append((canonical, indexes))
+
+    def __call__(self, values):
+        row = {}
+        size = len(values)
+        for canonical, indexes in self.lookup:
+            for index in indexes:
+                value = values[index] if index < size else None
+                # ``value != value`` catches NaN from numeric spreadsheet cells
+                if value is None or value != value:
+                    continue
+                value = str(value).strip()
+                if value:
+                    row[canonical] = value
+                    break
+        return row
+
+
+# -- Row parsers -------------------------------------------------------------
+#
+# Each takes a normalised row dict and returns a plain tuple, or None when the
+# row should be skipped. Idea records are tuples of
+#   (idea_title, sih_ps_id, ps_title, ps_description, idea_description, is_primary, approved)
+# where ``approved`` is None when the sheet does not say, leaving it untouched.
+
+def parse_user_row(row):
+    username = row.get('username')
+    if not username:
+        return None
+    return (username, row.get('email', ''), row.get('role', 'judge'), row.get('password', 'changeme123'))
+
+
+def parse_team_row(row):
+    team_id = row.get('team_id')
+    if not team_id:
+        return None
+    team_name = row.get('team_name') or team_id
+    ideas = []
+
+    primary_sih = row.get('primary_sih_ps_id')
+    primary_ps_title = row.get('primary_ps_title')
+    primary_idea_title = row.get('primary_idea_title')
+    primary_idea_desc = row.get('primary_idea_description')
+    # links intentionally ignored
+
+    if primary_idea_title or primary_idea_desc or primary_sih or primary_ps_title:
+        ideas.append((
+            primary_idea_title or f"Primary idea for {team_id}",
+            primary_sih or '',
+            primary_ps_title or '',
+            row.get('primary_ps_description', ''),
+            primary_idea_desc or '',
+            True,
+            None,
+        ))
+
+    for i in range(1, 5):
+        idea_title = row.get(f'idea{i}_title')
+        idea_desc = row.get(f'idea{i}_description')
+        ps_title = row.get(f'idea{i}_ps_title')
+        if idea_title or idea_desc or ps_title:
+            ideas.append((
+                idea_title or f"Idea {i} for {team_id}",
+                primary_sih or '',
+                ps_title or '',
+                row.get(f'idea{i}_ps_description', ''),
+                idea_desc or '',
+                False,
+                None,
+            ))
+
+    return (team_id, team_name, tuple(ideas))
+
+
+def parse_idea_row(row):
+    team_id = row.get('team_id')
+    if not team_id:
+        return None
+    idea = (
+        row.get('idea_title', ''),
+        row.get('sih_ps_id', ''),
+        row.get('ps_title', ''),
+        row.get('ps_description', ''),
+        row.get('idea_description', ''),
+        truthy(row.get('is_primary', '')),
+        truthy(row.get('approved', '')),
+    )
+    # Ideas sheet rows never create teams, hence no team name
+    return (team_id, None, (idea,))
+
+
+def parse_score_row(row):
+    team_id = row.get('team_id')
+    idea_title = row.get('idea_title')
+    criterion_name = row.get('criterion')
+    judge_username = row.get('judge')
+    score = row.get('score')
+    if not (team_id and idea_title and criterion_name and judge_username and score is not None):
+        return None
+    try:
+        score = Decimal(score).quantize(Decimal('0.01'))
+    except InvalidOperation:
+        return None
+    return (team_id, idea_title, criterion_name, judge_username, score, row.get('comments', ''))
+
+
+# Sheets in the order they must be written: (sheet, accepted sheet names, columns, parser)
+SHEETS = [
+    ('Users', ('Users',), USER_COLUMNS, parse_user_row),
+    ('Teams', ('Teams',), TEAM_COLUMNS, parse_team_row),
+    ('Ideas', ('Ideas',), IDEA_COLUMNS, parse_idea_row),
+    ('IdeaScores', ('IdeaScores', 'Scores'), SCORE_COLUMNS, parse_score_row),
+]
+
+
+# -- Readers -----------------------------------------------------------------
+#
+# Readers yield raw value sequences; the first one is the header row.
+
+def xlsx_sheet_names(path):
+    workbook = load_workbook(path, read_only=True)
+    try:
+        return workbook.sheetnames
+    finally:
+        workbook.close()
+
+
+def iter_xlsx_values(path, sheet_name):
+    """Stream a worksheet's rows without loading the workbook into memory."""
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        yield from workbook[sheet_name].iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+def iter_csv_values(path):
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        yield from csv.reader(f)
+
+
+def iter_records(values, columns, parse):
+    """Turn a stream of raw value rows (header first) into parsed records."""
+    values = iter(values)
+    header = next(values, None)
+    if header is None:
+        return
+    normalize = RowNormalizer(header, columns)
+    for row in values:
+        yield parse(normalize(row))
+
+
+# -- Parallel parsing --------------------------------------------------------
+#
+# A large sheet is cut into parts by byte offset: a CSV part runs between two
+# record-aligned line breaks, an XLSX part holds the <row> elements whose
+# opening tag falls in its range of the decompressed sheet XML. The main
+# process finds every boundary in a single pass over the sheet: a CSV worker
+# is handed its byte range, an XLSX worker the bytes of its rows (as the
+# sheet is compressed, only the reader that inflates it can cut it). Each
+# worker then only converts the rows of its part instead of replaying the
+# whole sheet through openpyxl.
+
+PART_BYTES = 8 * 1024 * 1024
+BLOCK_BYTES = 1024 * 1024
+
+SHEET_SPECS = {sheet: (columns, parse) for sheet, _, columns, parse in SHEETS}
+
+XLSX_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+RELATIONSHIP_ID = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id'
+TEXT_TAG = f'{XLSX_NS}t'
+RUN_TAG = f'{XLSX_NS}r'
+ROOT_TAG_RE = re.compile(rb'<worksheet\b[^>]*>')
+
+
+def plan_parts(path, file_format, sheet, sheet_name, workers):
+    """Split one sheet into ``parse_part`` argument tuples.
+
+    Returns ``(parts, tasks)``; ``tasks`` is an iterator, read as the pool
+    takes them. Small sheets, and XLSX files this module cannot slice
+    safely, become a single part that is streamed with the regular readers.
+    """
+    single = (1, iter([(sheet, path, file_format, sheet_name, 0, 1, None, None)]))
+    if workers <= 1:
+        return single
+
+    if file_format == 'csv':
+        with open(path, 'rb') as f:
+            size = f.seek(0, io.SEEK_END)
+        header = next(iter_csv_values(path), None)
+    else:
+        with zipfile.ZipFile(path) as archive:
+            member = _xlsx_member(archive, sheet_name)
+            size = archive.getinfo(member).file_size
+            with archive.open(member) as stream:
+                head = stream.read(BLOCK_BYTES)
+            if ROOT_TAG_RE.search(head) is None:
+                # prefixed namespaces or an unusual layout: let openpyxl handle it
+                return single
+        header = next(iter_xlsx_values(path, sheet_name), None)
+
+    parts = max(workers, math.ceil(size / PART_BYTES))
+    if size < PART_BYTES or header is None:
+        return single
+    sources = _csv_part_ranges(path, size, parts) if file_format == 'csv' else _xlsx_part_bodies(path, member, size, parts)
+    return parts, (
+        (sheet, path, file_format, sheet_name, part, parts, tuple(header), source)
+        for part, source in enumerate(sources)
+    )
+
+
+def parse_part(sheet, path, file_format, sheet_name, part, parts, header, source):
+    """Parse one part of a sheet into a list of plain record tuples (run in a worker).
+
+    ``source`` is the part's ``(start, end)`` byte range of a CSV file, or
+    the sheet's root tag and the raw bytes of the part's XLSX rows.
+    """
+    columns, parse = SHEET_SPECS[sheet]
+    if parts == 1:
+        values = iter_csv_values(path) if file_format == 'csv' else iter_xlsx_values(path, sheet_name)
+        return list(iter_records(values, columns, parse))
+
+    if file_format == 'csv':
+        rows = _csv_part_rows(path, *source)
+    else:
+        root_tag, body = source
+        rows = _xlsx_rows(body, root_tag, _xlsx_context(path))
+    if part == 0:
+        rows = rows[1:]  # the header row
+
+    normalize = RowNormalizer(header, columns)
+    return [parse(normalize(row)) for row in rows]
+
+
+def parse_in_parallel(tasks, workers, window=None):
+    """Run ``parse_part`` over ``tasks`` in a process pool, yielding each result in task order.
+
+    At most ``window`` parts are parsed ahead of the consumer, which keeps
+    memory bounded while the main process writes earlier parts. Workers are
+    spawned rather than forked so they never share the parent's database
+    connections.
+    """
+    window = window or workers * 2
+    tasks = iter(tasks)
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+        pending = deque(executor.submit(parse_part, *task) for task in islice(tasks, window))
+        while pending:
+            records = pending.popleft().result()
+            for task in islice(tasks, 1):
+                pending.append(executor.submit(parse_part, *task))
+            yield records
+
+
+def _csv_boundaries(f, size, parts):
+    """The offset each part after the first starts at, found in one pass over ``f``.
+
+    Part ``k`` starts at the first record boundary at or after
+    ``size * k // parts``. A line break ends a record only when an even
+    number of quote characters precede it; quoted fields may contain line
+    breaks of their own.
+    """
+    targets = [size * part // parts for part in range(1, parts)]
+    boundaries = []
+    f.seek(0)
+    quotes = 0
+    offset = 0  # absolute position of block[0]
+    while len(boundaries) < len(targets):
+        block = f.read(BLOCK_BYTES)
+        if not block:
+            break
+        counted = 0  # quotes in block[:counted] are in ``quotes``
+        while len(boundaries) < len(targets):
+            newline = block.find(b'\n', max(targets[len(boundaries)] - offset, counted))
+            if newline == -1:
+                break
+            quotes += block.count(b'"', counted, newline + 1)
+            counted = newline + 1
+            if quotes % 2 == 0:
+                # every target before this boundary starts its part here
+                while len(boundaries) < len(targets) and targets[len(boundaries)] <= newline + offset:
+                    boundaries.append(offset + newline + 1)
+        quotes += block.count(b'"', counted)
+        offset += len(block)
+    return boundaries + [size] * (len(targets) - len(boundaries))
+
+
+def _csv_part_ranges(path, size, parts):
+    with open(path, 'rb') as f:
+        bounds = [0, *_csv_boundaries(f, size, parts), size]
+    return list(zip(bounds, bounds[1:]))
+
+
+def _csv_part_rows(path, start, end):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start).decode('utf-8-sig' if start == 0 else 'utf-8')
+    return list(csv.reader(io.StringIO(data, newline='')))
+
+
+def _xlsx_member(archive, sheet_name):
+    """Path of a worksheet's XML inside the XLSX archive."""
+    workbook = ElementTree.fromstring(archive.read('xl/workbook.xml'))
+    relationships = ElementTree.fromstring(archive.read('xl/_rels/workbook.xml.rels'))
+    targets = {rel.get('Id'): rel.get('Target') for rel in relationships}
+    for node in workbook.iter(f'{XLSX_NS}sheet'):
+        if node.get('name') == sheet_name:
+            target = targets[node.get(RELATIONSHIP_ID)]
+            return target.lstrip('/') if target.startswith('/') else f'xl/{target}'
+    raise KeyError(f'Worksheet {sheet_name!r} not found')
+
+
+@functools.lru_cache(maxsize=4)
+def _xlsx_context(path):
+    """The shared strings, the date epoch and the date and duration styles, once per worker process.
+
+    Read by openpyxl's own workbook reader, short of the worksheets, so
+    ``_cell_value`` converts a part's cells as ``iter_xlsx_values`` would.
+    """
+    reader = ExcelReader(path, read_only=True, data_only=True)
+    try:
+        reader.read_manifest()
+        reader.read_strings()
+        reader.read_workbook()
+        apply_stylesheet(reader.archive, reader.wb)
+    finally:
+        reader.archive.close()
+    return {
+        'shared_strings': reader.shared_strings,
+        'epoch': reader.wb.epoch,
+        'date_formats': reader.wb._date_formats,
+        'timedelta_formats': reader.wb._timedelta_formats,
+    }
+
+
+def _find_row_tag(data, start):
+    """Index of the next ``<row`` opening tag at or after ``start``, else -1."""
+    while True:
+        index = data.find(b'<row', start)
+        if index == -1 or index + 4 >= len(data):
+            return -1
+        if data[index + 4:index + 5] in (b' ', b'>'):
+            return index
+        start = index + 4
+
+
+def _xlsx_part_bodies(path, member, size, parts):
+    """Yield ``(root tag, row bytes)`` for each part, decompressing the sheet once.
+
+    Part ``k`` holds the <row> elements from the first whose opening tag
+    starts at or after ``size * k // parts`` up to the next part's first.
+    A compressed member cannot be entered at an offset, so the rows are cut
+    out here rather than by each worker; the buffer holds about one part.
+    """
+    with zipfile.ZipFile(path) as archive, archive.open(member) as stream:
+        scanner = _RowScanner(stream)
+        root_tag = ROOT_TAG_RE.search(scanner.head()).group(0)
+        start = scanner.next_row(0)
+        for part in range(1, parts + 1):
+            end = scanner.next_row(size * part // parts) if part < parts else scanner.rows_end()
+            yield root_tag, scanner.take(start, end)
+            start = end
+
+
+class _RowScanner:
+    """Finds <row> tags in a sheet's XML stream, keeping only the bytes not yet taken."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.buffer = b''
+        self.offset = 0  # absolute position of buffer[0]
+        self.end = None  # absolute position of </sheetData> (or the end of the stream) once seen
+
+    def _read(self):
+        block = self.stream.read(BLOCK_BYTES)
+        if not block:
+            self.end = self.offset + len(self.buffer)
+            return
+        searched = max(len(self.buffer) - len(b'</sheetData>'), 0)
+        self.buffer += block
+        stop = self.buffer.find(b'</sheetData>', searched)
+        if stop != -1:
+            self.end = self.offset + stop
+
+    def head(self):
+        if not self.buffer and self.end is None:
+            self._read()
+        return self.buffer
+
+    def next_row(self, target):
+        """Position of the first row tag at or after ``target``, else of the end of the rows."""
+        while True:
+            found = _find_row_tag(self.buffer, max(target - self.offset, 0))
+            if found != -1 and (self.end is None or self.offset + found < self.end):
+                return self.offset + found
+            if self.end is not None:
+                return self.end
+            self._read()
+
+    def rows_end(self):
+        while self.end is None:
+            self._read()
+        return self.end
+
+    def take(self, start, end):
+        """The bytes in [start, end); everything before ``end`` is dropped."""
+        data = self.buffer[start - self.offset:end - self.offset]
+        self.buffer = self.buffer[end - self.offset:]
+        self.offset = end
+        return data
+
+
+def _column_index(reference):
+    index = 0
+    for char in reference:
+        if char.isdigit():
+            break
+        index = index * 26 + ord(char.upper()) - 64
+    return index - 1
+
+
+def _cell_value(cell, context):
+    """One cell's value, converted the way openpyxl's worksheet reader does it."""
+    kind = cell.get('t', 'n')
+    if kind == 'inlineStr':
+        node = cell.find(f'{XLSX_NS}is')
+        if node is None:
+            return None
+        # the plain text, then the rich text runs; phonetic hints (rPh) are left out
+        texts = [child.text or '' for child in node if child.tag == TEXT_TAG]
+        texts += [t.text or '' for run in node if run.tag == RUN_TAG for t in run if t.tag == TEXT_TAG]
+        return ''.join(texts)
+    text = cell.findtext(f'{XLSX_NS}v')
+    if not text:
+        return None
+    if kind == 'n':
+        value = float(text) if '.' in text or 'E' in text or 'e' in text else int(text)
+        style = int(cell.get('s', 0))
+        if style in context['date_formats']:
+            try:
+                return from_excel(value, context['epoch'], timedelta=style in context['timedelta_formats'])
+            except (OverflowError, ValueError):
+                return '#VALUE!'
+        return value
+    if kind == 's':
+        return context['shared_strings'][int(text)]
+    if kind == 'b':
+        return bool(int(text))
+    if kind == 'd':
+        return from_ISO8601(text)
+    return text
+
+
+def _xlsx_rows(body, root_tag, context):
+    """Convert a run of <row> elements into lists of cell values."""
+    if not body:
+        return []
+    document = ElementTree.fromstring(root_tag + b'<sheetData>' + body + b'</sheetData></worksheet>')
+    rows = []
+    for row in document.iter(f'{XLSX_NS}row'):
+        values = []
+        for position, cell in enumerate(row):
+            reference = cell.get('r')
+            index = _column_index(reference) if reference else position
+            if index >= len(values):
+                values.extend([None] * (index + 1 - len(values)))
+            values[index] = _cell_value(cell, context)
+        rows.append(values)
+    return rows
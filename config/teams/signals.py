@@ -0,0 +1,27 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from judging.models import IdeaScore, RubricCriterion
+from .dedup import fingerprint_ideas
+from .models import Team, Idea
+from .search import index_ideas, unindex_ideas
+from .versioning import bump_data_version
+
+
+@receiver([post_save, post_delete], sender=Team)
+@receiver([post_save, post_delete], sender=Idea)
+@receiver([post_save, post_delete], sender=IdeaScore)
+@receiver([post_save, post_delete], sender=RubricCriterion)
+def data_changed(sender, **kwargs):
+    bump_data_version(sender)
+
+
+@receiver(post_save, sender=Idea)
+def idea_saved(sender, instance, **kwargs):
+    index_ideas([instance.pk])
+    fingerprint_ideas([instance.pk])
+
+
+@receiver(post_delete, sender=Idea)
+def idea_deleted(sender, instance, **kwargs):
+    unindex_ideas([instance.pk])
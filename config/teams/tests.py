@@ -1,3 +1,487 @@
-from django.test import TestCase
+import datetime
+import os
+import random
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.core.cache import cache, caches
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from openpyxl import Workbook
+from django.urls import URLPattern, URLResolver, get_resolver
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.middleware import JWTAuthMiddleware
+from accounts.models import User
+from judging.assignments import assign_judges
+from judging.models import IdeaScore, JudgeConflict, RubricCriterion
+from judging.rubrics import get_rubric
+from judging.summaries import rebuild_all_summaries
+from .fieldsets import SparseFieldsetMixin
+from .models import Team, Idea
+from .pagination import PkCursorPagination
+from .routing import websocket_urlpatterns
+from .search import index_ideas
+from .sheets import SCORE_COLUMNS, iter_records, iter_xlsx_values, parse_part, parse_score_row, plan_parts
+from .versioning import bump_data_version
+
+# query strings worth a run of their own, besides the bare endpoint
+VARIANTS = {
+    '/api/ideas/search/': ['q=idea'],
+    '/api/judging/scores/': ['assigned=me'],
+    '/api/landing/landing_data/': ['assigned=me'],
+}
+
+
+class SeededTestCase(TestCase):
+    """An admin, ``JUDGES`` judges and the rubric; ``add_teams`` adds scored, assigned teams."""
+
+    JUDGES = 4
+
+    def setUp(self):
+        # the version stamps and cached responses outlive the rolled-back rows of other tests
+        cache.clear()
+        caches['responses'].clear()
+        call_command('seed_rubrics', stdout=open(os.devnull, 'w'))
+        self.rnd = random.Random(1)
+        self.admin = User.objects.create_user('admin', role='admin')
+        self.judges = [User.objects.create_user(f'judge-{n}', role='judge') for n in range(self.JUDGES)]
+        self.team_count = 0
+
+    def add_teams(self, count):
+        """``count`` more teams with two ideas each (the first primary and approved), scored by two judges."""
+        numbers = range(self.team_count, self.team_count + count)
+        self.team_count += count
+        teams = Team.objects.bulk_create(Team(team_id=f'T{n:04d}', team_name=f'Team {n}') for n in numbers)
+        ideas = Idea.objects.bulk_create(
+            Idea(
+                team=team, sih_ps_id=f'PS{n % 3}', ps_title=f'Problem {n % 3}', ps_description='',
+                idea_title=f'Idea {n}-{i}', idea_description=f'words for idea {n} {i}',
+                is_primary=i == 0, approved=i == 0,
+            )
+            for n, team in zip(numbers, teams)
+            for i in range(2)
+        )
+        index_ideas(idea.pk for idea in ideas)
+        IdeaScore.objects.bulk_create(
+            IdeaScore(idea=idea, judge=judge, criterion_id=criterion.pk, score=self.rnd.randint(0, criterion.max_score))
+            for idea in ideas if idea.is_primary
+            for judge in self.rnd.sample(self.judges, 2)
+            for criterion in get_rubric().criteria
+        )
+        JudgeConflict.objects.bulk_create(
+            JudgeConflict(judge=self.judges[n % self.JUDGES], team=team, reason='test') for n, team in zip(numbers, teams)
+        )
+        rebuild_all_summaries()
+        assign_judges(per_idea=2)
+
+    def client_for(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def count_queries(self, client, path):
+        """Status and query count of the second of two requests, so one-off work is not counted."""
+        client.get(path)
+        caches['responses'].clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(path)
+        return response.status_code, len(queries)
+
+
+class LandingQueryCountTests(SeededTestCase):
+    # the data version for the ETag, the annotated team query and the approved titles prefetch
+    QUERIES = 3
+
+    def test_flat_at_10_100_and_1000_teams(self):
+        client = self.client_for(self.admin)
+        for teams in (10, 100, 1000):
+            self.add_teams(teams - self.team_count)
+            client.get('/api/landing/landing_data/')
+            with self.subTest(teams=teams), self.assertNumQueries(self.QUERIES):
+                response = client.get('/api/landing/landing_data/')
+            self.assertEqual(len(response.data), teams)
+
+    def test_row_fields(self):
+        # the payload of the original endpoint, unchanged
+        self.add_teams(1)
+        row, = self.client_for(self.admin).get('/api/landing/landing_data/').data
+        self.assertEqual(list(row), [
+            'team_id', 'team_name', 'primary_ps_id', 'primary_ps_title', 'progress', 'marks',
+            'approved_count', 'approved_titles',
+        ])
+
+
+def list_endpoints(resolver=None, prefix=''):
+    """(route, view class, is a router list) for every argument-free URL under /api/ with a GET handler."""
+    resolver = resolver or get_resolver()
+    for pattern in resolver.url_patterns:
+        route = prefix + str(pattern.pattern).lstrip('^').rstrip('$')
+        if isinstance(pattern, URLResolver):
+            yield from list_endpoints(pattern, route)
+            continue
+        if not isinstance(pattern, URLPattern) or pattern.pattern.regex.groups:
+            continue
+        view = getattr(pattern.callback, 'cls', None)
+        actions = getattr(pattern.callback, 'actions', None)
+        if view is None or not route.startswith('api/') or pattern.name == 'api-root':
+            continue
+        if (actions is not None and 'get' not in actions) or (actions is None and not hasattr(view, 'get')):
+            continue
+        yield '/' + route, view, (pattern.name or '').endswith('-list')
+
+
+def list_requests():
+    """(label, path): each endpoint on one full page, with its ``VARIANTS`` and, if sparse, per field."""
+    page = f'page_size={PkCursorPagination.max_page_size}'
+    for url, view, is_list in list_endpoints():
+        yield url, f'{url}?{page}'
+        for query in VARIANTS.get(url, []):
+            yield f'{url}?{query}', f'{url}?{page}&{query}'
+        if is_list and issubclass(view, SparseFieldsetMixin):
+            for name in view.serializer_class().fields:
+                yield f'{url}?fields={name}', f'{url}?{page}&fields={name}'
+
+
+class ListQueryScalingTests(SeededTestCase):
+    """No list endpoint may run more queries for more rows.
+
+    Every viewset declares the relations its serializer reads (see
+    ``teams.relations``); a missing one shows up here as a count that grows
+    between 4 and 12 teams.
+    """
+
+    def counts(self, requests):
+        counts = {}
+        for role, user in (('admin', self.admin), ('judge', self.judges[0])):
+            client = self.client_for(user)
+            for label, path in requests:
+                status_code, queries = self.count_queries(client, path)
+                if status_code == 200:
+                    counts[f'{role} {label}'] = queries
+                elif status_code >= 500:
+                    counts[f'{role} {label}'] = f'HTTP {status_code}'
+        return counts
+
+    def test_query_counts_do_not_grow(self):
+        requests = list(list_requests())
+        self.add_teams(4)
+        small = self.counts(requests)
+        self.add_teams(8)
+        # past one page, pagination would hide the growth
+        self.assertLessEqual(IdeaScore.objects.count(), PkCursorPagination.max_page_size)
+        large = self.counts(requests)
+        self.assertGreater(len(small), 50)
+        self.assertEqual(small, large)
+
+
+class TeamDetailQueryCountTests(SeededTestCase):
+    def test_constant_with_judge_breakdown(self):
+        self.add_teams(3)
+        client = self.client_for(self.admin)
+        get_rubric()
+        client.get('/api/teams/T0001/details/', {'include': 'judges'})
+        caches['responses'].clear()
+        # the data version and generations, the team, its ideas with their summaries, and the per-judge scores
+        with self.assertNumQueries(5):
+            response = client.get('/api/teams/T0001/details/', {'include': 'judges'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['judges']), 2)
+        self.assertEqual(len(response.data['rubric_scores']), len(get_rubric().criteria))
+
+    def test_judges_cannot_see_other_judges_marks(self):
+        self.add_teams(1)
+        scorers = IdeaScore.objects.filter(idea__team__team_id='T0000').values_list('judge', flat=True).distinct()
+        self.assertEqual(len(scorers), 2)
+        client = self.client_for(User.objects.get(pk=scorers[0]))
+        response = client.get('/api/teams/T0000/details/', {'include': 'judges'})
+        self.assertEqual(response.status_code, 403)
+        self.assertNotIn('judges', client.get('/api/teams/T0000/details/').data)
+
+
+class DataVersionTests(TestCase):
+    def setUp(self):
+        Team.objects.create(team_id='T001', team_name='Team')
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('admin', role='admin'))
+
+    def etag(self):
+        response = self.client.get('/api/landing/landing_data/')
+        self.assertNotIn('Last-Modified', response)
+        return response['ETag']
+
+    def test_every_write_moves_the_etag(self):
+        etag = self.etag()
+        self.assertEqual(self.client.get('/api/landing/landing_data/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        seen = {etag}
+        for _ in range(2):
+            # writes within the same second, from a worker whose cache this one does not see
+            with self.captureOnCommitCallbacks(execute=True):
+                bump_data_version(Team)
+            cache.clear()
+            etag = self.etag()
+            self.assertNotIn(etag, seen)
+            seen.add(etag)
+
+
+class IndexUsageTests(TestCase):
+    """The hot lookups are planned as index searches, not table scans."""
+
+    HOT_QUERIES = {
+        'primary idea of a team': Idea.objects.filter(team_id=1, is_primary=True),
+        'approved ideas of a team': Idea.objects.filter(team_id=1, approved=True),
+        'idea by team and title': Idea.objects.filter(team_id=1, idea_title__in=['a', 'b']),
+        'ideas by problem statement': Idea.objects.filter(sih_ps_id='PS1'),
+        'criterion by name': RubricCriterion.objects.filter(name='Innovation'),
+        'scores of an idea': IdeaScore.objects.filter(idea_id=1),
+        'scores of an idea per criterion': IdeaScore.objects.filter(idea_id=1, criterion_id=1),
+    }
+
+    def test_hot_queries_use_an_index(self):
+        if connection.vendor == 'postgresql':
+            # on tables this small the planner would rather scan, index or not
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        for label, queryset in self.HOT_QUERIES.items():
+            plan = queryset.explain()
+            with self.subTest(label, plan=plan):
+                if connection.vendor == 'sqlite':
+                    steps = [line for line in plan.splitlines() if 'SCAN' in line or 'SEARCH' in line]
+                    self.assertTrue(steps)
+                    for line in steps:
+                        self.assertIn('USING', line)
+                else:
+                    self.assertNotIn('Seq Scan', plan)
+
+
+class DuplicateTests(TestCase):
+    def test_report_only_reads_fingerprints_taken_on_save(self):
+        for n in range(2):
+            team = Team.objects.create(team_id=f'T00{n}', team_name=f'Team {n}')
+            Idea.objects.create(
+                team=team, sih_ps_id='PS1', ps_title='Problem', ps_description='', idea_title='Smart irrigation',
+                idea_description='Soil moisture sensors that water crops only when needed', is_primary=True,
+            )
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user('admin', role='admin'))
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get('/api/ideas/duplicates/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([len(cluster['ideas']) for cluster in response.data['clusters']], [2])
+        self.assertFalse([q['sql'] for q in queries if not q['sql'].lstrip().upper().startswith('SELECT')])
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        team = Team.objects.create(team_id='T001', team_name='Team')
+        Idea.objects.create(
+            team=team, sih_ps_id='PS1', ps_title='Problem', ps_description='',
+            idea_title='<img src=x onerror=alert(1)> R&D drones', idea_description='Drones <script>x()</script>',
+            is_primary=True,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('judge', role='judge'))
+
+    def test_highlights_are_escaped(self):
+        response = self.client.get('/api/ideas/search/', {'q': 'drones'})
+        self.assertEqual(response.status_code, 200)
+        hit, = response.data['results']
+        # PostgreSQL's ts_headline may trim the title to a fragment
+        self.assertTrue(hit['title'].endswith('onerror=alert(1)&gt; R&amp;D <mark>drones</mark>'), hit['title'])
+        for text in (hit['title'], hit['snippet']):
+            self.assertIn('<mark>', text)
+            self.assertNotIn('<', text.replace('<mark>', '').replace('</mark>', ''))
+
+    def test_last_word_matches_as_prefix(self):
+        for query, found in (('dro', True), ('R dro', True), ('dro R', False)):
+            with self.subTest(query=query):
+                response = self.client.get('/api/ideas/search/', {'q': query})
+                self.assertEqual(len(response.data['results']), int(found))
+
+    def test_index_many_ids_at_once(self):
+        # more ids than SQLite accepts as parameters in one statement
+        index_ideas([*range(1_000_000, 1_040_000), Idea.objects.get().pk])
+        response = self.client.get('/api/ideas/search/', {'q': 'drones'})
+        self.assertEqual(len(response.data['results']), 1)
+
+
+class ImportOptionTests(TestCase):
+    def test_sizes_must_be_positive(self):
+        for option in ('--chunk-size', '--batch-size', '--workers'):
+            with self.subTest(option=option), self.assertRaisesMessage(CommandError, f'{option} must be at least 1'):
+                call_command('import_from_excel', __file__, '--format', 'csv', option, '0')
+
+
+class ApprovalTests(TestCase):
+    def setUp(self):
+        self.ideas = {}
+        for team_id in ('T001', 'T002'):
+            team = Team.objects.create(team_id=team_id, team_name=team_id)
+            for n, title in enumerate(('First', 'Second')):
+                self.ideas[team_id, title] = Idea.objects.create(
+                    team=team, sih_ps_id=f'PS{n}', ps_title='Problem', ps_description='', idea_title=title,
+                    idea_description='', is_primary=n == 0, approved=n == 0,
+                )
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('admin', role='admin'))
+
+    def approved(self):
+        return sorted(Idea.objects.filter(approved=True).values_list('team__team_id', 'idea_title'))
+
+    def batch(self, teams, key=None):
+        headers = {'Idempotency-Key': key} if key else {}
+        return self.client.post('/api/teams/ideas/approve-batch/', {'teams': teams}, format='json', headers=headers)
+
+    def test_single_team_takes_titles_only(self):
+        response = self.client.post(
+            '/api/teams/T001/ideas/approve/', {'approved_ideas': [self.ideas['T001', 'Second'].pk]}, format='json',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['detail'], f"Invalid idea titles for team: [{self.ideas['T001', 'Second'].pk}]")
+        response = self.client.post('/api/teams/T001/ideas/approve/', {'approved_ideas': ['Second']}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.approved(), [('T001', 'Second'), ('T002', 'First')])
+
+    def test_batch_is_all_or_nothing(self):
+        response = self.batch({'T001': ['Second'], 'T002': ['Missing'], 'T404': []})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['errors'], {
+            'T002': "Invalid ideas for team: ['Missing']", 'T404': "Team not found.",
+        })
+        self.assertEqual(self.approved(), [('T001', 'First'), ('T002', 'First')])
+
+    def test_batch_reports_the_diff_per_team(self):
+        second = self.ideas['T001', 'Second']
+        response = self.batch({'T001': [second.pk], 'T002': ['First']})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['changed'], 2)
+        self.assertEqual(response.data['teams'], {
+            'T001': {
+                'approved': [{'id': second.pk, 'idea_title': 'Second'}],
+                'unapproved': [{'id': self.ideas['T001', 'First'].pk, 'idea_title': 'First'}],
+                'unchanged': 0,
+            },
+            'T002': {'approved': [], 'unapproved': [], 'unchanged': 2},
+        })
+        self.assertEqual(self.approved(), [('T001', 'Second'), ('T002', 'First')])
+
+    def test_idempotency_key_replays_the_first_response(self):
+        first = self.batch({'T001': ['Second']}, key='retry-1')
+        Idea.objects.filter(pk=self.ideas['T001', 'First'].pk).update(approved=True)
+        replayed = self.batch({'T001': ['Second']}, key='retry-1')
+        self.assertEqual(replayed.status_code, 200)
+        self.assertEqual(replayed['Idempotent-Replayed'], 'true')
+        self.assertEqual(replayed.data, first.data)
+        # the replay wrote nothing
+        self.assertEqual(self.approved(), [('T001', 'First'), ('T001', 'Second'), ('T002', 'First')])
+
+    def test_idempotency_key_with_another_body_conflicts(self):
+        self.batch({'T001': ['Second']}, key='retry-1')
+        response = self.batch({'T001': ['First']}, key='retry-1')
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(self.approved(), [('T001', 'Second'), ('T002', 'First')])
+
+
+class XlsxPartTests(SimpleTestCase):
+    def test_parts_read_cells_like_openpyxl(self):
+        workbook = Workbook()
+        sheet = workbook.active
+        sheet.title = 'IdeaScores'
+        sheet.append(['team_id', 'idea_title', 'criterion', 'judge', 'score', 'comments'])
+        for n in range(400):
+            # a date, a time, a percentage and a fixed-point number, each with its number format
+            comments = (datetime.datetime(2024, 1, 1 + n % 28, 9, 30), datetime.time(n % 24, 15), 0.25, 1234.5)[n % 4]
+            sheet.append([f'T{n:03}', f'Idea {n}', 'Impact', 'judge', 7.5 if n % 2 else n % 10, comments])
+            sheet.cell(sheet.max_row, 6).number_format = ('yyyy-mm-dd hh:mm', 'hh:mm', '0%', '#,##0.00')[n % 4]
+            if n % 50 == 0:
+                sheet.append([])
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'scores.xlsx')
+        workbook.save(path)
+
+        expected = list(iter_records(iter_xlsx_values(path, 'IdeaScores'), SCORE_COLUMNS, parse_score_row))
+        with mock.patch('teams.sheets.PART_BYTES', 4096):
+            parts, tasks = plan_parts(path, 'xlsx', 'IdeaScores', 'IdeaScores', workers=2)
+            records = [record for task in tasks for record in parse_part(*task)]
+        self.assertGreater(parts, 2)
+        # openpyxl also returns the blank rows, which parse to None and are skipped on import
+        self.assertEqual(records, [record for record in expected if record is not None])
+        self.assertEqual(records[0][-1], '2024-01-01 09:30:00')
+
+
+class LeaderboardSocketTests(TransactionTestCase):
+    """The live leaderboard over the in-memory channel layer; writes must commit to be published."""
+
+    def setUp(self):
+        call_command('seed_rubrics', stdout=open(os.devnull, 'w'))
+        self.team = Team.objects.create(team_id='T001', team_name='Team')
+        self.idea = Idea.objects.create(
+            team=self.team, sih_ps_id='PS1', ps_title='Problem', ps_description='', idea_title='Idea',
+            idea_description='', is_primary=True,
+        )
+        self.judge = User.objects.create_user('judge', role='judge')
+        self.admin = User.objects.create_user('admin', role='admin')
+        self.application = JWTAuthMiddleware(URLRouter(websocket_urlpatterns))
+
+    def communicator(self, token):
+        return WebsocketCommunicator(self.application, f'/ws/leaderboard/?token={token}')
+
+    async def connect(self):
+        communicator = self.communicator(await sync_to_async(lambda: str(AccessToken.for_user(self.judge)))())
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        return communicator, await communicator.receive_json_from()
+
+    def post(self, user, path, data):
+        client = APIClient()
+        client.force_authenticate(user)
+        response = client.post(path, data, format='json')
+        self.assertIn(response.status_code, (200, 201), response.data)
+
+    async def assert_delta_after(self, user, path, data):
+        communicator, _ = await self.connect()
+        await sync_to_async(self.post)(user, path, data)
+        delta = await communicator.receive_json_from(timeout=5)
+        await communicator.disconnect()
+        self.assertEqual(delta['type'], 'delta')
+        self.assertEqual([row['team_id'] for row in delta['teams']], ['T001'])
+        return delta['teams'][0]
+
+    async def test_snapshot_on_connect(self):
+        communicator, message = await self.connect()
+        await communicator.disconnect()
+        self.assertEqual(message['type'], 'snapshot')
+        self.assertEqual([row['team_id'] for row in message['teams']], ['T001'])
+        self.assertFalse(message['teams'][0]['progress'])
+
+    async def test_delta_after_submit(self):
+        criteria = await sync_to_async(lambda: get_rubric().criteria)()
+        row = await self.assert_delta_after(
+            self.judge, '/api/teams/scores/submit/', {'team_id': 'T001', **{c.name: 1 for c in criteria}},
+        )
+        self.assertEqual(row['marks'], len(criteria))
+
+    async def test_delta_after_approval(self):
+        row = await self.assert_delta_after(self.admin, '/api/teams/T001/ideas/approve/', {'approved_ideas': ['Idea']})
+        self.assertEqual(row['approved_titles'], ['Idea'])
+
+    async def test_delta_after_single_score(self):
+        criterion = await sync_to_async(lambda: get_rubric().criteria[0])()
+        row = await self.assert_delta_after(
+            self.judge, '/api/judging/scores/', {'idea': self.idea.pk, 'criterion': criterion.pk, 'score': 1},
+        )
+        self.assertTrue(row['progress'])
+
+    async def test_bad_token_is_rejected(self):
+        for token in ('', 'not-a-jwt'):
+            with self.subTest(token=token):
+                connected, code = await self.communicator(token).connect()
+                self.assertFalse(connected)
+                self.assertEqual(code, 4401)
@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import TeamViewSet, IdeaViewSet, LandingPageViewSet, TeamDetailView, SubmitRubricScoresView, ApproveIdeasView
+from .views import TeamViewSet, IdeaViewSet, LandingPageViewSet, TeamDetailView, SubmitRubricScoresView, SubmitRubricScoresBatchView, ApproveIdeasView, ApproveIdeasBatchView, ResponseCacheStatsView
 
 router = DefaultRouter()
 router.register(r'teams', TeamViewSet)
@@ -11,5 +11,8 @@ urlpatterns = [
     path('', include(router.urls)),
     path('teams/<str:team_id>/details/', TeamDetailView.as_view(), name='team-detail'),
     path('teams/scores/submit/', SubmitRubricScoresView.as_view(), name='submit-rubric-scores'),
+    path('teams/scores/submit-batch/', SubmitRubricScoresBatchView.as_view(), name='submit-rubric-scores-batch'),
+    path('teams/ideas/approve-batch/', ApproveIdeasBatchView.as_view(), name='approve-ideas-batch'),
     path('teams/<str:team_id>/ideas/approve/', ApproveIdeasView.as_view(), name='approve-ideas'),
+    path('cache/stats/', ResponseCacheStatsView.as_view(), name='response-cache-stats'),
 ]
@@ -0,0 +1,109 @@
+"""A global change version for the team, idea and score data.
+
+Every write to ``Team``, ``Idea``, ``IdeaScore`` or ``RubricCriterion`` bumps
+a counter kept in the ``DataVersion`` table, so every worker process sees
+the same value: model signals cover per-row saves and deletes
+(``teams.signals``), and bulk write paths call ``bump_data_version``
+themselves. Read endpoints derive their ``ETag`` from it via
+``DATA_VERSION_CONDITIONS``, so a poll that sends ``If-None-Match`` is
+answered with 304 after a single query. There is no ``Last-Modified``: at
+one-second resolution, two writes within a second would let an
+``If-Modified-Since`` poll keep the first one's data.
+
+``bump_data_version(Model, ...)`` also moves the *generation* of each model
+written, which is what the response cache (``teams.response_cache``) keys
+its entries on: a new score drops cached team details but not the team list.
+"""
+
+import hashlib
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+
+from config.routers import replica_in_use
+from .models import DataVersion
+
+VERSION_KEY = 'teams:data:version'
+GENERATION_KEY = 'teams:data:generation:{}'
+
+
+def _read(keys):
+    """``{key: (value, modified)}`` of ``keys``, creating the counters that do not exist yet."""
+    # always the primary: a lagging replica would hand out old versions
+    rows = DataVersion.objects.using(DEFAULT_DB_ALIAS).filter(key__in=keys).values_list('key', 'value', 'modified')
+    stamps = {key: (value, modified) for key, value, modified in rows}
+    if len(stamps) < len(keys):
+        _seed(keys)
+        stamps = {key: (value, modified) for key, value, modified in rows.all()}
+    return stamps
+
+
+def _seed(keys):
+    # Start from a time-based value so a wiped table never repeats an old version
+    now = timezone.now()
+    DataVersion.objects.bulk_create(
+        [DataVersion(key=key, value=time.time_ns(), modified=now) for key in keys], ignore_conflicts=True,
+    )
+
+
+def data_version():
+    """Return ``(version, last modified datetime)`` of the team/idea/score data."""
+    return _read([VERSION_KEY])[VERSION_KEY]
+
+
+def _generation_key(model):
+    return GENERATION_KEY.format(model._meta.label_lower)
+
+
+def data_generations(models):
+    """``(generations, last modified datetime)``: each model's write counter, and the latest of their writes."""
+    keys = [_generation_key(model) for model in models]
+    stamps = _read(keys)
+    return tuple(stamps[key][0] for key in keys), max((stamps[key][1] for key in keys), default=None)
+
+
+def _bump(models):
+    keys = [VERSION_KEY, *(_generation_key(model) for model in models)]
+    updated = DataVersion.objects.filter(key__in=keys).update(value=F('value') + 1, modified=timezone.now())
+    if updated < len(keys):
+        _seed(keys)
+
+
+def bump_data_version(*models):
+    """Record a data change to ``models`` once the current transaction commits."""
+    transaction.on_commit(lambda: _bump(models))
+
+
+def may_be_stale(modified):
+    """Whether reads may come from a replica that has not caught up with a write at ``modified``."""
+    return replica_in_use() and (timezone.now() - modified).total_seconds() < settings.READ_YOUR_WRITES_SECONDS
+
+
+def data_etag(request, *args, **kwargs):
+    version, modified = data_version()
+    # tagging a lagging replica's answer with the new version would let clients keep it as current
+    if may_be_stale(modified):
+        return None
+    # Scope the tag to the URL, the representation and the user
+    key = f"{version}|{request.get_full_path()}|{request.META.get('HTTP_ACCEPT', '')}|{request.user.pk}"
+    return hashlib.md5(key.encode()).hexdigest()
+
+
+def _revalidate(view):
+    def wrapper(request, *args, **kwargs):
+        response = view(request, *args, **kwargs)
+        # Let browsers keep the response but check back with the ETag every time
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ('Authorization', 'Accept'))
+        return response
+    return wrapper
+
+
+# Decorators for view methods, e.g. ``@method_decorator(DATA_VERSION_CONDITIONS, name='list')``
+DATA_VERSION_CONDITIONS = (_revalidate, condition(etag_func=data_etag))
@@ -1,22 +1,41 @@
 from rest_framework import viewsets, permissions, filters
 from rest_framework.views import APIView
+from config.routers import ReplicaReadMixin
 from .models import Team, Idea
+from .approvals import apply_approvals
 from .serializers import TeamSerializer, IdeaSerializer
+from .dashboard import landing_rows
+from .fieldsets import SparseFieldsetMixin
+from .live import publish_teams
+from .pagination import PkCursorPagination
+from .response_cache import cache_responses, cache_stats
+from .search import search_ideas
+from .dedup import DEFAULT_THRESHOLD, find_duplicate_clusters
+from .idempotency import remember, replay, request_hash, request_key
+from .versioning import DATA_VERSION_CONDITIONS
 from django_filters.rest_framework import DjangoFilterBackend
 from accounts.permissions import IsAdminUser
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db.models import Sum
+from django.db.models import Exists, OuterRef, Prefetch
+from judging.assignments import assigned_to
 from judging.models import IdeaScore, RubricCriterion
-from django.db.models import Avg
+from judging.rubrics import get_rubric
+from judging.scoring import save_rubric_scores, validate_rubric_scores
+from judging.summaries import criterion_average
+from django.db import IntegrityError, transaction
 from django.shortcuts import get_object_or_404
+from django.utils.decorators import method_decorator
 from rest_framework import status
 
 
-class TeamViewSet(viewsets.ModelViewSet):
+@method_decorator(DATA_VERSION_CONDITIONS, name='list')
+@cache_responses(Team)
+class TeamViewSet(ReplicaReadMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = Team.objects.all()
     serializer_class = TeamSerializer
+    pagination_class = PkCursorPagination
     filter_backends = [DjangoFilterBackend, filters.SearchFilter]
     filterset_fields = ['team_id', 'team_name']
     search_fields = ['team_id', 'team_name']
@@ -28,80 +47,127 @@ class TeamViewSet(viewsets.ModelViewSet):
             permission_classes = [IsAuthenticated]
         return [permission() for permission in permission_classes]
 
-class IdeaViewSet(viewsets.ModelViewSet):
+@method_decorator(DATA_VERSION_CONDITIONS, name='list')
+@cache_responses(Idea)
+class IdeaViewSet(ReplicaReadMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = Idea.objects.all()
     serializer_class = IdeaSerializer
+    pagination_class = PkCursorPagination
     filter_backends = [DjangoFilterBackend, filters.SearchFilter]
     filterset_fields = ['team', 'sih_ps_id']
     search_fields = ['idea_title', 'sih_ps_id', 'ps_title']
 
     def get_permissions(self):
-        if self.action in ['create', 'update', 'partial_update', 'destroy']:
+        if self.action in ['create', 'update', 'partial_update', 'destroy', 'duplicates']:
             permission_classes = [IsAuthenticated, IsAdminUser]
         else:
             permission_classes = [IsAuthenticated]
         return [permission() for permission in permission_classes]
-    
-class LandingPageViewSet(viewsets.ViewSet):
-    permission_classes = [IsAuthenticated]  # Adjust if needed
 
     @action(detail=False, methods=['get'])
-    def landing_data(self, request):
-        teams = Team.objects.all()
-        data = []
-
-        for team in teams:
-            primary_idea = team.ideas.filter(is_primary=True).first()
-            if not primary_idea:
+    def search(self, request):
+        """Ranked full-text search: ``?q=<words>&limit=20``.
+
+        Matches idea and problem statement titles and descriptions; titles
+        rank higher. ``title`` and ``snippet`` are HTML-escaped, with the matches
+        marked with ``<mark>``, so clients can render them as markup.
+        """
+        query = request.query_params.get('q', '')
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', 20)), 100))
+        except ValueError:
+            return Response({"detail": "limit must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+
+        hits = search_ideas(query, limit)
+        ideas = (
+            Idea.objects.select_related('team')
+            .only('team__team_id', 'team__team_name', 'sih_ps_id', 'ps_title', 'idea_title', 'is_primary')
+            .in_bulk([idea_id for idea_id, *_ in hits])
+        )
+        results = []
+        for idea_id, rank, title, snippet in hits:
+            idea = ideas.get(idea_id)
+            if idea is None:
                 continue
+            results.append({
+                'id': idea.pk,
+                'team_id': idea.team.team_id,
+                'team_name': idea.team.team_name,
+                'sih_ps_id': idea.sih_ps_id,
+                'ps_title': idea.ps_title,
+                'idea_title': idea.idea_title,
+                'is_primary': idea.is_primary,
+                'rank': round(rank, 4),
+                'title': title,
+                'snippet': snippet,
+            })
+        return Response({'query': query, 'results': results})
 
-            progress = IdeaScore.objects.filter(idea=primary_idea).exists()
-            total_marks = IdeaScore.objects.filter(idea=primary_idea).aggregate(total=Sum('score'))['total'] or 0
-
-            total_ideas = team.ideas.count()
-            approved_count = team.ideas.filter(approved=True).count()
-
-            # collect titles of approved ideas for this team
-            approved_titles = list(team.ideas.filter(approved=True).values_list('idea_title', flat=True))
+    @action(detail=False, methods=['get'])
+    def duplicates(self, request):
+        """Near-duplicate idea clusters per problem statement (admins only).
 
-            data.append({
-                'team_id': team.team_id,
-                'team_name': team.team_name,
-                'primary_ps_id': primary_idea.sih_ps_id,
-                'primary_ps_title': primary_idea.ps_title,
-                'progress': progress,
-                'marks': total_marks,
-                'approved_count': f"{approved_count}/{total_ideas}",
-                'approved_titles': approved_titles
-            })
+        ``?threshold=0.7`` sets the minimum estimated similarity and
+        ``?sih_ps_id=`` limits the report to one problem statement. Ideas
+        are fingerprinted when saved or imported; this only reads.
+        """
+        try:
+            threshold = float(request.query_params.get('threshold', DEFAULT_THRESHOLD))
+        except ValueError:
+            threshold = None
+        if threshold is None or not 0 < threshold <= 1:
+            return Response({"detail": "threshold must be a number between 0 and 1."}, status=status.HTTP_400_BAD_REQUEST)
+
+        clusters = find_duplicate_clusters(threshold, request.query_params.get('sih_ps_id'))
+        return Response({'threshold': threshold, 'clusters': clusters})
+    
+class LandingPageViewSet(ReplicaReadMixin, viewsets.ViewSet):
+    permission_classes = [IsAuthenticated]  # Adjust if needed
 
-        return Response(data)
+    @action(detail=False, methods=['get'])
+    @method_decorator(DATA_VERSION_CONDITIONS)
+    def landing_data(self, request):
+        """The leaderboard; ``?assigned=me`` keeps only teams assigned to the caller."""
+        assigned = request.query_params.get('assigned')
+        if assigned is None:
+            return Response(landing_rows())
+        if assigned != 'me':
+            return Response({"assigned": "Only 'me' is supported."}, status=status.HTTP_400_BAD_REQUEST)
+        teams = Team.objects.filter(Exists(assigned_to(request.user).filter(idea__team=OuterRef('pk'))))
+        return Response(landing_rows(teams))
     
-class TeamDetailView(APIView):
+@method_decorator(DATA_VERSION_CONDITIONS, name='get')
+@cache_responses(Team, Idea, IdeaScore, RubricCriterion, methods=('get',))
+class TeamDetailView(ReplicaReadMixin, APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, team_id):
-        try:
-            team = Team.objects.get(team_id=team_id)
-        except Team.DoesNotExist:
+        # ?include=judges adds each judge's marks for the primary idea. Admins
+        # only: judges see just their own scores (IdeaScoreViewSet), and cached
+        # responses are shared by role, not by user.
+        include_judges = 'judges' in request.query_params.get('include', '').split(',')
+        if include_judges and request.user.role != 'admin':
+            return Response({"detail": "Only admins can see each judge's marks."}, status=403)
+
+        # The team and all of its ideas (with their score summaries) in two queries
+        ideas = Idea.objects.select_related('score_summary').order_by('pk')
+        team = Team.objects.prefetch_related(Prefetch('ideas', queryset=ideas)).filter(team_id=team_id).first()
+        if team is None:
             return Response({"detail": "Team not found"}, status=404)
 
         # Primary idea
-        primary_idea = team.ideas.filter(is_primary=True).first()
+        primary_idea = next((idea for idea in team.ideas.all() if idea.is_primary), None)
         if not primary_idea:
             return Response({"detail": "Primary idea not found"}, status=404)
 
-        # Aggregate average rubric scores per criterion for primary idea
-        scores = IdeaScore.objects.filter(idea=primary_idea)
+        # Average rubric scores per criterion, read from the primary idea's summary row
+        summary = getattr(primary_idea, 'score_summary', None)
 
         rubric_scores = {}
-        criteria = RubricCriterion.objects.all()
-        for crit in criteria:
-            avg_score = scores.filter(criterion=crit).aggregate(avg=Avg('score'))['avg'] or 0
-            rubric_scores[crit.name] = avg_score
+        for crit in get_rubric().criteria:
+            rubric_scores[crit.name] = criterion_average(summary, crit)
 
         # Secondary ideas list (all except primary)
-        secondary_ideas_qs = team.ideas.filter(is_primary=False)
         secondary_ideas = [
             {
                 "primary_ps_title": idea.ps_title,       # Add PS title
@@ -109,7 +175,7 @@ class TeamDetailView(APIView):
                 "idea_title": idea.idea_title,
                 "idea_description": idea.idea_description,
             }
-            for idea in secondary_ideas_qs
+            for idea in team.ideas.all() if not idea.is_primary
         ]
 
         response = {
@@ -123,9 +189,30 @@ class TeamDetailView(APIView):
             "secondary_ideas": secondary_ideas,
         }
 
+        if include_judges:
+            response["judges"] = self._judge_breakdown(primary_idea)
+
         return Response(response)
+
+    @staticmethod
+    def _judge_breakdown(idea):
+        """Per-judge marks for ``idea`` from a single query."""
+        criteria = get_rubric().by_id
+        judges = {}
+        rows = (
+            IdeaScore.objects
+            .filter(idea=idea)
+            .order_by('judge__username', 'criterion_id')
+            .values_list('judge__username', 'criterion_id', 'score')
+        )
+        for username, criterion_id, score in rows:
+            judge = judges.setdefault(username, {"judge": username, "scores": {}, "total": 0})
+            criterion = criteria.get(criterion_id)
+            judge["scores"][criterion.name if criterion else str(criterion_id)] = score
+            judge["total"] += score
+        return list(judges.values())
     
-class SubmitRubricScoresView(APIView):
+class SubmitRubricScoresView(ReplicaReadMixin, APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
@@ -138,62 +225,144 @@ class SubmitRubricScoresView(APIView):
         if not primary_idea:
             return Response({"detail": "Primary idea not found for team"}, status=status.HTTP_404_NOT_FOUND)
 
-        judge = request.user
+        # Validate every score before writing any of them
+        scores, errors = validate_rubric_scores(scores_data, get_rubric().by_name)
+        if errors:
+            return Response({"errors": errors, "saved_scores": []}, status=status.HTTP_400_BAD_REQUEST)
 
-        errors = {}
-        saved_scores = []
+        saved_scores = save_rubric_scores(request.user, {primary_idea: scores})[primary_idea.pk]
+        publish_teams([team.pk])
+        return Response({"detail": "Scores saved", "scores": saved_scores}, status=status.HTTP_200_OK)
 
-        for rubric_name, score_value in scores_data.items():
-            try:
-                criterion = RubricCriterion.objects.get(name=rubric_name)
-            except RubricCriterion.DoesNotExist:
-                errors[rubric_name] = "Criterion not found"
-                continue
+class SubmitRubricScoresBatchView(ReplicaReadMixin, APIView):
+    """Scores for many teams in one request, for judges who mark offline and sync later.
 
-            # Validate score_value within range
-            if not isinstance(score_value, (int, float)) or score_value < 0 or score_value > criterion.max_score:
-                errors[rubric_name] = f"Invalid score. Must be 0 to {criterion.max_score}"
-                continue
+    Body: ``{"submissions": [{"team_id": "T001", "<rubric name>": 12, ...}, ...]}``,
+    each entry shaped like a single submit. Nothing is saved unless every
+    entry is valid.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        submissions = request.data.get('submissions') if isinstance(request.data, dict) else request.data
+        if not isinstance(submissions, list) or not all(isinstance(s, dict) for s in submissions):
+            return Response({"detail": "Expected a list of submissions."}, status=status.HTTP_400_BAD_REQUEST)
 
-            # Save or update score
-            obj, created = IdeaScore.objects.update_or_create(
-                idea=primary_idea,
-                judge=judge,
-                criterion=criterion,
-                defaults={'score': score_value}
+        team_ids = {str(s.get('team_id')) for s in submissions}
+        primary_ideas = {}
+        for idea in Idea.objects.filter(team__team_id__in=team_ids, is_primary=True).select_related('team').order_by('pk'):
+            primary_ideas.setdefault(idea.team.team_id, idea)
+        criteria = get_rubric().by_name
+
+        errors = {}
+        scores_by_idea = {}
+        for submission in submissions:
+            team_id = str(submission.get('team_id'))
+            primary_idea = primary_ideas.get(team_id)
+            if primary_idea is None:
+                errors[team_id] = {"detail": "Team or its primary idea not found"}
+                continue
+            scores, score_errors = validate_rubric_scores(
+                {k: v for k, v in submission.items() if k != 'team_id'}, criteria
             )
-            saved_scores.append({
-                "criterion": rubric_name,
-                "score": score_value,
-                "created": created,
-            })
+            if score_errors:
+                errors[team_id] = score_errors
+                continue
+            # a later entry for the same team overrides an earlier one
+            scores_by_idea.setdefault(primary_idea, {}).update(scores)
 
         if errors:
-            return Response({"errors": errors, "saved_scores": saved_scores}, status=status.HTTP_400_BAD_REQUEST)
+            return Response({"errors": errors}, status=status.HTTP_400_BAD_REQUEST)
 
-        return Response({"detail": "Scores saved", "scores": saved_scores}, status=status.HTTP_200_OK)
+        saved = save_rubric_scores(request.user, scores_by_idea)
+        publish_teams(idea.team_id for idea in scores_by_idea)
+        return Response(
+            {
+                "detail": "Scores saved",
+                "teams": {idea.team.team_id: saved[idea.pk] for idea in scores_by_idea},
+            },
+            status=status.HTTP_200_OK,
+        )
     
-class ApproveIdeasView(APIView):
+class ApproveIdeasView(ReplicaReadMixin, APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request, team_id):
-        team = Team.objects.filter(team_id=team_id).first()
-        if not team:
-            return Response({"detail": "Team not found."}, status=status.HTTP_404_NOT_FOUND)
-
         approved_idea_titles = request.data.get('approved_ideas', [])
+        if not isinstance(approved_idea_titles, list):
+            return Response({"detail": "approved_ideas must be a list of idea titles."}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Validate idea titles belong to this team
-        all_ideas = team.ideas.all()
-        all_idea_titles = set(idea.idea_title for idea in all_ideas)
-        invalid_titles = [title for title in approved_idea_titles if title not in all_idea_titles]
-        if invalid_titles:
-            return Response({"detail": f"Invalid idea titles for team: {invalid_titles}"}, status=status.HTTP_400_BAD_REQUEST)
+        # Approve only the ideas matching the titles and unapprove the rest
+        with transaction.atomic():
+            _, errors, changed = apply_approvals({team_id: approved_idea_titles}, by_id=False)
+        if errors:
+            error = errors[team_id]
+            code = status.HTTP_404_NOT_FOUND if error == "Team not found." else status.HTTP_400_BAD_REQUEST
+            return Response({"detail": error}, status=code)
+        publish_teams(changed)
+
+        return Response({"detail": "Approval statuses updated."}, status=status.HTTP_200_OK)
+
+class ApproveIdeasBatchView(ReplicaReadMixin, APIView):
+    """Approval for many teams in one request.
+
+    Body: ``{"teams": {"T001": [12, "Idea title", ...], ...}}``. Each listed
+    team ends up with exactly those ideas approved (ids or titles); other
+    teams are untouched. Nothing changes unless every entry is valid. The
+    response lists, per team, the ideas whose approval flipped. Send an
+    ``Idempotency-Key`` header to make retries return the first response.
+    """
+    permission_classes = [IsAuthenticated]
+    idempotency_scope = 'approve-ideas-batch'
 
-        # Update approval statuses
-        # Mark all ideas unapproved first
-        all_ideas.update(approved=False)
-        # Approve only ideas matching titles
-        team.ideas.filter(idea_title__in=approved_idea_titles).update(approved=True)
+    def post(self, request):
+        teams = request.data.get('teams') if isinstance(request.data, dict) else None
+        if not isinstance(teams, dict) or not all(isinstance(items, list) for items in teams.values()):
+            return Response(
+                {"detail": "Expected {\"teams\": {team_id: [idea id or title, ...]}}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            key = request_key(request)
+        except ValueError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
 
-        return Response({"detail": "Approval statuses updated."}, status=status.HTTP_200_OK)
\ No newline at end of file
+        digest = request_hash(teams)
+        if key is not None:
+            stored = replay(request.user, self.idempotency_scope, key, digest)
+            if stored is not None:
+                return stored
+
+        try:
+            with transaction.atomic():
+                diff, errors, changed = apply_approvals(teams)
+                if errors:
+                    # not remembered: the client can fix the body and retry with the same key
+                    return Response({"errors": errors}, status=status.HTTP_400_BAD_REQUEST)
+                response = Response(
+                    {
+                        "detail": "Approval statuses updated.",
+                        "changed": sum(len(d["approved"]) + len(d["unapproved"]) for d in diff.values()),
+                        "teams": diff,
+                    },
+                    status=status.HTTP_200_OK,
+                )
+                if key is not None:
+                    remember(request.user, self.idempotency_scope, key, digest, response)
+        except IntegrityError:
+            # a concurrent request with the same key committed first; this one rolled back
+            stored = replay(request.user, self.idempotency_scope, key, digest)
+            if stored is None:
+                raise
+            return stored
+
+        publish_teams(changed)
+        return response
+
+
+class ResponseCacheStatsView(APIView):
+    """Response cache hits and misses per view (admins only); see ``teams.response_cache``."""
+    permission_classes = [IsAuthenticated, IsAdminUser]
+
+    def get(self, request):
+        return Response(cache_stats())